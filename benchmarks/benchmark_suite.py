@@ -25,7 +25,7 @@ from dataclasses import dataclass
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from vcfparser import VcfParser
+    from vcfparser import VcfParser, Record
 except ImportError:
     print("Error: vcfparser not found. Make sure it's installed or in PYTHONPATH")
     sys.exit(1)
@@ -39,6 +39,7 @@ class BenchmarkResult:
     memory_peak_mb: float
     records_processed: int = 0
     records_per_second: float = 0.0
+    bytes_per_record: float = 0.0
     
     def __post_init__(self):
         if self.records_processed > 0 and self.time_seconds > 0:
@@ -208,6 +209,101 @@ class VCFBenchmarker:
         self.results.append(result)
         return result
     
+    def benchmark_site_only_scan(self, limit: int = 1000, eager: bool = False) -> BenchmarkResult:
+        """
+        Benchmark a site-only scan that reads CHROM, POS and INFO.
+        
+        Args:
+            limit: Maximum number of records to scan
+            eager: Also touch the lazily computed record attributes, which
+                reproduces the cost of the old eager Record construction
+        """
+        def scan_sites():
+            vcf = VcfParser(str(self.vcf_file))
+            records = vcf.parse_records()
+            count = 0
+            
+            for record in records:
+                record.CHROM, record.POS, record.info_str
+                if eager:
+                    record.rec_line, record.ref_alt
+                    record.mapped_format_to_sample, record.genotype_property
+                count += 1
+                if count >= limit:
+                    break
+            return count
+        
+        time_taken, memory_used, record_count = self._measure_memory_and_time(scan_sites)
+        
+        result = BenchmarkResult(
+            operation=f"site_only_{'eager' if eager else 'lazy'}",
+            time_seconds=time_taken,
+            memory_peak_mb=memory_used,
+            records_processed=record_count
+        )
+        self.results.append(result)
+        return result
+    
+    def benchmark_count_records(self, by: Optional[str] = None) -> BenchmarkResult:
+        """
+        Benchmark counting all records without creating Record objects.
+        
+        Args:
+            by: Column to group the counts by, e.g. "CHROM"
+        """
+        def count_records():
+            vcf = VcfParser(str(self.vcf_file))
+            counts = vcf.count_records(by=by)
+            return counts if by is None else sum(counts.values())
+        
+        time_taken, memory_used, record_count = self._measure_memory_and_time(count_records)
+        
+        result = BenchmarkResult(
+            operation=f"count_records_{by.lower() if by else 'all'}",
+            time_seconds=time_taken,
+            memory_peak_mb=memory_used,
+            records_processed=record_count
+        )
+        self.results.append(result)
+        return result
+    
+    def benchmark_record_memory(self, n_samples: int, n_records: int = 10000) -> BenchmarkResult:
+        """
+        Benchmark the memory held by buffered records.
+        
+        Records are built from synthetic lines, the way a sort or dedup buffer holds them,
+        and the traced memory is reported per record (split fields included).
+        
+        Args:
+            n_samples: Number of sample columns per record
+            n_records: Number of records kept in memory
+        """
+        record_keys = ["CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT"]
+        record_keys += [f"sample{i}" for i in range(n_samples)]
+        sample_columns = "\t".join(["0/1:35"] * n_samples)
+        lines = [
+            f"chr1\t{pos}\t.\tA\tG\t50\tPASS\tDP=100;AF=0.5\tGT:DP\t{sample_columns}"
+            for pos in range(1, n_records + 1)
+        ]
+        
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        before, _ = tracemalloc.get_traced_memory()
+        records = [Record(line.split("\t"), record_keys) for line in lines]
+        after, peak = tracemalloc.get_traced_memory()
+        end_time = time.perf_counter()
+        tracemalloc.stop()
+        
+        result = BenchmarkResult(
+            operation=f"record_memory_{n_samples}_samples",
+            time_seconds=end_time - start_time,
+            memory_peak_mb=(peak - before) / 1024 / 1024,
+            records_processed=len(records),
+            bytes_per_record=(after - before) / len(records)
+        )
+        self.results.append(result)
+        return result
+    
     def run_full_suite(self, detailed: bool = False) -> List[BenchmarkResult]:
         """Run the complete benchmark suite."""
         print(f"Starting benchmark suite with {self.vcf_file.name}...")
@@ -224,12 +320,22 @@ class VCFBenchmarker:
                 self.benchmark_genotype_analysis(limit)
                 self.benchmark_info_parsing(limit)
                 self.benchmark_format_mapping(limit)
+                self.benchmark_site_only_scan(limit, eager=True)
+                self.benchmark_site_only_scan(limit)
         else:
             # Quick benchmarks
             self.benchmark_parse_records(1000)
             self.benchmark_genotype_analysis(500)
             self.benchmark_info_parsing(500)
             self.benchmark_format_mapping(500)
+            self.benchmark_site_only_scan(1000, eager=True)
+            self.benchmark_site_only_scan(1000)
+        
+        self.benchmark_count_records()
+        self.benchmark_count_records(by="CHROM")
+        
+        for n_samples in [10, 1000]:
+            self.benchmark_record_memory(n_samples)
         
         return self.results
     
@@ -248,6 +354,12 @@ class VCFBenchmarker:
             
             print(f"{result.operation:<20} {result.time_seconds:<10.4f} "
                   f"{result.memory_peak_mb:<12.2f} {records_str:<8} {rps_str:<10}")
+        
+        memory_results = [result for result in self.results if result.bytes_per_record > 0]
+        if memory_results:
+            print("-" * 80)
+            for result in memory_results:
+                print(f"{result.operation:<30} {result.bytes_per_record:>10.0f} bytes/record")
     
     def save_results(self, filename: str = "benchmark_results.csv"):
         """Save results to CSV file."""
@@ -255,7 +367,7 @@ class VCFBenchmarker:
         
         with open(filename, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['Operation', 'Time_Seconds', 'Memory_MB', 'Records_Processed', 'Records_Per_Second'])
+            writer.writerow(['Operation', 'Time_Seconds', 'Memory_MB', 'Records_Processed', 'Records_Per_Second', 'Bytes_Per_Record'])
             
             for result in self.results:
                 writer.writerow([
@@ -263,7 +375,8 @@ class VCFBenchmarker:
                     result.time_seconds,
                     result.memory_peak_mb,
                     result.records_processed,
-                    result.records_per_second
+                    result.records_per_second,
+                    result.bytes_per_record
                 ])
         
         print(f"\nResults saved to {filename}")
@@ -6,6 +6,7 @@ import tempfile
 import os
 from pathlib import Path
 from vcfparser import VcfParser, VCFWriter
+from vcfparser.bgzf import BgzfWriter
 
 
 @pytest.fixture(scope="session")
@@ -97,6 +98,12 @@ def gzipped_vcf_file(tmp_path, small_vcf_content):
     return vcf_file
 
 
+@pytest.fixture
+def bgzipped_vcf_file(tmp_path, small_vcf_content):
+    """Create a BGZF compressed VCF file with several small blocks for testing."""
+    return TestUtils.write_bgzf(tmp_path / "test_small_bgzf.vcf.gz", small_vcf_content, block_size=200)
+
+
 @pytest.fixture
 def temp_output_file(tmp_path):
     """Create a temporary output file for testing writers."""
@@ -126,6 +133,13 @@ class TestUtils:
         record_values = ['chr2', '2000', 'rs123', 'T', 'C,G', '45', 'PASS', 'AC=2,1;AF=0.33,0.17;DP=60', 'GT:DP:GQ', '0/1:20:30', '1/2:25:35', '0/0:15:25']
         return record_keys, record_values
 
+    @staticmethod
+    def write_bgzf(path, content, block_size=65280):
+        """Write text content as a BGZF file, starting a new block every `block_size` bytes."""
+        with BgzfWriter(path, block_size=block_size) as writer:
+            writer.write(content.encode())
+        return path
+
 
 @pytest.fixture
 def test_utils():
@@ -0,0 +1,141 @@
+"""
+Unit tests for the BGZF reader.
+"""
+import pytest
+from vcfparser.bgzf import BgzfReader, BgzfWriter, is_bgzf, iter_blocks, make_virtual_offset, split_virtual_offset
+
+
+class TestVirtualOffsets:
+    """Test virtual offset helpers."""
+    
+    def test_round_trip(self):
+        """Test combining and splitting virtual offsets."""
+        offset = make_virtual_offset(823, 17)
+        assert offset == (823 << 16) | 17
+        assert split_virtual_offset(offset) == (823, 17)
+
+
+class TestBgzfReader:
+    """Test reading BGZF files."""
+    
+    def test_is_bgzf(self, bgzipped_vcf_file, gzipped_vcf_file, small_vcf_file):
+        """Test BGZF detection."""
+        assert is_bgzf(bgzipped_vcf_file)
+        assert not is_bgzf(gzipped_vcf_file)
+        assert not is_bgzf(small_vcf_file)
+        
+    def test_readlines_across_blocks(self, bgzipped_vcf_file, small_vcf_content):
+        """Test that lines spanning block boundaries are read whole."""
+        with BgzfReader(bgzipped_vcf_file) as reader:
+            lines = [line.decode() for line in reader]
+        
+        assert "".join(lines) == small_vcf_content
+        
+    def test_read(self, bgzipped_vcf_file, small_vcf_content):
+        """Test reading a number of bytes and the rest of the file."""
+        with BgzfReader(bgzipped_vcf_file) as reader:
+            start = reader.read(300)
+            rest = reader.read()
+        
+        assert (start + rest).decode() == small_vcf_content
+        
+    def test_tell_and_seek(self, bgzipped_vcf_file):
+        """Test returning to a remembered virtual offset."""
+        with BgzfReader(bgzipped_vcf_file) as reader:
+            offsets = []
+            lines = []
+            while True:
+                offsets.append(reader.tell())
+                line = reader.readline()
+                if not line:
+                    break
+                lines.append(line)
+            
+            for offset, line in reversed(list(zip(offsets, lines))):
+                reader.seek(offset)
+                assert reader.readline() == line
+                
+    def test_tell_at_block_end_points_to_next_block(self, bgzipped_vcf_file):
+        """Test that an exhausted block reports the start of the next block."""
+        with BgzfReader(bgzipped_vcf_file) as reader:
+            reader.read(200)
+            block_start, within = split_virtual_offset(reader.tell())
+        
+        assert block_start > 0
+        assert within == 0
+        
+    @pytest.mark.parametrize("readahead", [None, 1, 3])
+    def test_threaded_readahead(self, bgzipped_vcf_file, small_vcf_content, readahead):
+        """Test that decompressing blocks in a thread pool returns the same data."""
+        with BgzfReader(bgzipped_vcf_file, threads=3, readahead=readahead) as reader:
+            lines = [line.decode() for line in reader]
+        
+        assert "".join(lines) == small_vcf_content
+        
+    def test_threaded_seek(self, bgzipped_vcf_file):
+        """Test that seeking restarts the read-ahead queue at the new block."""
+        with BgzfReader(bgzipped_vcf_file) as reader:
+            offsets = [reader.tell()]
+            for line in reader:
+                offsets.append(reader.tell())
+        
+        with BgzfReader(bgzipped_vcf_file) as plain, BgzfReader(bgzipped_vcf_file, threads=2, readahead=2) as threaded:
+            for offset in reversed(offsets):
+                plain.seek(offset)
+                threaded.seek(offset)
+                assert threaded.read() == plain.read()
+                
+    def test_iter_blocks(self, bgzipped_vcf_file, small_vcf_content):
+        """Test walking the block headers."""
+        blocks = list(iter_blocks(bgzipped_vcf_file))
+        
+        assert blocks[0][0] == 0
+        assert all(start + size == next_start for (start, size, _), (next_start, _, _) in zip(blocks, blocks[1:]))
+        assert sum(data_size for _, _, data_size in blocks) == len(small_vcf_content)
+        assert blocks[-1][2] == 0  # end-of-file marker
+        
+    def test_text_wrapper(self, bgzipped_vcf_file, small_vcf_content):
+        """Test that the reader works as the buffer of a text stream."""
+        import io
+        with io.TextIOWrapper(BgzfReader(bgzipped_vcf_file, threads=2)) as text:
+            assert text.read() == small_vcf_content
+            
+    def test_not_bgzf(self, gzipped_vcf_file):
+        """Test that plain gzip input is rejected."""
+        with BgzfReader(gzipped_vcf_file) as reader:
+            with pytest.raises(ValueError):
+                reader.readline()
+
+
+class TestBgzfWriter:
+    """Test writing BGZF files."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that written data reads back through gzip and BgzfReader."""
+        import gzip
+        data = b"".join(b"line %d\n" % i for i in range(5000))
+        path = tmp_path / "out.gz"
+        with BgzfWriter(path, block_size=1000) as writer:
+            writer.write(data)
+        
+        assert is_bgzf(path)
+        assert gzip.decompress(path.read_bytes()) == data
+        with BgzfReader(path) as reader:
+            assert reader.read() == data
+            
+    def test_tell_marks_block_start(self, tmp_path):
+        """Test that tell() returns an offset the reader can seek to."""
+        path = tmp_path / "out.gz"
+        with BgzfWriter(path) as writer:
+            writer.write(b"first\n")
+            offset = writer.tell()
+            writer.write(b"second\n")
+        
+        with BgzfReader(path) as reader:
+            reader.seek(offset)
+            assert reader.readline() == b"second\n"
+            
+    def test_invalid_block_size(self, tmp_path):
+        """Test that blocks larger than BGZF allows are rejected."""
+        with pytest.raises(ValueError):
+            BgzfWriter(tmp_path / "out.gz", block_size=70000)
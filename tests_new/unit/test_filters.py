@@ -0,0 +1,113 @@
+"""
+Unit tests for the compiled record filters.
+"""
+import pickle
+
+import pytest
+
+from vcfparser.filters import RecordFilter
+
+
+LINE = "chr1\t1000\trs1;rs2\tA\tG,AT\t45.5\tq10;s50\tAC=2,0;AF=0.33,0.01;DP=100;DB;CSQ=missense\tGT\t0/1"
+INFO_TYPES = {'AC': 'Integer', 'AF': 'Float', 'DP': 'Integer', 'DB': 'Flag', 'CSQ': 'String'}
+
+
+def evaluate(expression, line=LINE, info_types=INFO_TYPES):
+    """Compile an expression and run it on the split fields of a record line."""
+    return RecordFilter(expression, info_types).predicate(line.split("\t"))
+
+
+class TestRecordFilterComparisons:
+    """Test field comparisons."""
+    
+    @pytest.mark.parametrize("expression, expected", [
+        ('CHROM == "chr1"', True),
+        ("CHROM != chr1", False),
+        ("POS >= 1000", True),
+        ("POS > 1000", False),
+        ("QUAL >= 30", True),
+        ("QUAL < 45", False),
+        ("ID == rs2", True),
+        ("REF = A", True),
+        ("ALT == AT", True),
+        ("ALT != T", True),
+        ("FILTER == PASS", False),
+        ("FILTER == s50", True),
+        ("FILTER != q10", False),
+    ])
+    def test_fixed_columns(self, expression, expected):
+        """Test comparisons on the fixed VCF columns."""
+        assert evaluate(expression) is expected
+        
+    @pytest.mark.parametrize("expression, expected", [
+        ("INFO/DP > 10", True),
+        ("INFO/DP > 100", False),
+        ("INFO/AF < 0.05", True),
+        ("INFO/AC == 2", True),
+        ("INFO/CSQ == missense", True),
+        ("INFO/DB", True),
+        ("!INFO/DS", True),
+        ("INFO/MQ > 0", False),
+        ("INFO/MQ != 0", False),
+    ])
+    def test_info_fields(self, expression, expected):
+        """Test typed INFO comparisons, flags and missing keys."""
+        assert evaluate(expression) is expected
+        
+    def test_numeric_info_uses_header_type(self):
+        """Test that INFO values are compared as numbers only when the header says so."""
+        line = LINE.replace("DP=100", "DP=9")
+        assert evaluate("INFO/DP < 10", line)
+        assert evaluate("INFO/DP == 9", line.replace("DP=9", "DP=09"))
+        assert not evaluate("INFO/DP == 9", line.replace("DP=9", "DP=09"), {'DP': 'String'})
+        with pytest.raises(ValueError):
+            evaluate("INFO/DP > high")
+            
+    @pytest.mark.parametrize("alt, expected", [("C", "snp"), ("CT", "indel"), ("<DEL>", "other")])
+    def test_variant_type(self, alt, expected):
+        """Test the TYPE pseudo field."""
+        line = LINE.replace("G,AT", alt)
+        assert evaluate(f'TYPE == "{expected}"', line)
+        
+    def test_missing_values(self):
+        """Test that missing values never match."""
+        line = LINE.replace("45.5", ".")
+        assert not evaluate("QUAL >= 0", line)
+        assert not evaluate("QUAL != 0", line)
+
+
+class TestRecordFilterExpressions:
+    """Test combining comparisons and compiling expressions."""
+    
+    @pytest.mark.parametrize("expression, expected", [
+        ("QUAL >= 30 && INFO/DP > 10", True),
+        ("QUAL >= 30 and INFO/DP > 1000", False),
+        ("FILTER == PASS || INFO/DB", True),
+        ("!(FILTER == PASS) && (POS < 10 | POS > 999)", True),
+        ("not INFO/DB or CHROM == chr2", False),
+    ])
+    def test_boolean_operators(self, expression, expected):
+        """Test &&, ||, ! and parentheses."""
+        assert evaluate(expression) is expected
+        
+    def test_maxsplit(self):
+        """Test that the predicate only needs the fields up to the last one it reads."""
+        assert RecordFilter("POS > 5").maxsplit == 2
+        assert RecordFilter("TYPE == snp").maxsplit == 5
+        assert RecordFilter("QUAL > 5 || INFO/DP > 3").maxsplit == 8
+        record_filter = RecordFilter("INFO/DP > 10", INFO_TYPES)
+        assert record_filter.predicate(LINE.split("\t", record_filter.maxsplit))
+        
+    @pytest.mark.parametrize("expression", [
+        "", "QUAL >=", "QUAL > 5 &&", "(QUAL > 5", "DEPTH > 5", "CHROM < chr2", "INFO/DB == 1", "QUAL > 5 5",
+    ])
+    def test_invalid_expressions(self, expression):
+        """Test that invalid expressions are rejected when compiled."""
+        with pytest.raises(ValueError, match="Invalid filter expression"):
+            RecordFilter(expression, INFO_TYPES)
+            
+    def test_pickle_and_header_types(self):
+        """Test that filters survive the trip to a worker and pick up header types."""
+        record_filter = pickle.loads(pickle.dumps(RecordFilter('INFO/CSQ == "5"').with_info_types(INFO_TYPES)))
+        assert record_filter.info_types['CSQ'] == 'String'
+        assert not record_filter.predicate(LINE.split("\t"))
@@ -0,0 +1,85 @@
+"""
+Unit tests for VcfParser.parse_genotype_matrix and GenotypeMatrix.
+"""
+import sys
+
+import pytest
+from vcfparser import VcfParser
+
+
+HEADER = "##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\tS2\tS3\n"
+
+
+def write_vcf(path, lines):
+    path.write_text(HEADER + "".join(line + "\n" for line in lines))
+    return path
+
+
+def test_missing_numpy(small_vcf_file, monkeypatch):
+    """Test that a missing NumPy is reported with an install hint."""
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    with VcfParser(small_vcf_file) as vcf:
+        with pytest.raises(ImportError, match="pip install numpy"):
+            vcf.parse_genotype_matrix()
+
+
+class TestGenotypeMatrix:
+    """Test the dense genotype export."""
+
+    @pytest.fixture(autouse=True)
+    def numpy(self):
+        return pytest.importorskip("numpy")
+
+    def test_matrix(self, vcf_parser, numpy):
+        """Test the genotype, phased and variant arrays of a whole file."""
+        matrix = vcf_parser.parse_genotype_matrix()
+
+        assert len(matrix) == 3
+        assert matrix.samples == ['Sample1', 'Sample2', 'Sample3']
+        assert matrix.genotypes.dtype == numpy.int8
+        assert matrix.genotypes.tolist() == [
+            [[0, 1], [0, 0], [1, 1]],
+            [[0, 0], [0, 1], [0, 0]],
+            [[0, 1], [0, 2], [0, 0]],
+        ]
+        assert not matrix.phased.any()
+        assert matrix.chrom.tolist() == ['chr1', 'chr1', 'chr2']
+        assert matrix.pos.tolist() == [1000, 2000, 1500]
+        assert matrix.alt.tolist() == ['G', 'C', 'A,T']
+
+    def test_samples_and_query(self, vcf_parser):
+        """Test selecting samples and passing a region query on."""
+        matrix = vcf_parser.parse_genotype_matrix(chrom="chr1", pos_range=(1500, 2500), samples=['Sample3', 'Sample2'])
+
+        assert matrix.pos.tolist() == [2000]
+        assert matrix.genotypes.tolist() == [[[0, 0], [0, 1]]]
+        # the columns after the last selected sample are left unsplit
+        assert vcf_parser.parse_genotype_matrix(samples=['Sample1']).genotypes.tolist() == [[[0, 1]], [[0, 0]], [[0, 1]]]
+        with pytest.raises(ValueError, match="not in the VCF header"):
+            vcf_parser.parse_genotype_matrix(samples=['Unknown'])
+
+    def test_missing_phased_and_growth(self, tmp_path):
+        """Test missing and haploid calls, short columns, no GT tag and growing buffers."""
+        vcf_file = write_vcf(tmp_path / "calls.vcf", [
+            "chr1\t10\t.\tA\tG\t.\tPASS\t.\tGT:DP\t0|1:5\t./.:.\t1",
+            "chr1\t20\t.\tA\tG\t.\tPASS\t.\tDP:GT\t5\t7:1|1",
+            "chr1\t30\t.\tA\tG\t.\tPASS\t.\tDP\t5\t5\t5",
+        ])
+        with VcfParser(vcf_file) as vcf:
+            matrix = vcf.parse_genotype_matrix(chunk_size=1)
+
+        assert matrix.genotypes.tolist() == [
+            [[0, 1], [-1, -1], [1, -1]],
+            [[-1, -1], [1, 1], [-1, -1]],
+            [[-1, -1], [-1, -1], [-1, -1]],
+        ]
+        assert matrix.phased.tolist() == [[True, False, False], [False, True, False], [False, False, False]]
+        assert matrix.genotypes.shape == (3, 3, 2)
+
+    def test_ploidy(self, tmp_path):
+        """Test that calls with more alleles than the ploidy are rejected."""
+        vcf_file = write_vcf(tmp_path / "triploid.vcf", ["chr1\t10\t.\tA\tG\t.\tPASS\t.\tGT\t0/1/1\t0/0/0\t1/1/1"])
+        with VcfParser(vcf_file) as vcf:
+            with pytest.raises(ValueError, match="ploidy"):
+                vcf.parse_genotype_matrix()
+            assert vcf.parse_genotype_matrix(ploidy=3).genotypes.tolist() == [[[0, 1, 1], [0, 0, 0], [1, 1, 1]]]
@@ -0,0 +1,78 @@
+"""
+Unit tests for MultiVcfParser and VcfParser.merge.
+"""
+import pytest
+from vcfparser import MultiVcfParser, VcfParser
+
+
+HEADER = "##fileformat=VCFv4.2\n"
+COLUMNS = "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT"
+
+
+def write_vcf(path, samples, records, contigs=()):
+    """Write a small VCF with the given sample names and (chrom, pos, ref, alt, gts) records."""
+    lines = [HEADER.rstrip("\n")] + [f"##contig=<ID={contig}>" for contig in contigs]
+    lines.append("\t".join([COLUMNS] + list(samples)))
+    for chrom, pos, ref, alt, gts in records:
+        lines.append("\t".join([chrom, str(pos), ".", ref, alt, "30", "PASS", "DP=10", "GT"] + list(gts)))
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+class TestMultiVcfParser:
+    """Test merging sorted shards."""
+
+    def test_merge_in_genomic_order(self, tmp_path):
+        """Test that records of interleaved shards come out sorted, numbered chromosomes numerically."""
+        first = write_vcf(tmp_path / "a.vcf", ["S1"], [("chr2", 5, "A", "G", ["0/1"]), ("chr10", 1, "A", "G", ["0/1"])])
+        second = write_vcf(tmp_path / "b.vcf", ["S1"], [("chr2", 1, "C", "T", ["1/1"]), ("chr2", 5, "C", "T", ["0/0"])])
+
+        with MultiVcfParser([first, second]) as shards:
+            records = [(rec.CHROM, rec.POS, rec.REF) for rec in shards.parse_records()]
+            assert shards.sample_names == ["S1"]
+
+        assert records == [("chr2", "1", "C"), ("chr2", "5", "A"), ("chr2", "5", "C"), ("chr10", "1", "A")]
+
+    def test_contig_order_and_query(self, tmp_path):
+        """Test that ##contig lines define the chromosome order and queries are passed on."""
+        contigs = ["chrX", "chr1"]
+        first = write_vcf(tmp_path / "a.vcf", [], [("chrX", 10, "A", "G", []), ("chr1", 10, "A", "G", [])], contigs)
+        second = write_vcf(tmp_path / "b.vcf", [], [("chrX", 5, "A", "G", []), ("chr1", 20, "A", "G", [])], contigs)
+
+        assert [(rec.CHROM, rec.POS) for rec in VcfParser.merge([first, second])] == \
+            [("chrX", "5"), ("chrX", "10"), ("chr1", "10"), ("chr1", "20")]
+        assert [rec.POS for rec in VcfParser.merge([first, second], chrom="chr1", pos_range=(15, 30))] == ["20"]
+
+    def test_union_samples(self, tmp_path):
+        """Test that matching sites are joined and missing samples are filled in."""
+        first = write_vcf(tmp_path / "a.vcf", ["S1", "S2"], [("chr1", 10, "A", "G", ["0/1", "1/1"]),
+                                                              ("chr1", 20, "A", "G", ["0/0", "0/1"])])
+        second = write_vcf(tmp_path / "b.vcf", ["S3"], [("chr1", 10, "A", "G", ["1/1"]),
+                                                      ("chr1", 10, "A", "T", ["0/1"])])
+
+        with MultiVcfParser([first, second], union_samples=True) as cohorts:
+            records = list(cohorts.parse_records())
+
+        assert records[0].record_keys == cohorts.record_keys
+        assert cohorts.sample_names == ["S1", "S2", "S3"]
+        assert [(rec.POS, rec.ALT, rec.sample_vals) for rec in records] == [
+            ("10", ["G"], ["0/1", "1/1", "1/1"]),
+            ("10", ["T"], ["./.", "./.", "0/1"]),
+            ("20", ["G"], ["0/0", "0/1", "./."]),
+        ]
+
+    def test_incompatible_samples(self, tmp_path):
+        """Test that different sample columns need union_samples."""
+        first = write_vcf(tmp_path / "a.vcf", ["S1"], [])
+        second = write_vcf(tmp_path / "b.vcf", ["S2"], [])
+        with pytest.raises(ValueError, match="union_samples"):
+            MultiVcfParser([first, second])
+        with pytest.raises(ValueError):
+            MultiVcfParser([])
+
+    def test_unsorted_file(self, tmp_path):
+        """Test that an unsorted shard is reported instead of yielding records out of order."""
+        first = write_vcf(tmp_path / "a.vcf", ["S1"], [("chr1", 20, "A", "G", ["0/1"]), ("chr1", 10, "A", "G", ["0/1"])])
+        second = write_vcf(tmp_path / "b.vcf", ["S1"], [("chr1", 15, "A", "G", ["0/1"])])
+        with pytest.raises(ValueError, match="not sorted"):
+            list(VcfParser.merge([first, second]))
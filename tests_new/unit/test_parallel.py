@@ -0,0 +1,76 @@
+"""
+Unit tests for the multi-file scans of vcfparser.parallel.
+"""
+import operator
+from collections import Counter
+
+import pytest
+from vcfparser import reduce_files, scan_files
+
+
+def count_chrom(counts, record):
+    """Reducer counting records per chromosome."""
+    counts[record.CHROM] += 1
+    return counts
+
+
+def record_pos(record):
+    """Mapper returning the position as a number."""
+    return int(record.POS)
+
+
+def fail_on_chr2(count, record):
+    """Reducer that fails on the first chr2 record."""
+    if record.CHROM == 'chr2':
+        raise RuntimeError("chr2 is not allowed")
+    return count + 1
+
+
+@pytest.fixture
+def vcf_files(small_vcf_file, gzipped_vcf_file, bgzipped_vcf_file):
+    """The same records as plain, gzipped and bgzipped files."""
+    return [str(small_vcf_file), str(gzipped_vcf_file), str(bgzipped_vcf_file)]
+
+
+class TestScanFiles:
+    """Test the per-file partial results."""
+
+    @pytest.mark.parametrize("no_processors", [1, 2])
+    def test_partial_results(self, vcf_files, no_processors):
+        """Test that every file gets its own partial result, starting from a fresh initial value."""
+        initial = Counter()
+        results = dict(scan_files(vcf_files, count_chrom, initial, no_processors=no_processors))
+
+        assert sorted(results) == sorted(vcf_files)
+        assert all(counts == Counter({'chr1': 2, 'chr2': 1}) for counts in results.values())
+        assert initial == Counter()
+
+    def test_parse_arguments_and_mapper(self, vcf_files):
+        """Test that parse_records arguments and the mapper are applied in the workers."""
+        results = dict(scan_files(vcf_files, operator.add, 0, mapper=record_pos, no_processors=3, chrom='chr1'))
+        assert set(results.values()) == {3000}
+
+    def test_worker_error(self, vcf_files):
+        """Test that an error in a worker reaches the caller."""
+        with pytest.raises(RuntimeError, match="chr2"):
+            list(scan_files(vcf_files, fail_on_chr2, 0, no_processors=2))
+
+    def test_invalid_processors(self, vcf_files):
+        """Test that a non-positive number of processes is rejected."""
+        with pytest.raises(ValueError):
+            list(scan_files(vcf_files, operator.add, 0, no_processors=0))
+
+
+class TestReduceFiles:
+    """Test combining the partial results."""
+
+    @pytest.mark.parametrize("no_processors", [1, 2])
+    def test_combined_result(self, vcf_files, no_processors):
+        """Test that the partial results are combined into one."""
+        totals = reduce_files(vcf_files, count_chrom, Counter(), combine=operator.add, no_processors=no_processors)
+        assert totals == Counter({'chr1': 6, 'chr2': 3})
+
+    def test_reducer_as_combine(self, vcf_files):
+        """Test that the reducer combines the partial results when no combine is given."""
+        assert reduce_files(vcf_files, operator.add, 0, mapper=record_pos, filter="QUAL >= 30") == 3 * 2500
+        assert reduce_files([], operator.add, 0) == 0
@@ -2,7 +2,8 @@
 Unit tests for Record and GenotypeProperty classes.
 """
 import pytest
-from vcfparser.record_parser import Record, GenotypeProperty
+import pickle
+from vcfparser.record_parser import Record, RecordBatch, DecodedGenotype, decode_genotype, RecordHeader, FormatSchema, FormatSchemaCache, GenotypeProperty, Projection, ProjectedRecord, RawRecord
 
 
 class TestRecordInit:
@@ -46,6 +47,200 @@ class TestRecordInit:
         assert record.format_ == ['GT', 'DP']
 
 
+class TestRecordLazyAttributes:
+    """Test the lazily computed Record attributes."""
+    
+    def test_sample_mapping_deferred(self, test_utils):
+        """Test that sample columns are not mapped until first access."""
+        record_keys, record_values = test_utils.create_record_data()
+        record = Record(record_values, record_keys)
+        
+        assert record._mapped_format_to_sample is None
+        assert record._genotype_property is None
+        assert record.mapped_format_to_sample['Sample1']['GT'] == '0/1'
+        assert record.mapped_format_to_sample is record.mapped_format_to_sample
+        
+    def test_lazy_attributes_cached(self, test_utils):
+        """Test that lazy attributes are computed once and cached."""
+        record_keys, record_values = test_utils.create_complex_record_data()
+        record = Record(record_values, record_keys)
+        
+        assert record.rec_line == "\t".join(record_values)
+        assert record.ref_alt is record.ref_alt
+        assert record.genotype_property is record.genotype_property
+        
+    def test_lazy_attributes_assignable(self, test_utils):
+        """Test that lazy attributes can still be overridden."""
+        record_keys, record_values = test_utils.create_record_data()
+        record = Record(record_values, record_keys)
+        
+        record.mapped_format_to_sample = {'Sample1': {'GT': '1/1'}}
+        assert record.genotype_property.isHOMVAR() == {'Sample1': '1/1'}
+
+
+class TestRecordHeader:
+    """Test the slotted record layout and the shared per-file header."""
+    
+    def test_header_shared(self, test_utils):
+        """Test that records of one key list share a header instead of copying the sample names."""
+        record_keys, record_values = test_utils.create_record_data()
+        first = Record(record_values, record_keys)
+        second = Record(list(record_values), record_keys)
+        
+        assert first.header is second.header
+        assert first.sample_names is second.sample_names
+        assert first.header.sample_index == {name: i for i, name in enumerate(record_keys[9:])}
+        assert first.get_sample_value(record_keys[-1]) == record_values[-1]
+        assert not hasattr(first, '__dict__')
+        with pytest.raises(AttributeError):
+            first.not_a_field = 1
+            
+    def test_header_argument_and_pickle(self, test_utils):
+        """Test passing a RecordHeader and a pickle round trip of records sharing it."""
+        record_keys, record_values = test_utils.create_record_data()
+        header = RecordHeader(record_keys)
+        records = pickle.loads(pickle.dumps([Record(record_values, header), Record(record_values, header)]))
+        
+        assert records[0].header is records[1].header
+        assert records[0].record_keys == record_keys
+        assert records[0].ALT == ['G']
+        assert records[0].mapped_format_to_sample == Record(record_values, record_keys).mapped_format_to_sample
+
+
+class TestFormatSchema:
+    """Test the FORMAT schema cache."""
+    
+    def test_schema_positions(self):
+        """Test the split tags, tag positions and short sample columns."""
+        schema = FormatSchema("GT:AD:DP:PL")
+        
+        assert schema.tags == ('GT', 'AD', 'DP', 'PL')
+        assert (schema.gt_index, schema.ad_index, schema.dp_index, schema.pl_index) == (0, 1, 2, 3)
+        assert FormatSchema("GT").dp_index is None
+        assert schema.tag_value("0/1:3,4:7:0,10,90", "DP") == '7'
+        assert schema.tag_value("./.", "PL") == '.'
+        assert schema.map_values("./.") == {'GT': './.', 'AD': '.', 'DP': '.', 'PL': '.'}
+        
+    def test_cache_shared_by_records(self, test_utils):
+        """Test that records of one header share schemas and count hits and misses."""
+        record_keys, record_values = test_utils.create_record_data()
+        cache = FormatSchemaCache()
+        header = RecordHeader(record_keys, cache)
+        first = Record(record_values, header)
+        second = Record(list(record_values), header)
+        
+        assert first.format_ is second.format_
+        assert first.format_schema is second.format_schema
+        assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+        
+        second.format_ = ['GT']
+        assert second.format_ == ['GT']
+        assert first.format_ == ['GT', 'DP']
+        
+    def test_selected_formats(self, test_utils):
+        """Test that picking tags by position matches the full per-sample mapping."""
+        record_keys, record_values = test_utils.create_complex_record_data()
+        record = Record(record_values, record_keys)
+        expected = {sample: {'GQ': tags['GQ'], 'GT': tags['GT']}
+                    for sample, tags in Record(record_values, record_keys).mapped_format_to_sample.items()}
+        
+        assert record.get_format_to_sample_map(formats=['GQ', 'GT']) == expected
+        assert record._mapped_format_to_sample is None
+        assert record.get_format_to_sample_map(sample_names=['S3'], formats=['DP']) == {'S3': {'DP': '15'}}
+        with pytest.raises(KeyError):
+            record.get_format_to_sample_map(formats=['PL'])
+
+
+class TestProjectedRecord:
+    """Test records parsed for a subset of the columns."""
+    
+    def test_projection_maxsplit(self):
+        """Test that lines are split up to the last projected column."""
+        assert Projection(['CHROM']).maxsplit == 2
+        assert Projection(['CHROM', 'ALT']).maxsplit == 5
+        assert Projection(info_keys=['DP']).maxsplit == 9
+        assert 'INFO' in Projection(['POS'], info_keys=['DP']).columns
+        
+    def test_projected_samples(self, test_utils):
+        """Test that sample columns are resolved once and picked per record."""
+        record_keys, record_values = test_utils.create_record_data()
+        projection = Projection(samples=[record_keys[-1]], record_keys=record_keys)
+        record = ProjectedRecord(record_values, record_keys, projection)
+        
+        assert projection.sample_indices == [len(record_keys) - 1]
+        assert record.record_keys == record_keys[:9] + [record_keys[-1]]
+        assert record.sample_vals == [record_values[-1]]
+        assert 'FORMAT' in projection.columns
+        with pytest.raises(ValueError):
+            Projection(samples=['missing'], record_keys=record_keys)
+        with pytest.raises(ValueError, match="record keys"):
+            Projection(samples=[])
+        
+    def test_projected_record_pickle(self, test_utils):
+        """Test that projected records survive the trip from a worker process."""
+        record_keys, record_values = test_utils.create_record_data()
+        line = "\t".join(record_values)
+        projection = Projection(['CHROM', 'REF'])
+        record = pickle.loads(pickle.dumps(ProjectedRecord(line.split("\t", projection.maxsplit), record_keys, projection)))
+        
+        assert record.REF == record_values[3]
+        assert str(record) == line
+        assert not hasattr(record, 'ALT')
+
+
+class TestRecordBatch:
+    """Test blocks of records that share the header keys."""
+    
+    def test_batch_access(self, test_utils):
+        """Test iterating, indexing and slicing a batch."""
+        record_keys, record_values = test_utils.create_record_data()
+        other_values = ['chr2'] + record_values[1:]
+        batch = RecordBatch([record_values, other_values], record_keys)
+        
+        assert len(batch) == 2
+        assert [rec.CHROM for rec in batch] == [record_values[0], 'chr2']
+        assert isinstance(batch[1], Record) and batch[1].CHROM == 'chr2'
+        assert isinstance(batch[1:], RecordBatch) and len(batch[1:]) == 1
+        assert batch[0].record_keys is batch[1].record_keys
+        
+    def test_batch_column(self, test_utils):
+        """Test reading one column for all rows."""
+        record_keys, record_values = test_utils.create_record_data()
+        batch = RecordBatch([record_values, record_values[:9]], record_keys)
+        
+        assert batch.column('POS') == [record_values[1]] * 2
+        assert batch.column('Sample1') == [record_values[9], '.']
+        with pytest.raises(KeyError):
+            batch.column('NOT_A_COLUMN')
+            
+    def test_batch_pickle(self, test_utils):
+        """Test that batches survive the trip to a worker process."""
+        record_keys, record_values = test_utils.create_record_data()
+        batch = pickle.loads(pickle.dumps(RecordBatch([record_values], record_keys)))
+        
+        assert batch.to_records()[0].rec_line == "\t".join(record_values)
+
+
+class TestRawRecord:
+    """Test the raw line view."""
+    
+    def test_accessors(self, test_utils):
+        """Test that CHROM and POS are sliced out of the bytes line."""
+        record_keys, record_values = test_utils.create_record_data()
+        line = "\t".join(record_values).encode()
+        raw_record = RawRecord(line, record_keys)
+        
+        assert (raw_record.CHROM, raw_record.POS) == ('chr1', '1000')
+        assert raw_record.rec_line == line.decode()
+        assert raw_record.to_record().record_values == record_values
+        assert not hasattr(raw_record, '__dict__')
+        
+    def test_short_line_and_pickle(self):
+        """Test a line that ends after POS and a pickle round trip."""
+        raw_record = pickle.loads(pickle.dumps(RawRecord(b"chr1\t100", ['CHROM', 'POS'])))
+        assert (raw_record.CHROM, raw_record.POS) == ('chr1', '100')
+
+
 class TestRecordInfoMethods:
     """Test Record INFO parsing methods."""
     
@@ -187,6 +382,29 @@ class TestRecordStaticMethods:
         assert tag_values == [['0', '1'], ['0', '0']]
 
 
+class TestDecodeGenotype:
+    """Test the memoized genotype decoder."""
+    
+    @pytest.mark.parametrize("genotype,expected", [
+        ("0/0", ((('0', '0'), False, False, 'hom_ref', 2))),
+        ("1|1", ((('1', '1'), True, False, 'hom_var', 2))),
+        ("0|2", ((('0', '2'), True, False, 'het_var', 2))),
+        ("./.", (((None, None), False, True, 'missing', 2))),
+        ("1", ((('1',), False, False, 'hom_var', 1))),
+        ("./1", (((None, '1'), False, False, 'het_var', 2))),
+    ])
+    def test_decode(self, genotype, expected):
+        """Test alleles, phasing, missingness, type and ploidy."""
+        assert decode_genotype(genotype) == DecodedGenotype(*expected)
+        
+    def test_memoized(self):
+        """Test that repeated strings return the same immutable object."""
+        decoded = decode_genotype("0/1")
+        assert decode_genotype("0/1") is decoded
+        with pytest.raises(AttributeError):
+            decoded.gt_type = 'hom_ref'
+
+
 class TestGenotypeProperty:
     """Test GenotypeProperty class methods."""
     
@@ -259,6 +477,25 @@ class TestGenotypeProperty:
         no_var_samples = self.genotype_prop.hasnoVAR()
         assert 'S4' in no_var_samples
         assert no_var_samples['S4'] == './.'
+        
+    def test_genotype_groups(self):
+        """Test that all groups come from one classification of the samples."""
+        assert self.genotype_prop.genotype_groups() == {
+            'hom_ref': ['S1'], 'hom_var': ['S3'], 'het_var': ['S2'], 'missing': ['S4'],
+            'phased': [], 'unphased': ['S1', 'S2', 'S3', 'S4'],
+        }
+        partition = self.genotype_prop._partition('GT')
+        self.genotype_prop.isHOMREF()
+        self.genotype_prop.isHETVAR()
+        self.genotype_prop.has_phased()
+        assert self.genotype_prop._partition('GT') is partition
+        
+    def test_groups_follow_new_mapping(self):
+        """Test that replacing the sample mapping drops the cached groups."""
+        assert self.genotype_prop.has_phased() == {}
+        self.record.mapped_format_to_sample = {'S1': {'GT': '0|1'}}
+        assert self.genotype_prop.has_phased() == {'S1': '0|1'}
+        assert self.genotype_prop.isHETVAR(bases='iupac') == {'S1': 'A|G'}
 
 
 class TestRecordEdgeCases:
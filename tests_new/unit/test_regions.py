@@ -0,0 +1,64 @@
+"""
+Unit tests for RegionSet.
+"""
+import gzip
+import pickle
+
+import pytest
+
+from vcfparser.regions import RegionSet
+
+
+class TestRegionSet:
+    """Test merging and querying intervals."""
+    
+    def test_merge_and_sort(self):
+        """Test that overlapping and adjacent intervals are merged per chromosome."""
+        regions = RegionSet([('chr1', 500, 600), ('chr1', 100, 200), ('chr1', 150, 300), ('chr1', 301, 310), ('chr2', 5, 10)])
+        
+        assert regions.intervals('chr1') == [(100, 310), (500, 600)]
+        assert regions.intervals('chr2') == [(5, 10)]
+        assert regions.intervals('chr3') == []
+        assert len(regions) == 3
+        assert sorted(regions.chroms) == ['chr1', 'chr2']
+        
+    @pytest.mark.parametrize("chrom, pos, expected", [
+        ('chr1', 99, False), ('chr1', 100, True), ('chr1', 310, True), ('chr1', 311, False),
+        ('chr1', 600, True), ('chr2', 7, True), ('chrX', 7, False),
+    ])
+    def test_contains(self, chrom, pos, expected):
+        """Test the bisect lookup at interval edges."""
+        regions = RegionSet([('chr1', 100, 310), ('chr1', 500, 600), ('chr2', 5, 10)])
+        assert regions.contains(chrom, pos) is expected
+        assert regions.predicate([chrom, str(pos)]) is expected
+        
+    def test_invalid_interval(self):
+        """Test that an interval ending before its start is rejected."""
+        with pytest.raises(ValueError):
+            RegionSet([('chr1', 10, 5)])
+            
+    @pytest.mark.parametrize("suffix", [".bed", ".bed.gz"])
+    def test_from_bed(self, tmp_path, suffix):
+        """Test reading 0-based half-open BED intervals."""
+        content = "track name=targets\n# comment\nchr1\t99\t200\tgene1\n\nchr1\t199\t250\nchr2\t0\t1\n"
+        bed_path = tmp_path / f"targets{suffix}"
+        if suffix.endswith(".gz"):
+            bed_path.write_bytes(gzip.compress(content.encode()))
+        else:
+            bed_path.write_text(content)
+        
+        regions = RegionSet.from_bed(bed_path)
+        assert regions.intervals('chr1') == [(100, 250)]
+        assert regions.intervals('chr2') == [(1, 1)]
+        
+    def test_from_bed_invalid_line(self, tmp_path):
+        """Test that malformed BED lines are reported with their line number."""
+        bed_path = tmp_path / "bad.bed"
+        bed_path.write_text("chr1\t1\t10\nchr1\tstart\n")
+        with pytest.raises(ValueError, match="line 2"):
+            RegionSet.from_bed(bed_path)
+            
+    def test_pickle(self):
+        """Test that region sets can be shipped to worker processes."""
+        regions = pickle.loads(pickle.dumps(RegionSet([('chr1', 100, 200)])))
+        assert regions.predicate(['chr1', '150'])
@@ -0,0 +1,282 @@
+"""
+Unit tests for tabix/CSI index reading and indexed region queries.
+"""
+import gzip
+import struct
+import pytest
+from unittest.mock import patch
+from vcfparser import VcfParser
+from vcfparser.bgzf import BgzfReader
+from vcfparser.tabix import TabixIndex, find_index, reg2bin, reg2bins
+
+
+def write_naive_index(vcf_path, index_path, csi=False):
+    """Index every contig as a single chunk in the root bin, which is a valid (if coarse) index."""
+    contigs = {}
+    with BgzfReader(vcf_path) as reader:
+        while True:
+            start = reader.tell()
+            line = reader.readline()
+            if not line:
+                break
+            if line.startswith(b'#'):
+                continue
+            chrom = line.split(b'\t', 1)[0].decode()
+            first, _, count = contigs.get(chrom, (start, None, 0))
+            contigs[chrom] = (first, reader.tell(), count + 1)
+
+    names = b''.join(name.encode() + b'\x00' for name in contigs)
+    tabix_header = struct.pack('<7i', 2, 1, 2, 0, ord('#'), 0, len(names)) + names
+    body = b''
+    for first, last, count in contigs.values():
+        body += struct.pack('<i', 2)
+        bin_fmt = '<IQi' if csi else '<Ii'
+        bin_head = (0, 0, 1) if csi else (0, 1)
+        body += struct.pack(bin_fmt, *bin_head) + struct.pack('<QQ', first, last)
+        pseudo_head = (37450, 0, 2) if csi else (37450, 2)
+        body += struct.pack(bin_fmt, *pseudo_head) + struct.pack('<QQQQ', first, last, count, 0)
+        if not csi:
+            body += struct.pack('<i', 0)
+    if csi:
+        data = b'CSI\x01' + struct.pack('<3i', 14, 5, len(tabix_header)) + tabix_header
+        data += struct.pack('<i', len(contigs)) + body
+    else:
+        data = b'TBI\x01' + struct.pack('<i', len(contigs)) + tabix_header + body
+    with open(index_path, 'wb') as f:
+        f.write(gzip.compress(data))
+    return index_path
+
+
+class TestBinning:
+    """Test the UCSC binning scheme helpers."""
+    
+    def test_reg2bins_first_window(self):
+        """Test bins overlapping the first base."""
+        assert reg2bins(0, 1) == [0, 1, 9, 73, 585, 4681]
+        
+    def test_reg2bins_spanning_windows(self):
+        """Test a region spanning two 16 kbp leaf bins."""
+        bins = reg2bins(16000, 17000)
+        assert 4681 in bins and 4682 in bins
+
+
+class TestTabixIndex:
+    """Test reading index files."""
+    
+    def test_find_index(self, bgzipped_vcf_file):
+        """Test sidecar index discovery."""
+        assert find_index(bgzipped_vcf_file) is None
+        write_naive_index(bgzipped_vcf_file, f"{bgzipped_vcf_file}.tbi")
+        assert find_index(bgzipped_vcf_file) == f"{bgzipped_vcf_file}.tbi"
+        
+    @pytest.mark.parametrize("csi", [False, True])
+    def test_read_index(self, bgzipped_vcf_file, csi):
+        """Test reading contig names and record counts from .tbi and .csi files."""
+        index_path = write_naive_index(bgzipped_vcf_file, f"{bgzipped_vcf_file}.idx", csi=csi)
+        index = TabixIndex.from_file(index_path)
+        
+        assert index.names == ['chr1', 'chr2']
+        assert index.record_counts == {'chr1': 2, 'chr2': 1}
+        assert len(index.query_chunks('chr1', 0, 5000)) == 1
+        assert index.query_chunks('chrX') == []
+        
+    def test_invalid_index(self, tmp_path):
+        """Test that other files are rejected."""
+        bad_index = tmp_path / "bad.tbi"
+        bad_index.write_bytes(gzip.compress(b'not an index'))
+        with pytest.raises(ValueError):
+            TabixIndex.from_file(bad_index)
+
+
+class TestIndexedQueries:
+    """Test region queries answered from an index."""
+    
+    @pytest.mark.parametrize("suffix", [".tbi", ".csi"])
+    def test_region_query_matches_linear_scan(self, bgzipped_vcf_file, suffix):
+        """Test that indexed queries return the same records as a linear scan."""
+        expected = [str(rec) for rec in VcfParser(str(bgzipped_vcf_file)).parse_records(chrom='chr1', pos_range=(1500, 2500))]
+        write_naive_index(bgzipped_vcf_file, f"{bgzipped_vcf_file}{suffix}", csi=suffix == ".csi")
+        parser = VcfParser(str(bgzipped_vcf_file))
+        
+        assert parser.index_path == f"{bgzipped_vcf_file}{suffix}"
+        records = [str(rec) for rec in parser.parse_records(chrom='chr1', pos_range=(1500, 2500))]
+        assert records == expected
+        assert len(records) == 1
+        
+    def test_chrom_query_skips_other_blocks(self, multi_block_vcf, monkeypatch):
+        """Test that the blocks holding only other contigs are not decompressed."""
+        write_naive_index(multi_block_vcf, f"{multi_block_vcf}.tbi")
+        parser = VcfParser(str(multi_block_vcf))
+        chr2_first, chr2_last = parser._load_index().offset_ranges['chr2']
+        chr2_blocks = range((chr2_first >> 16) + 1, chr2_last >> 16)
+        
+        import vcfparser.bgzf as bgzf
+        loaded_blocks = []
+        original_read_block = bgzf._read_block
+        def spy_read_block(handle, block_start):
+            loaded_blocks.append(block_start)
+            return original_read_block(handle, block_start)
+        monkeypatch.setattr(bgzf, "_read_block", spy_read_block)
+        
+        records = list(parser.parse_records(chrom='chr3', pos_range=(1, 2000)))
+        
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr3', '1'), ('chr3', '998'), ('chr3', '1995')]
+        assert len(chr2_blocks) > 0
+        assert not any(block in chr2_blocks for block in loaded_blocks)
+        
+    def test_multi_region_query(self, multi_block_vcf):
+        """Test that overlapping regions are read with index seeks and each record is yielded once."""
+        regions = [('chr3', 5000, 9000), ('chr1', 1, 2000), ('chr3', 8000, 12000), ('chrX', 1, 10), ('chr1', 1995, 1995)]
+        expected = [(rec.CHROM, rec.POS) for rec in VcfParser(str(multi_block_vcf)).parse_records(regions=regions)]
+        parser = VcfParser(str(multi_block_vcf))
+        parser.build_index()
+        
+        records = [(rec.CHROM, rec.POS) for rec in parser.parse_records(regions=regions)]
+        assert records == expected
+        assert records[:3] == [('chr1', '1'), ('chr1', '998'), ('chr1', '1995')]
+        assert [pos for chrom, pos in records if chrom == 'chr3'] == [str(pos) for pos in range(5983, 12000, 997)]
+        
+    def test_raw_indexed_query(self, multi_block_vcf):
+        """Test that raw lines are read through the index like parsed records."""
+        parser = VcfParser(str(multi_block_vcf))
+        parser.build_index()
+        expected = [str(rec) for rec in parser.parse_records(chrom='chr3', pos_range=(5000, 9000))]
+        raw_records = list(parser.parse_records(chrom='chr3', pos_range=(5000, 9000), raw=True))
+        assert [str(rec) for rec in raw_records] == expected
+        assert len(list(parser.parse_records(regions=[('chr1', 1, 2000)], raw=True))) == 3
+        
+    def test_resume_indexed_query(self, multi_block_vcf):
+        """Test that a resumed index query skips the chunks before the token."""
+        parser = VcfParser(str(multi_block_vcf))
+        parser.build_index()
+        tokens = []
+        expected = [rec.POS for rec in parser.parse_records(chrom='chr3', checkpoint=tokens.append, checkpoint_every=4)]
+        
+        assert [rec.POS for rec in parser.parse_records(chrom='chr3', resume_from=tokens[0])] == expected[4:]
+        regions, tokens = [('chr1', 1, 2000), ('chr3', 1, 3000)], []
+        expected = [(rec.CHROM, rec.POS) for rec in parser.parse_records(regions=regions, checkpoint=tokens.append, checkpoint_every=3)]
+        # the first token points right after the last chr1 record
+        assert [(rec.CHROM, rec.POS) for rec in parser.parse_records(regions=regions, resume_from=tokens[0])] == expected[3:]
+        assert list(parser.parse_records(regions=regions, resume_from=tokens[-1])) == []
+        
+    def test_count_records_from_index(self, multi_block_vcf):
+        """Test that plain and per-chromosome counts come from the index and queries read only its chunks."""
+        parser = VcfParser(str(multi_block_vcf))
+        expected = parser.count_records(by="CHROM")
+        parser.build_index()
+        
+        with patch.object(parser, "_iter_raw_lines", side_effect=AssertionError("file read")):
+            assert parser.count_records(by="CHROM") == expected
+            assert parser.count_records() == sum(expected.values())
+            assert parser.count_records(chrom='chr3') == expected['chr3']
+        assert parser.count_records(chrom='chr3', pos_range=(5000, 9000)) == \
+            len(list(parser.parse_records(chrom='chr3', pos_range=(5000, 9000))))
+        
+    def test_sample_index_segments(self, multi_block_vcf):
+        """Test that sampling with an index reads only the drawn segments and returns distinct records."""
+        parser = VcfParser(str(multi_block_vcf))
+        parser.build_index()
+        all_records = [(rec.CHROM, rec.POS) for rec in parser.parse_records()]
+        
+        with patch.object(parser, "_iter_raw_lines", wraps=parser._iter_raw_lines) as iter_lines:
+            sample = [(rec.CHROM, rec.POS) for rec in parser.sample_records(4, seed=3)]
+        assert all(call.args[1] is not None for call in iter_lines.call_args_list)
+        assert len(set(sample)) == 4
+        assert sorted(sample, key=all_records.index) == sample
+        assert [rec.CHROM for rec in parser.sample_records(3, seed=3, chrom='chr3')] == ['chr3'] * 3
+        assert len(parser.sample_records(len(all_records) + 1)) == len(all_records)
+        
+    def test_unknown_chrom(self, bgzipped_vcf_file):
+        """Test that a contig missing from the index yields nothing."""
+        write_naive_index(bgzipped_vcf_file, f"{bgzipped_vcf_file}.tbi")
+        assert list(VcfParser(str(bgzipped_vcf_file)).parse_records(chrom='chr3')) == []
+
+
+@pytest.fixture
+def multi_block_vcf(tmp_path, test_utils):
+    """A sorted, bgzipped VCF with three contigs spread over many small blocks."""
+    lines = [
+        "##fileformat=VCFv4.2",
+        "##contig=<ID=chr1,length=300000>",
+        "##contig=<ID=chr2,length=300000>",
+        "##contig=<ID=chr3,length=300000>",
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1",
+    ]
+    for chrom in ("chr1", "chr2", "chr3"):
+        for pos in range(1, 300000, 997):
+            lines.append(f"{chrom}\t{pos}\t.\tAC\tA\t30\tPASS\tDP={pos % 50}\tGT\t0/1")
+    lines.append("chr3\t299990\t.\tN\t<DEL>\t30\tPASS\tEND=299999\tGT\t0/1")
+    return test_utils.write_bgzf(tmp_path / "multi.vcf.gz", "\n".join(lines) + "\n", block_size=4000)
+
+
+class TestBuildIndex:
+    """Test building indexes with VcfParser.build_index."""
+    
+    def test_reg2bin_in_reg2bins(self):
+        """Test that the bin of a region is one of the bins overlapping it."""
+        for beg, end in [(0, 1), (16000, 17000), (5, 1 << 20), (123456, 123460)]:
+            assert reg2bin(beg, end) in reg2bins(beg, end)
+            
+    def test_build_writes_tbi(self, multi_block_vcf):
+        """Test that a .tbi file is written and read back with record counts."""
+        parser = VcfParser(str(multi_block_vcf))
+        index = parser.build_index()
+        
+        assert parser.index_path == f"{multi_block_vcf}.tbi"
+        assert not index.is_csi
+        assert index.record_counts == {'chr1': 301, 'chr2': 301, 'chr3': 302}
+        reloaded = TabixIndex.from_file(parser.index_path)
+        assert reloaded.names == index.names
+        assert reloaded.record_counts == index.record_counts
+        assert reloaded.bins == index.bins
+        assert reloaded.linear_index == index.linear_index
+        
+    @pytest.mark.parametrize("csi", [False, True])
+    def test_region_queries_match_linear_scan(self, multi_block_vcf, csi):
+        """Test indexed queries against the linear scan for several regions."""
+        regions = [("chr1", None), ("chr2", (1, 5000)), ("chr2", (100000, 140000)),
+                   ("chr3", (299000, 300000)), ("chr1", (16380, 16390)), ("chrX", None)]
+        expected = {
+            region: [str(rec) for rec in VcfParser(str(multi_block_vcf)).parse_records(chrom=region[0], pos_range=region[1])]
+            for region in regions
+        }
+        VcfParser(str(multi_block_vcf)).build_index(csi=csi)
+        
+        for region in regions:
+            parser = VcfParser(str(multi_block_vcf))
+            assert parser.index_path.endswith(".csi" if csi else ".tbi")
+            assert [str(rec) for rec in parser.parse_records(chrom=region[0], pos_range=region[1])] == expected[region]
+            
+    def test_csi_for_long_contigs(self, tmp_path, test_utils):
+        """Test that contigs over 512 Mbp switch to a CSI index."""
+        content = ("##fileformat=VCFv4.2\n##contig=<ID=big,length=900000000>\n"
+                   "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+                   "big\t10\t.\tA\tG\t30\tPASS\t.\nbig\t800000000\t.\tA\tG\t30\tPASS\t.\n")
+        vcf_path = test_utils.write_bgzf(tmp_path / "big.vcf.gz", content)
+        parser = VcfParser(str(vcf_path))
+        index = parser.build_index()
+        
+        assert index.is_csi
+        assert parser.index_path == f"{vcf_path}.csi"
+        records = list(VcfParser(str(vcf_path)).parse_records(chrom='big', pos_range=(799999999, 800000001)))
+        assert [rec.POS for rec in records] == ['800000000']
+        
+    def test_unsorted_file(self, tmp_path, test_utils):
+        """Test that unsorted input is rejected."""
+        content = ("##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+                   "chr1\t10\t.\tA\tG\t30\tPASS\t.\nchr2\t10\t.\tA\tG\t30\tPASS\t.\nchr1\t20\t.\tA\tG\t30\tPASS\t.\n")
+        vcf_path = test_utils.write_bgzf(tmp_path / "unsorted.vcf.gz", content)
+        with pytest.raises(ValueError, match="not sorted"):
+            VcfParser(str(vcf_path)).build_index()
+            
+    def test_plain_gzip_rejected(self, gzipped_vcf_file):
+        """Test that gzip (not bgzip) input cannot be indexed."""
+        with pytest.raises(ValueError, match="bgzip"):
+            VcfParser(str(gzipped_vcf_file)).build_index()
+            
+    def test_metadata_record_counts(self, multi_block_vcf):
+        """Test that parse_metadata exposes the record counts of the index."""
+        assert VcfParser(str(multi_block_vcf)).parse_metadata().record_counts == {}
+        VcfParser(str(multi_block_vcf)).build_index()
+        metadata = VcfParser(str(multi_block_vcf)).parse_metadata()
+        assert metadata.record_counts == {'chr1': 301, 'chr2': 301, 'chr3': 302}
@@ -1,11 +1,17 @@
 """
 Unit tests for VcfParser class.
 """
+import asyncio
+import random
+from collections import Counter
 import pytest
 import gzip
 from unittest.mock import patch, mock_open
 from vcfparser import VcfParser
-from vcfparser.vcf_parser import VcfParser as VcfParserClass
+from vcfparser.vcf_parser import VcfParser as VcfParserClass, _reservoir_sample
+from vcfparser.bgzf import BgzfReader
+from vcfparser.record_parser import FieldNotProjectedError, RawRecord
+from vcfparser.filters import RecordFilter
 
 
 class TestVcfParserInit:
@@ -23,19 +29,73 @@ class TestVcfParserInit:
         assert parser.filename == str(gzipped_vcf_file)
         assert parser._open == gzip.open
         
+    def test_init_bgzipped_vcf_file(self, bgzipped_vcf_file):
+        """Test that bgzipped files are read with the BGZF reader."""
+        parser = VcfParser(str(bgzipped_vcf_file), threads=2, readahead=4)
+        assert parser._open != gzip.open
+        assert isinstance(parser._handle, BgzfReader)
+        assert parser._handle.threads == 2
+        assert len(list(parser.parse_records())) == 3
+        
     def test_init_file_not_found(self):
         """Test initialization with non-existent file."""
         with pytest.raises(FileNotFoundError):
             VcfParser("non_existent_file.vcf")
             
-    def test_destructor_closes_files(self, small_vcf_file):
-        """Test that destructor properly closes file handles."""
+    def test_context_manager_closes_file(self, small_vcf_file):
+        """Test that the context manager closes the single file handle."""
+        with VcfParser(str(small_vcf_file)) as parser:
+            assert not parser._handle.closed
+            assert len(list(parser.parse_records())) == 3
+        assert parser._handle.closed
+
+    def test_close(self, gzipped_vcf_file):
+        """Test closing the parser explicitly."""
+        parser = VcfParser(str(gzipped_vcf_file))
+        parser.close()
+        assert parser._handle.closed
+
+
+class TestVcfParserSinglePass:
+    """Test that one handle serves the header and any number of record passes."""
+
+    @pytest.mark.parametrize("fixture", ["small_vcf_file", "gzipped_vcf_file", "bgzipped_vcf_file"])
+    def test_repeated_parse_records(self, request, fixture):
+        """Test iterating the records twice and parsing metadata in between."""
+        with VcfParser(str(request.getfixturevalue(fixture))) as parser:
+            first = [str(rec) for rec in parser.parse_records()]
+            metadata = parser.parse_metadata()
+            second = [str(rec) for rec in parser.parse_records()]
+        assert len(first) == 3
+        assert first == second
+        assert metadata.sample_names == ['Sample1', 'Sample2', 'Sample3']
+
+    def test_header_read_once(self, small_vcf_file):
+        """Test that the header is cached after the first read."""
         parser = VcfParser(str(small_vcf_file))
-        # Files should be opened
-        assert not parser._file.closed
-        assert not parser._file_copy.closed
-        # Delete parser
-        del parser
+        parser.parse_metadata()
+        with patch.object(parser._handle, 'readline', wraps=parser._handle.readline) as readline:
+            parser.parse_metadata()
+            records = list(parser.parse_records())
+        # only the three record lines and the end of file are read
+        assert readline.call_count == 4
+        assert len(records) == 3
+
+    def test_interleaved_iterators(self, bgzipped_vcf_file):
+        """Test that two live iterators on the same parser do not disturb each other."""
+        parser = VcfParser(str(bgzipped_vcf_file))
+        first, second = parser.parse_records(), parser.parse_records()
+        positions = [next(first).POS, next(second).POS, next(first).POS, next(second).POS]
+        assert positions == ["1000", "1000", "2000", "2000"]
+        assert [rec.POS for rec in first] == ["1500"]
+
+    def test_windows_line_endings(self, tmp_path, small_vcf_content):
+        """Test that CRLF line endings are handled as in text mode."""
+        vcf_file = tmp_path / "crlf.vcf"
+        vcf_file.write_bytes(small_vcf_content.replace("\n", "\r\n").encode())
+        parser = VcfParser(str(vcf_file))
+        assert parser.parse_metadata().sample_names == ['Sample1', 'Sample2', 'Sample3']
+        assert list(parser.parse_records())[-1].sample_vals[-1] == "0/0:35:45"
 
 
 class TestVcfParserParseMetadata:
@@ -97,6 +157,13 @@ class TestVcfParserParseRecords:
         assert records[0].REF == "A"
         assert records[0].ALT == ["G"]
         
+    def test_parse_records_format_schemas(self, vcf_parser):
+        """Test that the records share the parser's FORMAT cache."""
+        records = list(vcf_parser.parse_records())
+        
+        assert all(record.format_ is records[0].format_ for record in records)
+        assert (vcf_parser.format_schemas.hits, vcf_parser.format_schemas.misses) == (2, 1)
+        
     def test_parse_records_multiple_alt_alleles(self, vcf_parser):
         """Test parsing records with multiple ALT alleles."""
         records = list(vcf_parser.parse_records())
@@ -158,6 +225,514 @@ class TestVcfParserParseRecords:
         assert all(1000 <= int(record.POS) <= 2000 for record in records)
 
 
+class TestVcfParserMultiprocessing:
+    """Test parsing records with a process pool."""
+    
+    def test_parallel_matches_serial(self, small_vcf_file):
+        """Test that parallel parsing yields the same records in the same order."""
+        serial = [str(rec) for rec in VcfParser(str(small_vcf_file)).parse_records()]
+        parallel = [str(rec) for rec in VcfParser(str(small_vcf_file)).parse_records(no_processors=2)]
+        
+        assert parallel == serial
+        
+    def test_parallel_small_chunks(self, small_vcf_file, monkeypatch):
+        """Test that lines straddling chunk boundaries are parsed exactly once."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 7)
+        records = list(VcfParser(str(small_vcf_file)).parse_records(no_processors=2))
+        
+        assert [(rec.CHROM, rec.POS) for rec in records] == [
+            ('chr1', '1000'), ('chr1', '2000'), ('chr2', '1500')
+        ]
+        
+    def test_parallel_filters_in_workers(self, small_vcf_file, monkeypatch):
+        """Test chrom and pos_range filters with parallel parsing."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 50)
+        parser = VcfParser(str(small_vcf_file))
+        records = list(parser.parse_records(chrom='chr1', pos_range=(1500, 2500), no_processors=2))
+        
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '2000')]
+        
+    def test_parallel_gzipped_file(self, gzipped_vcf_file, monkeypatch):
+        """Test parallel parsing of gzipped input in line batches."""
+        monkeypatch.setattr("vcfparser.vcf_parser._BATCH_LINES", 2)
+        records = list(VcfParser(str(gzipped_vcf_file)).parse_records(no_processors=2))
+        
+        assert [rec.POS for rec in records] == ['1000', '2000', '1500']
+        assert records[0].mapped_format_to_sample['Sample1']['GT'] == '0/1'
+        
+    def test_parallel_bgzipped_file(self, bgzipped_vcf_file, monkeypatch):
+        """Test parallel parsing of bgzipped input split at block boundaries."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 1)
+        records = list(VcfParser(str(bgzipped_vcf_file)).parse_records(no_processors=2))
+        
+        assert [rec.POS for rec in records] == ['1000', '2000', '1500']
+        assert records[2].ALT == ['A', 'T']
+        
+    def test_invalid_no_processors(self, vcf_parser):
+        """Test that a non-positive number of processors is rejected."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(no_processors=0))
+
+
+class TestVcfParserMmap:
+    """Test the memory-mapped reading mode."""
+    
+    def test_mmap_matches_regular_reading(self, small_vcf_file):
+        """Test that mapped parsing yields the same records as regular parsing."""
+        expected = [str(rec) for rec in VcfParser(str(small_vcf_file)).parse_records()]
+        with VcfParser(str(small_vcf_file), mmap=True) as parser:
+            assert parser._map is not None
+            assert [str(rec) for rec in parser.parse_records()] == expected
+            assert [str(rec) for rec in parser.parse_records()] == expected
+        assert parser._map.closed
+        
+    def test_mmap_filters(self, small_vcf_file):
+        """Test chrom and pos_range filters on raw mapped lines."""
+        parser = VcfParser(str(small_vcf_file), mmap=True)
+        records = list(parser.parse_records(chrom='chr1', pos_range=(1500, 2500)))
+        
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '2000')]
+        assert list(parser.parse_records(chrom='chr')) == []
+        
+    @pytest.mark.parametrize("chunk_size", [1, 7, 200])
+    def test_mmap_parallel(self, small_vcf_file, monkeypatch, chunk_size):
+        """Test that workers split the mapped file on line boundaries."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", chunk_size)
+        parser = VcfParser(str(small_vcf_file), mmap=True)
+        records = list(parser.parse_records(no_processors=2))
+        
+        assert [rec.POS for rec in records] == ['1000', '2000', '1500']
+        assert all(parser._map[start - 1:start] == b"\n" for start, _ in parser._mapped_ranges(parser._map, parser._data_offset))
+        
+    def test_mmap_empty_file(self, empty_vcf_file):
+        """Test that a file without records can still be opened with mmap."""
+        assert list(VcfParser(str(empty_vcf_file), mmap=True).parse_records()) == []
+        
+    def test_mmap_rejects_compressed_file(self, gzipped_vcf_file):
+        """Test that mmap is refused for compressed input."""
+        with pytest.raises(ValueError):
+            VcfParser(str(gzipped_vcf_file), mmap=True)
+
+
+class TestVcfParserProjection:
+    """Test column projection at parse time."""
+    
+    def test_projected_columns(self, vcf_parser):
+        """Test that only the projected fields are set and the line is split up to them."""
+        records = list(vcf_parser.parse_records(columns=['CHROM', 'POS', 'REF', 'ALT']))
+        
+        assert [(rec.CHROM, rec.POS, rec.REF, rec.ALT) for rec in records][2] == ('chr2', '1500', 'G', ['A', 'T'])
+        assert len(records[0].record_values) == 6
+        assert records[0].rec_line.endswith("1/1:30:50")
+        
+    @pytest.mark.parametrize("field", ['QUAL', 'info_str', 'sample_vals', 'mapped_format_to_sample'])
+    def test_non_projected_field_raises(self, vcf_parser, field):
+        """Test that accessing a field outside the projection raises a clear error."""
+        record = next(vcf_parser.parse_records(columns=['CHROM', 'POS']))
+        with pytest.raises(FieldNotProjectedError, match="not parsed"):
+            getattr(record, field)
+            
+    def test_info_keys(self, vcf_parser):
+        """Test that only the projected INFO keys are extracted."""
+        record = next(vcf_parser.parse_records(columns=['CHROM', 'POS'], info_keys=['DP', 'AN']))
+        
+        assert record.get_info_as_dict() == {'AN': '6', 'DP': '100'}
+        assert record.get_info_as_dict(['DP']) == {'DP': '100'}
+        with pytest.raises(FieldNotProjectedError):
+            record.get_info_as_dict(['AC'])
+            
+    def test_projection_with_filters_and_workers(self, small_vcf_file, monkeypatch):
+        """Test that filters still work when CHROM and POS are not projected."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 50)
+        parser = VcfParser(str(small_vcf_file))
+        records = list(parser.parse_records(chrom='chr1', pos_range=(1500, 2500), columns=['REF'], no_processors=2))
+        
+        assert [rec.REF for rec in records] == ['T']
+        
+    def test_unknown_column(self, vcf_parser):
+        """Test that only fixed VCF columns can be projected."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(columns=['Sample1']))
+
+
+class TestVcfParserSamples:
+    """Test sample subsetting pushed down into parse_records."""
+    
+    def test_sample_subset(self, vcf_parser):
+        """Test that only the selected samples are kept and mapped, in the requested order."""
+        records = list(vcf_parser.parse_records(samples=['Sample3', 'Sample1']))
+        
+        assert records[0].sample_names == ['Sample3', 'Sample1']
+        assert records[0].sample_vals == ['1/1:30:50', '0/1:20:30']
+        assert list(records[0].mapped_format_to_sample) == ['Sample3', 'Sample1']
+        assert records[0].genotype_property.isHOMVAR() == {'Sample3': '1/1'}
+        assert records[0].rec_line.split("\t")[9:] == ['1/1:30:50', '0/1:20:30']
+        assert records[2].ALT == ['A', 'T']
+        
+    def test_sample_subset_with_columns(self, small_vcf_file, monkeypatch):
+        """Test combining samples with a column projection in worker processes."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 50)
+        parser = VcfParser(str(small_vcf_file))
+        records = list(parser.parse_records(columns=['POS'], samples=['Sample2'], no_processors=2))
+        
+        assert [rec.get_format_to_sample_map()['Sample2']['GT'] for rec in records] == ['0/0', '0/1', '0/2']
+        with pytest.raises(FieldNotProjectedError):
+            records[0].REF
+            
+    def test_unknown_sample(self, vcf_parser):
+        """Test that unknown sample names are rejected."""
+        with pytest.raises(ValueError, match="Sample9"):
+            list(vcf_parser.parse_records(samples=['Sample1', 'Sample9']))
+
+
+class TestVcfParserFilter:
+    """Test filter expressions pushed down into parse_records."""
+    
+    def test_filter_expression(self, vcf_parser):
+        """Test that only the records passing the filter are built."""
+        records = list(vcf_parser.parse_records(filter='QUAL >= 30 && INFO/DP > 90'))
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '1000'), ('chr2', '1500')]
+        
+    def test_filter_uses_header_types(self, vcf_parser):
+        """Test that AF is compared as a Float because the header declares it so."""
+        records = list(vcf_parser.parse_records(filter='INFO/AF < 0.2 && TYPE == "snp"'))
+        assert [rec.POS for rec in records] == ['2000', '1500']
+        
+    @pytest.mark.parametrize("fixture", ["small_vcf_file", "gzipped_vcf_file", "bgzipped_vcf_file"])
+    def test_filter_with_workers_and_projection(self, request, fixture, monkeypatch):
+        """Test that the filter runs in the worker processes together with a projection."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 1)
+        monkeypatch.setattr("vcfparser.vcf_parser._BATCH_LINES", 1)
+        parser = VcfParser(str(request.getfixturevalue(fixture)))
+        records = list(parser.parse_records(
+            filter=RecordFilter('FILTER == PASS && ALT == T'), columns=['POS'], no_processors=2
+        ))
+        assert [rec.POS for rec in records] == ['1500']
+        
+    def test_filter_mmap(self, small_vcf_file):
+        """Test the filter on memory-mapped lines."""
+        parser = VcfParser(str(small_vcf_file), mmap=True)
+        assert [rec.POS for rec in parser.parse_records(filter='CHROM == chr1 && QUAL < 30')] == ['2000']
+        
+    def test_invalid_filter(self, vcf_parser):
+        """Test that an invalid expression is reported."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(filter='QUAL >>'))
+
+
+class TestVcfParserRegions:
+    """Test multi-region queries without an index."""
+    
+    def test_regions_list(self, vcf_parser):
+        """Test that records hit by several intervals are yielded once, in file order."""
+        regions = [('chr2', 1, 5000), ('chr1', 900, 1100), ('chr1', 1000, 1000)]
+        records = list(vcf_parser.parse_records(regions=regions))
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '1000'), ('chr2', '1500')]
+        
+    def test_regions_bed_with_filter_and_workers(self, small_vcf_file, tmp_path, monkeypatch):
+        """Test a BED file combined with a filter expression in worker processes."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 1)
+        bed_path = tmp_path / "targets.bed"
+        bed_path.write_text("chr1\t0\t5000\nchr2\t1499\t1500\n")
+        parser = VcfParser(str(small_vcf_file))
+        records = list(parser.parse_records(regions=str(bed_path), filter="QUAL >= 30", no_processors=2))
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '1000'), ('chr2', '1500')]
+
+
+class TestVcfParserSortedQueries:
+    """Test early termination of chrom/pos_range queries on sorted files."""
+    
+    @pytest.fixture
+    def sorted_vcf_file(self, tmp_path):
+        """A sorted VCF with ##contig lines, followed by a stray chr1 line that a sorted scan never reaches."""
+        lines = ["##fileformat=VCFv4.2", "##contig=<ID=chr1>", "##contig=<ID=chr2>", "##contig=<ID=chr3>",
+                 "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO"]
+        lines += [f"{chrom}\t{pos}\t.\tA\tG\t30\tPASS\tDP=1" for chrom in ("chr1", "chr3") for pos in (100, 200, 300)]
+        lines.append("chr1\t250\t.\tA\tG\t30\tPASS\tDP=1")
+        vcf_file = tmp_path / "sorted.vcf"
+        vcf_file.write_text("\n".join(lines) + "\n")
+        return vcf_file
+        
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_stops_after_chrom(self, sorted_vcf_file, mmap):
+        """Test that the scan stops when the queried chromosome ends."""
+        parser = VcfParser(str(sorted_vcf_file), mmap=mmap)
+        assert [rec.POS for rec in parser.parse_records(chrom='chr1')] == ['100', '200', '300', '250']
+        assert [rec.POS for rec in parser.parse_records(chrom='chr1', assume_sorted=True)] == ['100', '200', '300']
+        
+    def test_stops_after_pos_range(self, sorted_vcf_file):
+        """Test that the scan stops once POS passes the end of the range."""
+        parser = VcfParser(str(sorted_vcf_file))
+        records = list(parser.parse_records(chrom='chr3', pos_range=(150, 250), assume_sorted=True))
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr3', '200')]
+        
+    def test_pos_range_skips_rest_of_chrom(self, sorted_vcf_file):
+        """Test that a pos_range query without chrom skips ahead to the next chromosome."""
+        parser = VcfParser(str(sorted_vcf_file))
+        records = list(parser.parse_records(pos_range=(1, 200), assume_sorted=True))
+        assert [(rec.CHROM, rec.POS) for rec in records] == [('chr1', '100'), ('chr1', '200'), ('chr3', '100'), ('chr3', '200')]
+        
+    def test_contig_order_detected(self, sorted_vcf_file):
+        """Test that assume_sorted=None uses the ##contig order to stop before a missing chromosome."""
+        parser = VcfParser(str(sorted_vcf_file))
+        parser.parse_metadata()
+        with patch.object(parser._handle, 'readline', wraps=parser._handle.readline) as readline:
+            assert list(parser.parse_records(chrom='chr2', assume_sorted=None)) == []
+        # the three chr1 lines and the first chr3 line
+        assert readline.call_count == 4
+        
+    def test_unsorted_default(self, small_vcf_file):
+        """Test that files without ##contig lines are scanned fully by default."""
+        parser = VcfParser(str(small_vcf_file))
+        assert [rec.POS for rec in parser.parse_records(chrom='chr2', assume_sorted=None)] == ['1500']
+
+
+class TestVcfParserBatches:
+    """Test the batch API."""
+    
+    @pytest.mark.parametrize("fixture", ["small_vcf_file", "gzipped_vcf_file", "bgzipped_vcf_file"])
+    def test_batches_match_records(self, request, fixture):
+        """Test that the blocks hold the same records in the same order."""
+        parser = VcfParser(str(request.getfixturevalue(fixture)))
+        expected = [str(rec) for rec in parser.parse_records()]
+        batches = list(parser.parse_batches(batch_size=2))
+        
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert [str(rec) for batch in batches for rec in batch] == expected
+        assert all(batch.record_keys is batches[0].record_keys for batch in batches)
+        
+    def test_batches_with_filters(self, small_vcf_file):
+        """Test that filtered blocks are still filled up to batch_size."""
+        parser = VcfParser(str(small_vcf_file))
+        batches = list(parser.parse_batches(batch_size=1, chrom='chr1', pos_range=(1500, 2500)))
+        assert [batch.column('POS') for batch in batches] == [['2000']]
+        
+        batches = list(parser.parse_batches(batch_size=2, pos_range=(1000, 1500)))
+        assert [batch.column('POS') for batch in batches] == [['1000', '1500']]
+        
+    def test_batches_mmap(self, small_vcf_file):
+        """Test the batch API on a memory-mapped file."""
+        parser = VcfParser(str(small_vcf_file), mmap=True)
+        batches = list(parser.parse_batches(batch_size=10))
+        assert len(batches) == 1
+        assert batches[0].column('CHROM') == ['chr1', 'chr1', 'chr2']
+        
+    def test_invalid_batch_size(self, vcf_parser):
+        """Test that a non-positive batch size is rejected."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_batches(batch_size=0))
+
+
+class TestVcfParserRawRecords:
+    """Test the raw-bytes fast path."""
+    
+    @pytest.mark.parametrize("fixture,mmap", [("small_vcf_file", False), ("small_vcf_file", True),
+                                              ("gzipped_vcf_file", False), ("bgzipped_vcf_file", False)])
+    def test_raw_matches_records(self, request, fixture, mmap):
+        """Test that raw lines hold the same records as the parsed ones."""
+        parser = VcfParser(str(request.getfixturevalue(fixture)), mmap=mmap)
+        expected = [str(rec) for rec in parser.parse_records()]
+        raw_records = list(parser.parse_records(raw=True))
+        
+        assert all(isinstance(rec.line, bytes) for rec in raw_records)
+        assert [str(rec) for rec in raw_records] == expected
+        assert [rec.to_record().rec_line for rec in raw_records] == expected
+        
+    def test_raw_with_filters(self, vcf_parser):
+        """Test chrom, pos_range, filter expressions and regions on raw lines."""
+        assert [rec.POS for rec in vcf_parser.parse_records(chrom='chr1', raw=True)] == ['1000', '2000']
+        assert [rec.POS for rec in vcf_parser.parse_records(pos_range=(1500, 2000), raw=True)] == ['2000', '1500']
+        assert [rec.CHROM for rec in vcf_parser.parse_records(filter="QUAL >= 30", raw=True)] == \
+            [rec.CHROM for rec in vcf_parser.parse_records(filter="QUAL >= 30")]
+        assert [(rec.CHROM, rec.POS) for rec in vcf_parser.parse_records(regions=[('chr2', 1, 5000)], raw=True)] == \
+            [('chr2', '1500')]
+        
+    def test_raw_rejects_projection(self, vcf_parser):
+        """Test that raw lines cannot be projected."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(raw=True, columns=['CHROM']))
+
+
+class TestVcfParserCheckpoints:
+    """Test checkpoint tokens and resumed scans."""
+    
+    @pytest.mark.parametrize("fixture,mmap", [("small_vcf_file", False), ("small_vcf_file", True),
+                                              ("gzipped_vcf_file", False), ("bgzipped_vcf_file", False)])
+    def test_resume_from_every_checkpoint(self, request, fixture, mmap):
+        """Test that resuming from a token continues right after the records handed out before it."""
+        parser = VcfParser(str(request.getfixturevalue(fixture)), mmap=mmap)
+        tokens = []
+        expected = [str(rec) for rec in parser.parse_records(checkpoint=tokens.append, checkpoint_every=1)]
+        
+        # one token per record, plus the final one at the end of the file
+        assert len(tokens) == len(expected) + 1
+        for done, token in enumerate(tokens, 1):
+            assert [str(rec) for rec in parser.parse_records(resume_from=token)] == expected[done:]
+            
+    def test_checkpoint_with_interleaved_iterator(self, vcf_parser):
+        """Test that the token follows its own scan while another one reads the same handle."""
+        tokens = []
+        records = vcf_parser.parse_records(checkpoint=tokens.append, checkpoint_every=1)
+        first = next(records)
+        assert len(list(vcf_parser.parse_records())) == 3
+        second = next(records)
+        
+        assert [rec.POS for rec in vcf_parser.parse_records(resume_from=tokens[0])] == [second.POS, '1500']
+        assert first.POS == '1000'
+        
+    def test_resume_with_filters_and_workers(self, small_vcf_file, monkeypatch):
+        """Test a resumed scan with a chrom filter and with worker processes."""
+        monkeypatch.setattr("vcfparser.vcf_parser._CHUNK_SIZE", 1)
+        parser = VcfParser(str(small_vcf_file))
+        tokens = []
+        assert [rec.POS for rec in parser.parse_records(chrom='chr1', checkpoint=tokens.append)] == ['1000', '2000']
+        
+        records = list(parser.parse_records(checkpoint=tokens.append, checkpoint_every=1))
+        assert [rec.POS for rec in parser.parse_records(resume_from=tokens[1], no_processors=2)] == \
+            [rec.POS for rec in records[1:]]
+        assert list(parser.parse_records(resume_from=tokens[0], chrom='chr1')) == []
+        
+    def test_invalid_checkpoint_arguments(self, vcf_parser):
+        """Test that tokens inside the header and non-positive intervals are rejected."""
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(resume_from=0))
+        with pytest.raises(ValueError):
+            list(vcf_parser.parse_records(checkpoint=print, checkpoint_every=0))
+
+
+class TestVcfParserCounts:
+    """Test counting records without parsing them."""
+    
+    @pytest.mark.parametrize("fixture,mmap", [("small_vcf_file", False), ("small_vcf_file", True),
+                                              ("gzipped_vcf_file", False), ("bgzipped_vcf_file", False)])
+    def test_counts_without_records(self, request, fixture, mmap):
+        """Test plain and grouped counts, and that no Record is ever created."""
+        parser = VcfParser(str(request.getfixturevalue(fixture)), mmap=mmap)
+        with patch("vcfparser.vcf_parser.Record", side_effect=AssertionError("Record created")):
+            assert parser.count_records() == 3
+            assert parser.count_records(by="FILTER") == {'PASS': 3}
+            assert parser.count_records(by=("CHROM", "FILTER")) == {('chr1', 'PASS'): 2, ('chr2', 'PASS'): 1}
+            assert parser.count_records(by=["CHROM"]) == {('chr1',): 2, ('chr2',): 1}
+            
+    def test_counts_with_filters(self, vcf_parser):
+        """Test counting a chromosome, a position range and a filter expression."""
+        assert vcf_parser.count_records(chrom='chr1') == 2
+        assert vcf_parser.count_records(pos_range=(1500, 2000)) == 2
+        assert vcf_parser.count_records(by="CHROM", filter="QUAL >= 30") == {'chr1': 1, 'chr2': 1}
+        assert vcf_parser.count_records(chrom='chr3') == 0
+        
+    def test_last_line_without_newline(self, tmp_path, small_vcf_content):
+        """Test that a last record without a line ending is counted."""
+        vcf_file = tmp_path / "no_newline.vcf"
+        vcf_file.write_text(small_vcf_content.rstrip("\n"))
+        assert VcfParser(str(vcf_file)).count_records() == 3
+        assert VcfParser(str(vcf_file)).count_records(by="POS")['1500'] == 1
+        
+    @pytest.mark.parametrize("block_size", [1, 2, 3, 1024])
+    def test_blank_lines(self, tmp_path, small_vcf_content, block_size):
+        """Test that blank lines are not counted, also when they span two blocks."""
+        header, records = small_vcf_content.split("chr1\t1000", 1)
+        records = "chr1\t1000" + records
+        vcf_file = tmp_path / "blank_lines.vcf"
+        vcf_file.write_bytes((header + "\n" + records.replace("chr1\t2000", "\r\n\n\nchr1\t2000") + "\n").encode())
+        parser = VcfParser(str(vcf_file))
+        with patch("vcfparser.vcf_parser._COUNT_BLOCK_SIZE", block_size):
+            assert parser.count_records() == 3
+        assert sum(parser.count_records(by="CHROM").values()) == 3
+        
+    def test_unknown_column(self, vcf_parser):
+        """Test that only columns of the #CHROM line can be counted by."""
+        with pytest.raises(ValueError):
+            vcf_parser.count_records(by="TYPE")
+
+
+class TestVcfParserSampling:
+    """Test reservoir sampling of records."""
+    
+    @pytest.fixture
+    def numbered_vcf_file(self, tmp_path):
+        """A VCF with 200 records at positions 1 to 200."""
+        lines = ["##fileformat=VCFv4.2", "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO"]
+        lines += [f"chr1\t{pos}\t.\tA\tG\t{pos % 50}\tPASS\tDP=1" for pos in range(1, 201)]
+        vcf_file = tmp_path / "numbered.vcf"
+        vcf_file.write_text("\n".join(lines) + "\n")
+        return vcf_file
+        
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_sample_is_reproducible(self, numbered_vcf_file, mmap):
+        """Test that a seed gives the same k distinct records, in file order, and only they are parsed."""
+        parser = VcfParser(str(numbered_vcf_file), mmap=mmap)
+        with patch.object(RawRecord, "to_record", autospec=True, side_effect=RawRecord.to_record) as to_record:
+            sample = parser.sample_records(10, seed=7)
+        
+        positions = [int(rec.POS) for rec in sample]
+        assert to_record.call_count == 10
+        assert len(set(positions)) == 10 and positions == sorted(positions)
+        assert [rec.POS for rec in parser.sample_records(10, seed=7)] == [rec.POS for rec in sample]
+        
+    def test_sample_with_filters(self, numbered_vcf_file, vcf_parser):
+        """Test sampling a position range and a filter, and asking for more records than there are."""
+        parser = VcfParser(str(numbered_vcf_file))
+        assert all(50 <= int(rec.POS) <= 60 for rec in parser.sample_records(5, seed=1, pos_range=(50, 60)))
+        assert all(int(rec.QUAL) >= 45 for rec in parser.sample_records(5, seed=1, filter="QUAL >= 45"))
+        assert [rec.POS for rec in vcf_parser.sample_records(10)] == ['1000', '2000', '1500']
+        assert vcf_parser.sample_records(0) == []
+        with pytest.raises(ValueError):
+            vcf_parser.sample_records(-1)
+            
+    def test_sample_skips_blank_lines(self, tmp_path, small_vcf_content):
+        """Test that blank lines are never drawn as records."""
+        vcf_file = tmp_path / "blank_lines.vcf"
+        vcf_file.write_text(small_vcf_content.replace("chr1\t2000", "\n\nchr1\t2000") + "\n")
+        assert [rec.POS for rec in VcfParser(str(vcf_file)).sample_records(10)] == ['1000', '2000', '1500']
+        
+    def test_reservoir_is_uniform(self):
+        """Test that every item is about equally likely to be drawn."""
+        rng = random.Random(0)
+        counts = Counter(item for _ in range(3000) for _, item in _reservoir_sample(range(30), 3, rng))
+        assert set(counts) == set(range(30))
+        assert all(200 < count < 400 for count in counts.values())
+
+
+class TestVcfParserAsync:
+    """Test the asyncio record iterator."""
+    
+    @pytest.mark.parametrize("fixture", ["small_vcf_file", "gzipped_vcf_file", "bgzipped_vcf_file"])
+    def test_matches_parse_records(self, request, fixture):
+        """Test that the async records match the blocking ones, with a queue of a single record."""
+        parser = VcfParser(str(request.getfixturevalue(fixture)))
+        
+        async def collect():
+            return [str(rec) async for rec in parser.aparse_records(queue_size=1, batch_size=1)]
+        
+        assert asyncio.run(collect()) == [str(rec) for rec in parser.parse_records()]
+        
+    def test_concurrent_queries(self, vcf_parser):
+        """Test several queries on one parser at the same time."""
+        async def query(**kwargs):
+            return [rec.POS async for rec in vcf_parser.aparse_records(batch_size=1, **kwargs)]
+        
+        async def run_queries():
+            return await asyncio.gather(query(chrom='chr1'), query(chrom='chr2'), query(filter="QUAL >= 30"))
+        
+        assert asyncio.run(run_queries()) == [['1000', '2000'], ['1500'], ['1000', '1500']]
+        
+    def test_early_exit_and_errors(self, vcf_parser):
+        """Test leaving the loop early and errors raised by the reader."""
+        async def first_record():
+            async for record in vcf_parser.aparse_records(queue_size=1, batch_size=1):
+                return record.POS
+        
+        async def invalid_filter():
+            return [rec async for rec in vcf_parser.aparse_records(filter="QUAL >>> 30")]
+        
+        assert asyncio.run(first_record()) == '1000'
+        with pytest.raises(ValueError):
+            asyncio.run(invalid_filter())
+        with pytest.raises(ValueError):
+            asyncio.run(vcf_parser.aparse_records(queue_size=0).__anext__())
+
+
 class TestVcfParserErrors:
     """Test error handling in VcfParser."""
     
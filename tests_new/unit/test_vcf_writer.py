@@ -3,7 +3,7 @@ Unit tests for VCFWriter class.
 """
 import pytest
 import os
-from vcfparser import VCFWriter
+from vcfparser import VCFWriter, VcfParser
 
 
 class TestVCFWriterInit:
@@ -326,3 +326,40 @@ class TestVCFWriterFileHandling:
         assert not writer.w_file.closed
         
         writer.w_file.close()
+
+
+class TestVCFWriterRecords:
+    """Test writing parsed and raw records."""
+    
+    def test_copy_raw_records(self, small_vcf_file, temp_output_file):
+        """Test that header text and raw records are written in order, byte for byte."""
+        parser = VcfParser(str(small_vcf_file))
+        with VCFWriter(str(temp_output_file)) as writer:
+            writer.add_normal_metadata("fileformat", "VCFv4.2")
+            writer.add_header_line("#" + "\t".join(parser.parse_metadata().record_keys))
+            writer.add_records(parser.parse_records(raw=True))
+            
+        expected = [line for line in small_vcf_file.read_text().splitlines() if not line.startswith('#')]
+        lines = temp_output_file.read_text().splitlines()
+        assert lines[0] == "##fileformat=VCFv4.2"
+        assert lines[1].startswith("#CHROM")
+        assert lines[2:] == expected
+        
+    def test_mixed_records(self, small_vcf_file, temp_output_file):
+        """Test that text writes after raw ones keep their order."""
+        parser = VcfParser(str(small_vcf_file))
+        raw_record = next(parser.parse_records(raw=True))
+        record = next(parser.parse_records())
+        with VCFWriter(str(temp_output_file)) as writer:
+            writer.add_record(raw_record)
+            writer.add_record(record)
+            writer.add_record(raw_record)
+            
+        assert temp_output_file.read_text().splitlines() == [str(raw_record), record.rec_line, str(raw_record)]
+        
+    def test_raw_record_after_close(self, small_vcf_file, temp_output_file):
+        """Test that writing a raw record to a closed writer fails."""
+        writer = VCFWriter(str(temp_output_file))
+        writer.close()
+        with pytest.raises(ValueError):
+            writer.add_record(next(VcfParser(str(small_vcf_file)).parse_records(raw=True)))
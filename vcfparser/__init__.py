@@ -1,4 +1,9 @@
 from vcfparser.vcf_parser import VcfParser
 from vcfparser.vcf_writer import VCFWriter
-from vcfparser.record_parser import Record
+from vcfparser.record_parser import Record, RecordBatch, RecordHeader, RawRecord
 from vcfparser.meta_header_parser import MetaDataParser
+from vcfparser.filters import RecordFilter
+from vcfparser.regions import RegionSet
+from vcfparser.merge import MultiVcfParser
+from vcfparser.parallel import scan_files, reduce_files
+from vcfparser.genotype_matrix import GenotypeMatrix
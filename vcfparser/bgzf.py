@@ -0,0 +1,422 @@
+"""
+BGZF Module
+
+This module provides a reader and a writer for BGZF (Blocked GNU Zip Format) files, the gzip variant
+written by ``bgzip`` and used by tabix/CSI indexed VCF files.
+
+A BGZF file is a series of independent gzip members ("blocks") of at most 64 KiB of
+uncompressed data. A position in the uncompressed stream is addressed with a *virtual
+offset*: ``(block_start << 16) | offset_within_block``, where ``block_start`` is the
+byte offset of the compressed block in the file.
+
+Classes
+-------
+BgzfReader : Binary line reader with virtual offset ``tell()``/``seek()``
+BgzfWriter : Binary writer that compresses data into BGZF blocks
+
+Examples
+--------
+>>> from vcfparser.bgzf import BgzfReader
+>>> with BgzfReader("sample.vcf.gz") as reader:
+...     header = reader.readline()
+...     offset = reader.tell()
+...     reader.seek(offset)
+"""
+
+import io
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Deque, Iterator, Optional, Tuple, Union
+from pathlib import Path
+
+__all__ = ['BgzfReader', 'BgzfWriter', 'is_bgzf', 'iter_blocks', 'make_virtual_offset', 'split_virtual_offset']
+
+
+# fixed part of the gzip header of a BGZF block, up to and including XLEN
+_BLOCK_HEADER = struct.Struct("<4BI2BH")
+_BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+# largest amount of uncompressed data htslib puts in one block
+MAX_BLOCK_DATA = 65280
+
+
+def make_virtual_offset(block_start: int, within_block: int) -> int:
+    """Combine a compressed block offset and an uncompressed in-block offset."""
+    return (block_start << 16) | within_block
+
+
+def split_virtual_offset(virtual_offset: int) -> Tuple[int, int]:
+    """Split a virtual offset into (block_start, within_block)."""
+    return virtual_offset >> 16, virtual_offset & 0xFFFF
+
+
+def is_bgzf(filename: Union[str, Path]) -> bool:
+    """Return True if the file starts with a BGZF block (gzip member with a 'BC' extra field)."""
+    with open(filename, "rb") as handle:
+        header = handle.read(_BLOCK_HEADER.size + 4)
+    return (
+        len(header) == _BLOCK_HEADER.size + 4
+        and header.startswith(_BGZF_MAGIC)
+        and header[_BLOCK_HEADER.size:_BLOCK_HEADER.size + 2] == b"BC"
+    )
+
+
+def _read_raw_block(handle: BinaryIO, block_start: int) -> Optional[Tuple[bytes, int]]:
+    """Read the compressed block starting at `block_start` without decompressing it.
+
+    Returns
+    -------
+    Optional[Tuple[bytes, int]]
+        (compressed payload including the CRC32/ISIZE trailer, size of the whole block),
+        or None at end of file.
+
+    Raises
+    ------
+    ValueError
+        If the data at `block_start` is not a BGZF block.
+    """
+    handle.seek(block_start)
+    header = handle.read(_BLOCK_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _BLOCK_HEADER.size or not header.startswith(_BGZF_MAGIC):
+        raise ValueError(f"Not a BGZF block at file offset {block_start}")
+    xlen = _BLOCK_HEADER.unpack(header)[-1]
+    extra = handle.read(xlen)
+
+    # walk the extra subfields to find the 'BC' field that holds the block size
+    block_size = None
+    pos = 0
+    while pos + 4 <= len(extra):
+        subfield_len = struct.unpack_from("<H", extra, pos + 2)[0]
+        if extra[pos:pos + 2] == b"BC" and subfield_len == 2:
+            block_size = struct.unpack_from("<H", extra, pos + 4)[0] + 1
+            break
+        pos += 4 + subfield_len
+    if block_size is None:
+        raise ValueError(f"BGZF block at file offset {block_start} has no BC extra field")
+
+    return handle.read(block_size - _BLOCK_HEADER.size - xlen), block_size
+
+
+def _inflate(payload: bytes) -> bytes:
+    """Decompress a block payload (the deflate data followed by CRC32 and ISIZE)."""
+    return zlib.decompress(payload[:-8], -15)
+
+
+def _read_block(handle: BinaryIO, block_start: int) -> Optional[Tuple[bytes, int]]:
+    """Read and decompress the block starting at `block_start`.
+
+    Returns
+    -------
+    Optional[Tuple[bytes, int]]
+        (uncompressed data, size of the compressed block), or None at end of file.
+    """
+    raw_block = _read_raw_block(handle, block_start)
+    if raw_block is None:
+        return None
+    payload, block_size = raw_block
+    return _inflate(payload), block_size
+
+
+def iter_blocks(filename: Union[str, Path], start: int = 0) -> Iterator[Tuple[int, int, int]]:
+    """Walk the block headers of a BGZF file without decompressing anything.
+
+    Parameters
+    ----------
+    filename : Union[str, Path]
+        Path to the BGZF compressed file.
+    start : int
+        File offset of the first block to report (must be a block start).
+
+    Yields
+    ------
+    Tuple[int, int, int]
+        (block start, compressed block size, uncompressed data size) for every block.
+    """
+    with open(filename, "rb") as handle:
+        block_start = start
+        while True:
+            raw_block = _read_raw_block(handle, block_start)
+            if raw_block is None:
+                return
+            payload, block_size = raw_block
+            # ISIZE is the last field of the block trailer
+            yield block_start, block_size, struct.unpack("<I", payload[-4:])[0]
+            block_start += block_size
+
+
+class BgzfReader(io.BufferedIOBase):
+    """
+    A binary reader for BGZF compressed files that understands block boundaries.
+
+    Lines are returned as ``bytes`` including the trailing newline, like a file opened in
+    "rb" mode. ``tell()`` and ``seek()`` work with BGZF virtual offsets, which are the
+    offsets stored in tabix (.tbi) and CSI (.csi) indexes.
+
+    Since every block is an independent deflate stream, blocks can be decompressed in
+    parallel. With ``threads > 1`` the reader keeps up to ``readahead`` blocks queued in a
+    thread pool while the caller consumes the current one (zlib releases the GIL).
+
+    Parameters
+    ----------
+    filename : Union[str, Path]
+        Path to the BGZF compressed file.
+    threads : int
+        Number of decompression threads (default = 1, decompress in the calling thread).
+    readahead : Optional[int]
+        Number of blocks to decompress ahead of the reading position when ``threads > 1``
+        (default = 4 blocks per thread).
+
+    Examples
+    --------
+    >>> reader = BgzfReader("sample.vcf.gz")
+    >>> for line in reader:
+    ...     print(line.decode())
+    >>> reader.close()
+    >>> with BgzfReader("sample.vcf.gz", threads=4, readahead=32) as reader:
+    ...     data = reader.read()
+    """
+
+    # Instance attributes
+    filename: str
+    threads: int
+    readahead: int
+    _handle: BinaryIO
+    _block_start: int
+    _block_size: int
+    _buffer: bytes
+    _within: int
+    _pool: Optional[ThreadPoolExecutor]
+    _ahead: Deque[Tuple[int, int, 'Future[bytes]']]
+    _next_raw_start: int
+
+    def __init__(self, filename: Union[str, Path], threads: int = 1, readahead: Optional[int] = None) -> None:
+        super().__init__()
+        if threads < 1:
+            raise ValueError(f"threads must be at least 1, got {threads}")
+        self.filename = str(filename)
+        self.threads = threads
+        self.readahead = max(readahead if readahead is not None else 4 * threads, 1)
+        self._handle = open(self.filename, "rb")
+        self._block_start = 0
+        self._block_size = 0
+        self._buffer = b""
+        self._within = 0
+        self._pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+        self._ahead = deque()
+        self._next_raw_start = 0
+
+    def __enter__(self) -> 'BgzfReader':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the decompression threads and close the underlying file handle."""
+        # close() also runs for a reader whose __init__ failed, before the pool existed
+        pool = getattr(self, '_pool', None)
+        if pool is not None:
+            self._drop_readahead()
+            pool.shutdown(wait=True)
+            self._pool = None
+        if hasattr(self, '_handle'):
+            self._handle.close()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def _drop_readahead(self) -> None:
+        for _, _, future in self._ahead:
+            future.cancel()
+        self._ahead.clear()
+
+    def _next_block(self, block_start: int) -> Optional[Tuple[bytes, int]]:
+        """Return the decompressed block at `block_start`, served from the read-ahead queue if possible."""
+        if self._pool is None:
+            return _read_block(self._handle, block_start)
+
+        if not self._ahead or self._ahead[0][0] != block_start:
+            # not a sequential read, restart the queue at the requested block
+            self._drop_readahead()
+            self._next_raw_start = block_start
+        while len(self._ahead) < self.readahead:
+            raw_block = _read_raw_block(self._handle, self._next_raw_start)
+            if raw_block is None:
+                break
+            payload, block_size = raw_block
+            self._ahead.append((self._next_raw_start, block_size, self._pool.submit(_inflate, payload)))
+            self._next_raw_start += block_size
+        if not self._ahead:
+            return None
+        _, block_size, future = self._ahead.popleft()
+        return future.result(), block_size
+
+    def _load_next_block(self) -> bool:
+        """Move to the block following the current one. Returns False at end of file."""
+        block = self._next_block(self._block_start + self._block_size)
+        if block is None:
+            return False
+        self._block_start += self._block_size
+        self._buffer, self._block_size = block
+        self._within = 0
+        return True
+
+    def tell(self) -> int:
+        """Return the virtual offset of the next byte to be read."""
+        if self._within >= len(self._buffer):
+            # positioned at the end of a block, which is the start of the next one
+            return make_virtual_offset(self._block_start + self._block_size, 0)
+        return make_virtual_offset(self._block_start, self._within)
+
+    def seek(self, virtual_offset: int, whence: int = io.SEEK_SET) -> int:
+        """Move to the given virtual offset and return it.
+
+        Raises
+        ------
+        ValueError
+            If the in-block offset lies beyond the end of the block, or `whence`
+            is not SEEK_SET (virtual offsets cannot be added to).
+        """
+        if whence != io.SEEK_SET:
+            raise ValueError("BGZF files only support seeking to an absolute virtual offset")
+        block_start, within = split_virtual_offset(virtual_offset)
+        if block_start != self._block_start or not self._block_size:
+            # only decompress when moving to a different block
+            block = self._next_block(block_start)
+            self._block_start = block_start
+            self._buffer, self._block_size = block if block is not None else (b"", 0)
+        if within > len(self._buffer):
+            raise ValueError(f"Invalid virtual offset {virtual_offset}: beyond end of block")
+        self._within = within
+        return virtual_offset
+
+    def readline(self, size: Optional[int] = -1) -> bytes:
+        """Read one line, including the newline. Returns b"" at end of file."""
+        parts = []
+        while True:
+            newline = self._buffer.find(b"\n", self._within)
+            if newline != -1:
+                parts.append(self._buffer[self._within:newline + 1])
+                self._within = newline + 1
+                break
+            parts.append(self._buffer[self._within:])
+            self._within = len(self._buffer)
+            if not self._load_next_block():
+                break
+        return b"".join(parts)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """Read up to `size` uncompressed bytes (all remaining bytes if negative)."""
+        parts = []
+        remaining = -1 if size is None else size
+        while remaining != 0:
+            if self._within >= len(self._buffer) and not self._load_next_block():
+                break
+            available = len(self._buffer) - self._within
+            take = available if remaining < 0 else min(available, remaining)
+            parts.append(self._buffer[self._within:self._within + take])
+            self._within += take
+            if remaining > 0:
+                remaining -= take
+        return b"".join(parts)
+
+    def read1(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes, decompressing at most one new block."""
+        if self._within >= len(self._buffer) and not self._load_next_block():
+            return b""
+        end = len(self._buffer) if size < 0 else min(len(self._buffer), self._within + size)
+        data = self._buffer[self._within:end]
+        self._within = end
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+class BgzfWriter:
+    """
+    A binary writer that compresses data into BGZF blocks, like ``bgzip``.
+
+    Parameters
+    ----------
+    filename : Union[str, Path]
+        Path to the output file.
+    block_size : int
+        Maximum number of uncompressed bytes per block (default = 65280, as in htslib).
+    compresslevel : int
+        zlib compression level (default = 6).
+
+    Examples
+    --------
+    >>> with BgzfWriter("sample.vcf.gz") as writer:
+    ...     writer.write(b"##fileformat=VCFv4.2\\n")
+    """
+
+    # Instance attributes
+    filename: str
+    block_size: int
+    compresslevel: int
+    _handle: BinaryIO
+    _pending: bytearray
+
+    def __init__(self, filename: Union[str, Path], block_size: int = MAX_BLOCK_DATA, compresslevel: int = 6) -> None:
+        if not 0 < block_size <= MAX_BLOCK_DATA:
+            raise ValueError(f"block_size must be between 1 and {MAX_BLOCK_DATA}, got {block_size}")
+        self.filename = str(filename)
+        self.block_size = block_size
+        self.compresslevel = compresslevel
+        self._handle = open(self.filename, "wb")
+        self._pending = bytearray()
+
+    def __enter__(self) -> 'BgzfWriter':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _write_block(self, data: bytes) -> None:
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        payload = compressor.compress(data) + compressor.flush()
+        # BSIZE is the total block size minus one: 18 header bytes + payload + 8 trailer bytes
+        header = _BLOCK_HEADER.pack(31, 139, 8, 4, 0, 0, 255, 6) + struct.pack("<2sHH", b"BC", 2, len(payload) + 25)
+        self._handle.write(header + payload + struct.pack("<II", zlib.crc32(data), len(data)))
+
+    def tell(self) -> int:
+        """Return the virtual offset at which the next written byte will be found."""
+        self.flush()
+        return make_virtual_offset(self._handle.tell(), 0)
+
+    def write(self, data: bytes) -> int:
+        """Buffer `data` and write out every complete block."""
+        self._pending += data
+        while len(self._pending) >= self.block_size:
+            self._write_block(bytes(self._pending[:self.block_size]))
+            del self._pending[:self.block_size]
+        return len(data)
+
+    def flush(self) -> None:
+        """Write the buffered data as a (possibly short) block."""
+        if self._pending:
+            self._write_block(bytes(self._pending))
+            self._pending.clear()
+
+    def close(self) -> None:
+        """Flush, append the BGZF end-of-file marker block and close the file."""
+        if self._handle.closed:
+            return
+        self.flush()
+        self._write_block(b"")
+        self._handle.close()
@@ -0,0 +1,372 @@
+"""
+Filters Module
+
+This module compiles filter expressions into predicates that run on the raw, tab-split fields
+of a record line. VcfParser evaluates them before any Record object is built, so rejected lines
+only cost a partial split of the line.
+
+Expressions compare a field with a literal and combine the comparisons with ``&&``, ``||``,
+``!`` and parentheses (``and``, ``or`` and ``not`` work too)::
+
+    QUAL >= 30 && FILTER == "PASS" && INFO/DP > 10 && TYPE == "snp"
+
+Fields
+    CHROM, POS, ID, REF, ALT, QUAL, FILTER, INFO/<key> and TYPE (``snp``, ``mnp``, ``indel`` or
+    ``other`` for each ALT allele). A bare ``INFO/<key>`` tests whether the key is present,
+    which is how Flag keys are used.
+Operators
+    ``==`` (or ``=``), ``!=``, ``<``, ``<=``, ``>``, ``>=``. Fields that hold several values
+    (ALT, FILTER, ID, TYPE and lists in INFO) match when any value matches; ``!=`` is the
+    negation of ``==``. Missing values ('.' or an absent INFO key) never match.
+
+FILTER and ID values are split on ';', the separator the VCF specification gives for both
+columns. ``Record.FILTER`` splits on ',' instead and is left that way for compatibility, so
+a FILTER column written with commas is matched as a single value here.
+
+POS and QUAL are compared as numbers. INFO values are compared as numbers when the header
+declares the key as Integer or Float, and as strings when it is declared as String or Character;
+keys missing from the header follow the type of the literal.
+
+Classes
+-------
+LineFilter : Base class of the filters VcfParser runs on raw record fields
+RecordFilter : A compiled filter expression
+FilterChain : Several filters that must all keep a line
+
+Examples
+--------
+>>> from vcfparser.filters import RecordFilter
+>>> record_filter = RecordFilter('QUAL >= 30 && INFO/DP > 10', info_types={'DP': 'Integer'})
+>>> record_filter.predicate("chr1\\t100\\t.\\tA\\tG\\t50\\tPASS\\tDP=12".split("\\t"))
+True
+"""
+
+import operator
+import re
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Tuple
+
+__all__ = ['LineFilter', 'RecordFilter', 'FilterChain']
+
+
+# a node gets the split fields and a one-item cache for the parsed INFO column of the line
+_Node = Callable[[List[str], List[Optional[Dict[str, Optional[str]]]]], bool]
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![\w.])"
+    r"|(?P<string>\"[^\"]*\"|'[^']*')"
+    r"|(?P<op>==|!=|<=|>=|&&|\|\||[<>=&|!()])"
+    r"|(?P<name>[A-Za-z_][\w.]*(?:/[\w.]+)?)"
+    r")"
+)
+
+_COMPARISONS = {
+    "==": operator.eq, "=": operator.eq, "!=": operator.eq,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_OR = ("||", "|", "or")
+_AND = ("&&", "&", "and")
+_NOT = ("!", "not")
+
+# fixed columns: name -> (index, separator of multiple values, numeric)
+_COLUMNS = {
+    "CHROM": (0, None, False),
+    "POS": (1, None, True),
+    "ID": (2, ";", False),
+    "REF": (3, None, False),
+    "ALT": (4, ",", False),
+    "QUAL": (5, None, True),
+    "FILTER": (6, ";", False),
+}
+_INFO_INDEX = 7
+_NUMERIC_TYPES = ("Integer", "Float")
+_STRING_TYPES = ("String", "Character")
+# INFO lookups return this for keys that are not in the line; Flag keys map to None
+_ABSENT = "."
+
+
+def _parse_info(info_str: str) -> Dict[str, Optional[str]]:
+    """Map the INFO keys of one line to their raw values (None for flags)."""
+    mapped_info: Dict[str, Optional[str]] = {}
+    for entry in info_str.split(";"):
+        key, sep, value = entry.partition("=")
+        mapped_info[key] = value if sep else None
+    return mapped_info
+
+
+def _variant_types(ref: str, alt_field: str) -> str:
+    """Classify each ALT allele against REF as snp, mnp, indel or other."""
+    types = []
+    for alt in alt_field.split(","):
+        if alt in (".", "*") or alt.startswith("<") or "[" in alt or "]" in alt or ref == ".":
+            types.append("other")
+        elif len(alt) == len(ref):
+            types.append("snp" if len(ref) == 1 else "mnp")
+        else:
+            types.append("indel")
+    return ",".join(types)
+
+
+class LineFilter:
+    """
+    Base class of the filters VcfParser runs on the raw fields of a record line.
+
+    Subclasses provide ``predicate(fields) -> bool`` and ``maxsplit``, the number of splits that
+    makes every field the predicate reads available. Filters must be picklable, because they are
+    shipped to the worker processes.
+    """
+
+    maxsplit: int = -1
+
+    def predicate(self, fields: List[str]) -> bool:
+        """Return whether the record with these tab-split fields is kept."""
+        raise NotImplementedError
+
+
+class FilterChain(LineFilter):
+    """
+    Several filters that must all keep a line, evaluated in the given order.
+
+    Put the cheapest and most selective filter first.
+    """
+
+    def __init__(self, filters: List[LineFilter]) -> None:
+        self.filters = list(filters)
+        self.maxsplit = -1 if any(f.maxsplit < 0 for f in self.filters) else max(f.maxsplit for f in self.filters)
+        self._predicates = [f.predicate for f in self.filters]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"filters": self.filters}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        FilterChain.__init__(self, state["filters"])
+
+    def __repr__(self) -> str:
+        return f"FilterChain({self.filters!r})"
+
+    def predicate(self, fields: List[str]) -> bool:
+        for predicate in self._predicates:
+            if not predicate(fields):
+                return False
+        return True
+
+
+class RecordFilter(LineFilter):
+    """
+    A filter expression compiled into a predicate on the raw record fields.
+
+    Parameters
+    ----------
+    expression: str
+        Filter expression, e.g. ``'QUAL >= 30 && FILTER == "PASS" && INFO/DP > 10'``.
+    info_types: Optional[Dict[str, str]], default=None
+        INFO key -> header Type ('Integer', 'Float', 'Flag', 'String' or 'Character'), as
+        declared in the ##INFO lines. VcfParser fills this in from the header.
+
+    Attributes
+    ----------
+    maxsplit: int
+        The fields the predicate needs are all present in ``line.split("\\t", maxsplit)``.
+
+    Raises
+    ------
+    ValueError
+        If the expression cannot be parsed or compares a field with a literal of the wrong type.
+
+    Examples
+    --------
+    >>> vcf = VcfParser("sample.vcf")
+    >>> records = vcf.parse_records(filter='FILTER == "PASS" && TYPE == "snp"')
+    >>> records = vcf.parse_records(filter=RecordFilter("INFO/AF < 0.01 || INFO/DB"))
+    """
+
+    def __init__(self, expression: str, info_types: Optional[Dict[str, str]] = None) -> None:
+        self.expression = expression
+        self.info_types = dict(info_types) if info_types else {}
+        self._compile()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the compiled closures cannot be pickled; workers recompile the expression
+        return {"expression": self.expression, "info_types": self.info_types}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.expression = state["expression"]
+        self.info_types = state["info_types"]
+        self._compile()
+
+    def __repr__(self) -> str:
+        return f"RecordFilter({self.expression!r})"
+
+    def with_info_types(self, info_types: Dict[str, str]) -> "RecordFilter":
+        """Return this filter compiled with header types for the INFO keys it has no type for."""
+        merged = dict(info_types)
+        merged.update(self.info_types)
+        return RecordFilter(self.expression, merged)
+
+    def _compile(self) -> None:
+        self._tokens = self._tokenize(self.expression)
+        self._position = 0
+        self._max_index = 1
+        node = self._parse_or()
+        if self._position < len(self._tokens):
+            self._error(f"unexpected '{self._tokens[self._position][1]}'")
+        del self._tokens
+        self._node = node
+        self.maxsplit = self._max_index + 1
+
+    def predicate(self, fields: List[str]) -> bool:
+        """Return whether the record with these tab-split fields is kept."""
+        return self._node(fields, [None])
+
+    def _error(self, reason: str) -> NoReturn:
+        raise ValueError(f"Invalid filter expression {self.expression!r}: {reason}")
+
+    def _tokenize(self, expression: str) -> List[Tuple[str, str]]:
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.end() == position or match.lastgroup is None:
+                self._error(f"cannot read '{expression[position:].strip()}'")
+            kind = match.lastgroup
+            tokens.append((kind, match.group(kind)))
+            position = match.end()
+        if not tokens:
+            self._error("the expression is empty")
+        return tokens
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            self._error("unexpected end of expression")
+        self._position += 1
+        return token
+
+    def _accept(self, words: Tuple[str, ...]) -> bool:
+        token = self._peek()
+        if token is not None and token[0] in ("op", "name") and token[1] in words:
+            self._position += 1
+            return True
+        return False
+
+    def _parse_or(self) -> _Node:
+        nodes = [self._parse_and()]
+        while self._accept(_OR):
+            nodes.append(self._parse_and())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda fields, info: any(node(fields, info) for node in nodes)
+
+    def _parse_and(self) -> _Node:
+        nodes = [self._parse_not()]
+        while self._accept(_AND):
+            nodes.append(self._parse_not())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda fields, info: all(node(fields, info) for node in nodes)
+
+    def _parse_not(self) -> _Node:
+        if self._accept(_NOT):
+            node = self._parse_not()
+            return lambda fields, info: not node(fields, info)
+        return self._parse_atom()
+
+    def _parse_atom(self) -> _Node:
+        kind, text = self._next()
+        if kind == "op" and text == "(":
+            node = self._parse_or()
+            if self._next() != ("op", ")"):
+                self._error("missing ')'")
+            return node
+        if kind != "name":
+            self._error(f"expected a field name, got '{text}'")
+
+        token = self._peek()
+        if token is None or token[0] != "op" or token[1] not in _COMPARISONS:
+            if text.startswith("INFO/"):
+                return self._flag_node(text[5:])
+            self._error(f"expected a comparison after '{text}'")
+        op = self._next()[1]
+        literal_kind, literal = self._next()
+        if literal_kind == "string":
+            literal = literal[1:-1]
+        elif literal_kind not in ("number", "name"):
+            self._error(f"expected a value after '{text} {op}', got '{literal}'")
+        return self._comparison_node(text, op, literal, literal_kind == "number")
+
+    def _flag_node(self, key: str) -> _Node:
+        self._max_index = max(self._max_index, _INFO_INDEX)
+
+        def node(fields: List[str], info: List[Optional[Dict[str, Optional[str]]]]) -> bool:
+            mapped_info = info[0]
+            if mapped_info is None:
+                mapped_info = info[0] = _parse_info(fields[_INFO_INDEX] if len(fields) > _INFO_INDEX else ".")
+            return key in mapped_info
+
+        return node
+
+    def _comparison_node(self, field: str, op: str, literal: str, literal_is_number: bool) -> _Node:
+        getter: Callable[[List[str], List[Optional[Dict[str, Optional[str]]]]], Optional[str]]
+        if field in _COLUMNS:
+            index, separator, numeric = _COLUMNS[field]
+            self._max_index = max(self._max_index, index)
+
+            def getter(fields, info, index=index):
+                return fields[index] if len(fields) > index else None
+        elif field == "TYPE":
+            separator, numeric = ",", False
+            self._max_index = max(self._max_index, 4)
+
+            def getter(fields, info):
+                return _variant_types(fields[3], fields[4]) if len(fields) > 4 else None
+        elif field.startswith("INFO/"):
+            key = field[5:]
+            info_type = self.info_types.get(key)
+            if info_type == "Flag":
+                self._error(f"INFO/{key} is a Flag, test it without a comparison")
+            separator = ","
+            numeric = info_type in _NUMERIC_TYPES or (info_type not in _STRING_TYPES and literal_is_number)
+            self._max_index = max(self._max_index, _INFO_INDEX)
+
+            def getter(fields, info):
+                mapped_info = info[0]
+                if mapped_info is None:
+                    mapped_info = info[0] = _parse_info(fields[_INFO_INDEX] if len(fields) > _INFO_INDEX else ".")
+                return mapped_info.get(key, _ABSENT)
+        else:
+            self._error(f"unknown field '{field}'")
+
+        compare = _COMPARISONS[op]
+        negate = op == "!="
+        value: Any = literal
+        if numeric:
+            if not literal_is_number:
+                self._error(f"{field} is numeric and cannot be compared with '{literal}'")
+            value = float(literal)
+        elif op not in ("==", "=", "!="):
+            self._error(f"{field} holds text, '{op}' needs a numeric field")
+
+        def node(fields: List[str], info: List[Optional[Dict[str, Optional[str]]]]) -> bool:
+            raw = getter(fields, info)
+            if raw is None or raw == ".":
+                return False
+            present = False
+            for item in raw.split(separator) if separator else (raw,):
+                if item == ".":
+                    continue
+                operand: Any = item
+                if numeric:
+                    try:
+                        operand = float(item)
+                    except ValueError:
+                        continue
+                present = True
+                if compare(operand, value):
+                    return not negate
+            return present and negate
+
+        return node
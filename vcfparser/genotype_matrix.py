@@ -0,0 +1,237 @@
+"""
+Genotype Matrix Module
+
+This module streams the genotype calls of a VCF into dense NumPy arrays for vectorized
+analysis. Record lines stay raw bytes, are split only up to the last sample column kept, and
+only the genotype field of each sample is looked at; every distinct genotype string is converted to its int8 allele codes once, so a
+chunk of variants becomes one ``bytes.join`` and a ``numpy.frombuffer`` instead of a Python
+object per sample. The chunks are copied into preallocated arrays that grow by doubling.
+
+NumPy is an optional dependency and is only imported when a matrix is built.
+
+Classes
+-------
+GenotypeMatrix : Genotype calls and variant columns of a VCF as NumPy arrays
+
+Examples
+--------
+>>> from vcfparser import VcfParser
+>>> matrix = VcfParser("cohort.vcf.gz").parse_genotype_matrix(chrom="chr1")
+>>> matrix.genotypes.shape
+(5210, 96, 2)
+>>> alt_counts = (matrix.genotypes > 0).sum(axis=(1, 2))
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from vcfparser.record_parser import FormatSchemaCache, RawRecord, decode_genotype
+
+__all__ = ['GenotypeMatrix']
+
+
+class GenotypeMatrix:
+    """
+    The genotype calls of a set of variants and samples as NumPy arrays.
+
+    Attributes
+    ----------
+    samples: list
+        sample names, in the order of the sample axis
+    genotypes: numpy.ndarray
+        int8 array of shape (n_variants, n_samples, ploidy) with the allele indices of each
+        call (0 = REF, 1 = first ALT, ...); missing alleles, and the unused slots of calls
+        with fewer alleles than the ploidy, are -1
+    phased: numpy.ndarray
+        bool array of shape (n_variants, n_samples), True for phased calls ('0|1')
+    chrom, ref, alt: numpy.ndarray
+        object arrays of the CHROM, REF and ALT columns; ALT keeps the comma-separated alleles
+    pos: numpy.ndarray
+        int64 array of the POS column
+    """
+
+    samples: List[str]
+    genotypes: Any
+    phased: Any
+    chrom: Any
+    pos: Any
+    ref: Any
+    alt: Any
+
+    def __init__(
+        self, samples: List[str], genotypes: Any, phased: Any, chrom: Any, pos: Any, ref: Any, alt: Any
+    ) -> None:
+        self.samples = samples
+        self.genotypes = genotypes
+        self.phased = phased
+        self.chrom = chrom
+        self.pos = pos
+        self.ref = ref
+        self.alt = alt
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def __repr__(self) -> str:
+        n_variants, n_samples, ploidy = self.genotypes.shape
+        return f"GenotypeMatrix({n_variants} variants, {n_samples} samples, ploidy {ploidy})"
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "parse_genotype_matrix needs NumPy, which is an optional dependency of vcfparser; "
+            "install it with 'pip install numpy' or 'pip install vcfparser[numpy]'"
+        ) from None
+    return numpy
+
+
+class _GrowableArray:
+    """A preallocated array that chunks are appended to, doubling its capacity when full."""
+
+    def __init__(self, numpy: Any, tail_shape: Tuple[int, ...], dtype: Any, capacity: int) -> None:
+        self._numpy = numpy
+        self.array = numpy.empty((capacity,) + tail_shape, dtype=dtype)
+        self.size = 0
+
+    def extend(self, block: Any) -> None:
+        end = self.size + len(block)
+        if end > len(self.array):
+            grown = self._numpy.empty((max(end, 2 * len(self.array)),) + self.array.shape[1:], dtype=self.array.dtype)
+            grown[:self.size] = self.array[:self.size]
+            self.array = grown
+        self.array[self.size:end] = block
+        self.size = end
+
+    def finish(self) -> Any:
+        """Return the filled part; the buffer is shrunk in place instead of copied."""
+        self.array.resize((self.size,) + self.array.shape[1:], refcheck=False)
+        return self.array
+
+
+def _genotype_codes(genotype: str, ploidy: int) -> Tuple[bytes, bytes]:
+    """Convert a genotype string to its int8 allele codes and phased flag, as bytes."""
+    decoded = decode_genotype(genotype)
+    if decoded.ploidy > ploidy:
+        raise ValueError(f"Genotype '{genotype}' has more than {ploidy} alleles; pass a larger ploidy")
+    codes = []
+    for allele in decoded.alleles:
+        if allele is None or not allele.isdigit():
+            codes.append(-1)
+        elif int(allele) > 127:
+            raise ValueError(f"Allele index {allele} of genotype '{genotype}' does not fit into int8")
+        else:
+            codes.append(int(allele))
+    codes += [-1] * (ploidy - len(codes))
+    return bytes(code & 0xFF for code in codes), b"\x01" if decoded.phased else b"\x00"
+
+
+def read_genotype_matrix(
+    records: Iterable[RawRecord],
+    samples: List[str],
+    sample_columns: List[int],
+    tag: str = "GT",
+    ploidy: int = 2,
+    chunk_size: int = 10000,
+    format_schemas: Optional[FormatSchemaCache] = None,
+) -> GenotypeMatrix:
+    """Fill a GenotypeMatrix from raw record lines, `chunk_size` variants at a time.
+
+    Parameters
+    ----------
+    records : Iterable[RawRecord]
+        The record lines to convert.
+    samples : List[str]
+        Names of the samples to keep, in order.
+    sample_columns : List[int]
+        Column index of each of those samples in the record lines.
+    tag : str, default="GT"
+        FORMAT tag holding the genotype.
+    ploidy : int, default=2
+        Size of the allele axis.
+    chunk_size : int, default=10000
+        Number of variants converted at a time.
+    format_schemas : Optional[FormatSchemaCache], default=None
+        Cache of the split FORMAT strings, e.g. the one of the parser.
+
+    Returns
+    -------
+    GenotypeMatrix
+
+    Raises
+    ------
+    ImportError
+        If NumPy is not installed.
+    ValueError
+        If a genotype has more alleles than `ploidy` or an allele index above 127.
+    """
+    numpy = _import_numpy()
+    if format_schemas is None:
+        format_schemas = FormatSchemaCache()
+    n_samples = len(samples)
+    genotypes = _GrowableArray(numpy, (n_samples, ploidy), numpy.int8, chunk_size)
+    phased = _GrowableArray(numpy, (n_samples,), numpy.bool_, chunk_size)
+    positions = _GrowableArray(numpy, (), numpy.int64, chunk_size)
+    chroms: List[str] = []
+    refs: List[str] = []
+    alts: List[str] = []
+
+    # raw genotype string -> (allele codes, phased flag); a handful of entries for a whole file
+    codes: Dict[bytes, Tuple[bytes, bytes]] = {}
+    missing_codes = _genotype_codes(".", ploidy)
+    missing_row = (missing_codes[0] * n_samples, missing_codes[1] * n_samples)
+    # the line is split up to the last sample column kept; the columns after it stay unsplit
+    last_column = max(sample_columns, default=8)
+    maxsplit = last_column + 1
+
+    def flush(allele_parts: List[bytes], phased_parts: List[bytes], chunk_positions: List[int]) -> None:
+        n_rows = len(chunk_positions)
+        genotypes.extend(numpy.frombuffer(b"".join(allele_parts), dtype=numpy.int8).reshape(n_rows, n_samples, ploidy))
+        phased.extend(numpy.frombuffer(b"".join(phased_parts), dtype=numpy.bool_).reshape(n_rows, n_samples))
+        positions.extend(numpy.array(chunk_positions, dtype=numpy.int64))
+
+    allele_parts: List[bytes] = []
+    phased_parts: List[bytes] = []
+    chunk_positions: List[int] = []
+    for record in records:
+        fields = record.line.split(b"\t", maxsplit)
+        chroms.append(fields[0].decode())
+        chunk_positions.append(int(fields[1]))
+        refs.append(fields[3].decode())
+        alts.append(fields[4].decode() if len(fields) > 4 else ".")
+
+        tag_index = format_schemas.get(fields[8].decode()).tag_index.get(tag) if len(fields) > 8 else None
+        if tag_index is None:
+            allele_parts.append(missing_row[0])
+            phased_parts.append(missing_row[1])
+        else:
+            if len(fields) > last_column:
+                values = [fields[column] for column in sample_columns]
+            else:
+                # a line that ends before the last sample column
+                values = [fields[column] if column < len(fields) else b"." for column in sample_columns]
+            for value in values:
+                parts = value.split(b":", tag_index + 1)
+                genotype = parts[tag_index] if tag_index < len(parts) else b"."
+                entry = codes.get(genotype)
+                if entry is None:
+                    entry = codes[genotype] = _genotype_codes(genotype.decode(), ploidy)
+                allele_parts.append(entry[0])
+                phased_parts.append(entry[1])
+
+        if len(chunk_positions) == chunk_size:
+            flush(allele_parts, phased_parts, chunk_positions)
+            allele_parts, phased_parts, chunk_positions = [], [], []
+    if chunk_positions:
+        flush(allele_parts, phased_parts, chunk_positions)
+
+    return GenotypeMatrix(
+        samples=list(samples),
+        genotypes=genotypes.finish(),
+        phased=phased.finish(),
+        chrom=numpy.array(chroms, dtype=object),
+        pos=positions.finish(),
+        ref=numpy.array(refs, dtype=object),
+        alt=numpy.array(alts, dtype=object),
+    )
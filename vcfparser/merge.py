@@ -0,0 +1,257 @@
+"""
+Merge Module
+
+This module merges several coordinate-sorted VCF files (e.g. per-chromosome or per-batch shards)
+into one stream of records in genomic order. The files are read side by side and a heap holds
+the next record of each one, so memory stays at one record per file however large the files are.
+
+Classes
+-------
+MultiVcfParser : Reads several sorted VCF files as one coordinate-ordered record stream
+
+Examples
+--------
+>>> from vcfparser.merge import MultiVcfParser
+>>> with MultiVcfParser(["chr1.vcf.gz", "chr2.vcf.gz"]) as shards:
+...     for record in shards.parse_records():
+...         print(record.CHROM, record.POS)
+>>> # Combine the sample columns of two cohorts, like bcftools merge
+>>> with MultiVcfParser(["cohort_a.vcf.gz", "cohort_b.vcf.gz"], union_samples=True) as cohorts:
+...     print(cohorts.sample_names)
+"""
+
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from vcfparser.filters import LineFilter
+from vcfparser.record_parser import Record, RecordHeader
+from vcfparser.regions import RegionSet
+from vcfparser.vcf_parser import VcfParser
+
+__all__ = ['MultiVcfParser']
+
+# the fixed columns up to FORMAT, which every file must have in this order
+_FIXED_KEYS = ["CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT"]
+
+_SortKey = Tuple[Tuple[int, int, str], int]
+
+
+class MultiVcfParser:
+    """
+    A parser that reads several coordinate-sorted VCF files as one record stream.
+
+    The #CHROM lines of all files are checked when the parser is created. Without
+    `union_samples` every file must have the same sample columns, as shards of one callset do.
+    With `union_samples` the sample columns of all files are combined in order of first
+    appearance: records of the same site (CHROM, POS, REF, ALT and FORMAT) from different files
+    are joined into one line that keeps the ID to INFO columns of the first file, and samples of
+    files without a record at the site are set to missing (``./.`` when FORMAT starts with GT).
+    Alleles are not normalized, so a site with differing ALT alleles stays on several lines.
+
+    Chromosomes are ordered by the ##contig lines of the headers (in order of first appearance),
+    then by name, with numbered chromosomes in numeric order.
+
+    Parameters
+    ----------
+    filenames: Iterable[Union[str, Path]]
+        paths of the VCF files, plain, gzipped or bgzipped
+    union_samples: bool, default=False
+        combine the sample columns of all files instead of requiring the same ones
+
+    Raises
+    ------
+    ValueError
+        If no file is given, a file lacks the fixed VCF columns, or the sample columns differ
+        and `union_samples` is not set.
+
+    Examples
+    --------
+    >>> with MultiVcfParser(["batch1.vcf", "batch2.vcf"]) as batches:
+    ...     for record in batches.parse_records(chrom="chr1"):
+    ...         print(record.POS, record.REF, record.ALT)
+    """
+
+    filenames: List[str]
+    parsers: List[VcfParser]
+    union_samples: bool
+    record_keys: List[str]
+    sample_names: List[str]
+
+    def __init__(self, filenames: Iterable[Union[str, Path]], union_samples: bool = False) -> None:
+        self.filenames = [str(filename) for filename in filenames]
+        if not self.filenames:
+            raise ValueError("MultiVcfParser needs at least one file")
+        self.union_samples = union_samples
+        self.parsers = []
+        try:
+            for filename in self.filenames:
+                self.parsers.append(VcfParser(filename))
+            self._check_headers()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'MultiVcfParser':
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Optional[object]) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all files."""
+        for parser in self.parsers:
+            parser.close()
+
+    def _check_headers(self) -> None:
+        """Validate the #CHROM lines and work out the merged record keys and contig order."""
+        file_samples: List[List[str]] = []
+        self._contig_ranks: Dict[str, int] = {}
+        for filename, parser in zip(self.filenames, self.parsers):
+            metadata = parser.parse_metadata()
+            keys = metadata.record_keys
+            if keys[:8] != _FIXED_KEYS[:8] or keys[8:9] not in ([], ["FORMAT"]):
+                raise ValueError(f"{filename} does not have the fixed VCF columns: {keys[:9]}")
+            file_samples.append(keys[9:])
+            for contig in metadata.contig:
+                if "ID" in contig:
+                    self._contig_ranks.setdefault(contig["ID"], len(self._contig_ranks))
+
+        if self.union_samples:
+            # sample name -> column, in order of first appearance
+            columns: Dict[str, int] = {}
+            for samples in file_samples:
+                for sample in samples:
+                    columns.setdefault(sample, len(columns))
+            self.sample_names = list(columns)
+        else:
+            for filename, samples in zip(self.filenames[1:], file_samples[1:]):
+                if samples != file_samples[0]:
+                    raise ValueError(
+                        f"Sample columns of {filename} differ from {self.filenames[0]}; "
+                        "use union_samples=True to combine them"
+                    )
+            self.sample_names = file_samples[0]
+        self.record_keys = _FIXED_KEYS + self.sample_names if self.sample_names else _FIXED_KEYS[:8]
+        self._header = RecordHeader(self.record_keys)
+        self._file_samples = file_samples
+
+    def _sort_key(self, chrom_keys: Dict[str, Tuple[int, int, str]], file_no: int, record: Record) -> _SortKey:
+        chrom, pos = record.CHROM, record.POS
+        if chrom is None or pos is None:
+            raise ValueError(f"{self.filenames[file_no]} has a record without CHROM or POS: {record.rec_line!r}")
+        chrom_key = chrom_keys.get(chrom)
+        if chrom_key is None:
+            chrom_key = chrom_keys[chrom] = _chrom_sort_key(chrom, self._contig_ranks)
+        return chrom_key, int(pos)
+
+    def _sorted_stream(
+        self, file_no: int, records: Iterator[Record]
+    ) -> Iterator[Tuple[_SortKey, int, Record]]:
+        """Yield (sort key, file number, record) and check that the file really is sorted."""
+        chrom_keys: Dict[str, Tuple[int, int, str]] = {}
+        last_key: Optional[_SortKey] = None
+        for record in records:
+            key = self._sort_key(chrom_keys, file_no, record)
+            if last_key is not None and key < last_key:
+                raise ValueError(
+                    f"{self.filenames[file_no]} is not sorted: {record.CHROM}:{record.POS} comes after "
+                    "a later position (add ##contig lines if the chromosomes are not in natural order)"
+                )
+            last_key = key
+            yield key, file_no, record
+
+    def parse_records(
+        self,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+    ) -> Iterator[Record]:
+        """Yield the records of all files in genomic order.
+
+        Records at the same position keep the order of the files. The arguments are passed on to
+        VcfParser.parse_records of each file, so index queries and filters work per file.
+
+        Parameters
+        ----------
+        chrom : Optional[str], default=None
+            Chromosome to query.
+        pos_range : Optional[Tuple[int, int]], default=None
+            1-based inclusive position range to query.
+        filter : Optional[Union[str, LineFilter]], default=None
+            Filter expression or RecordFilter applied to the records of every file.
+        regions : Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]], default=None
+            Intervals or BED file to query.
+
+        Yields
+        ------
+        Record
+            Records with the merged record keys.
+
+        Raises
+        ------
+        ValueError
+            If a file turns out not to be sorted.
+
+        Examples
+        --------
+        >>> for record in shards.parse_records(filter="QUAL >= 30"):
+        ...     print(record.CHROM, record.POS)
+        """
+        if isinstance(regions, (str, Path)):
+            # read the BED file once for all files
+            regions = RegionSet.from_bed(regions)
+        elif regions is not None and not isinstance(regions, RegionSet):
+            regions = RegionSet(regions)
+        streams = [
+            self._sorted_stream(
+                file_no,
+                parser.parse_records(chrom=chrom, pos_range=pos_range, filter=filter, regions=regions),
+            )
+            for file_no, parser in enumerate(self.parsers)
+        ]
+        merged = heapq.merge(*streams, key=itemgetter(0, 1))
+        if not self.union_samples:
+            for _, _, record in merged:
+                yield record
+            return
+        for _, site in groupby(merged, key=itemgetter(0)):
+            yield from self._join_site([(file_no, record) for _, file_no, record in site])
+
+    def _join_site(self, site: List[Tuple[int, Record]]) -> Iterator[Record]:
+        """Join the records of one position into lines with the union of the sample columns."""
+        # (REF, ALT, FORMAT) -> contributing (file number, record) pairs, in order of first appearance
+        lines: List[Tuple[Tuple[str, ...], List[Tuple[int, Record]]]] = []
+        for file_no, record in site:
+            values = record.record_values
+            allele_key = (values[3], values[4], values[8] if len(values) > 8 else ".")
+            for line_key, contributors in lines:
+                if line_key == allele_key and all(other != file_no for other, _ in contributors):
+                    contributors.append((file_no, record))
+                    break
+            else:
+                lines.append((allele_key, [(file_no, record)]))
+
+        for (_, _, format_), contributors in lines:
+            values = contributors[0][1].record_values[:8]
+            if self.sample_names:
+                missing = "./." if format_.startswith("GT") else "."
+                sample_values: Dict[str, str] = {}
+                for file_no, record in contributors:
+                    for sample, value in zip(self._file_samples[file_no], record.record_values[9:]):
+                        sample_values.setdefault(sample, value)
+                values.append(format_)
+                values.extend(sample_values.get(sample, missing) for sample in self.sample_names)
+            yield Record(values, self._header)
+
+
+def _chrom_sort_key(chrom: str, contig_ranks: Dict[str, int]) -> Tuple[int, int, str]:
+    """Order chromosomes by ##contig rank, then numbered ones numerically, then the rest by name."""
+    rank = contig_ranks.get(chrom)
+    if rank is not None:
+        return 0, rank, ""
+    name = chrom[3:] if chrom.startswith("chr") else chrom
+    return (1, int(name), "") if name.isdigit() else (2, 0, name)
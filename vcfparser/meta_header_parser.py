@@ -23,6 +23,8 @@ class MetaDataParser:
         self.VCFspec: List[Dict[str, Any]] = []
         self.gatk_commands: List[Dict[str, str]] = []
         self.sample_with_pos: List[Dict[str, Union[str, int]]] = []
+        # number of records per contig, filled in by VcfParser when the file has an index
+        self.record_counts: Dict[str, int] = {}
 
         # to write header lines only
         self.raw_meta_data: str = ""
@@ -0,0 +1,176 @@
+"""
+Parallel Module
+
+This module runs the same per-record computation over many VCF files at once. Each file is
+scanned and folded into a partial result by a worker of a process pool; the partial results are
+streamed back as the files finish and can be combined into one result, so throughput grows with
+the number of cores instead of being capped at one file at a time.
+
+The mapper, reducer and combine functions as well as the initial value are sent to the workers,
+so they must be picklable: module-level functions, ``operator`` functions, ``functools.partial``
+objects and the like, but not lambdas.
+
+Functions
+---------
+scan_files : Yield the partial result of each file as soon as it is ready
+reduce_files : Combine the partial results of all files into one
+
+Examples
+--------
+>>> import operator
+>>> from collections import Counter
+>>> from vcfparser.parallel import reduce_files
+>>> def count_filter(counts, record):
+...     counts[record.FILTER[0]] += 1
+...     return counts
+>>> totals = reduce_files(gvcf_paths, count_filter, Counter(), combine=operator.add, no_processors=8)
+"""
+
+import copy
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from vcfparser.record_parser import Record
+from vcfparser.vcf_parser import VcfParser
+
+__all__ = ['scan_files', 'reduce_files']
+
+
+def scan_files(
+    filenames: Iterable[Union[str, Path]],
+    reducer: Callable[[Any, Any], Any],
+    initial: Any = None,
+    mapper: Optional[Callable[[Record], Any]] = None,
+    no_processors: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Tuple[str, Any]]:
+    """Fold the records of every file into a partial result, one file per worker process.
+
+    Every file starts from its own copy of `initial`; each record is passed through `mapper`
+    (if given) and folded in with ``accumulator = reducer(accumulator, value)``.
+
+    Parameters
+    ----------
+    filenames : Iterable[Union[str, Path]]
+        Paths of the VCF files.
+    reducer : Callable[[Any, Any], Any]
+        Picklable function that folds a mapped record into the accumulator and returns it.
+    initial : Any, default=None
+        Picklable start value of the accumulator of each file.
+    mapper : Optional[Callable[[Record], Any]], default=None
+        Picklable function applied to each record before it is folded in.
+    no_processors : Optional[int], default=None
+        Number of files scanned at the same time, os.cpu_count() if None. With 1 the files
+        are scanned one after the other in this process.
+    **kwargs
+        Passed on to VcfParser.parse_records of each file, e.g. chrom, filter or columns.
+
+    Yields
+    ------
+    Tuple[str, Any]
+        (filename, partial result) pairs, in the order the files finish.
+
+    Raises
+    ------
+    ValueError
+        If no_processors is less than 1.
+
+    Examples
+    --------
+    >>> for filename, n_hets in scan_files(paths, operator.add, 0, mapper=is_het, no_processors=4):
+    ...     print(filename, n_hets)
+    """
+    paths = [str(filename) for filename in filenames]
+    if no_processors is None:
+        no_processors = os.cpu_count() or 1
+    if no_processors < 1:
+        raise ValueError(f"no_processors must be at least 1, got {no_processors}")
+
+    if no_processors == 1 or len(paths) < 2:
+        for filename in paths:
+            yield filename, _scan_file(filename, reducer, initial, mapper, kwargs)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(no_processors, len(paths)))
+    futures: List[Future] = []
+    try:
+        future_files: Dict[Future, str] = {}
+        for filename in paths:
+            future = pool.submit(_scan_file, filename, reducer, initial, mapper, kwargs)
+            future_files[future] = filename
+            futures.append(future)
+        for future in as_completed(futures):
+            yield future_files[future], future.result()
+    finally:
+        # the consumer may stop early or a file may fail; drop the files that have not started
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def reduce_files(
+    filenames: Iterable[Union[str, Path]],
+    reducer: Callable[[Any, Any], Any],
+    initial: Any = None,
+    combine: Optional[Callable[[Any, Any], Any]] = None,
+    mapper: Optional[Callable[[Record], Any]] = None,
+    no_processors: Optional[int] = None,
+    **kwargs: Any,
+) -> Any:
+    """Fold the records of many files in parallel and combine the partial results.
+
+    The partial results of scan_files are combined with ``result = combine(result, partial)``,
+    starting from a copy of `initial`, as the files finish. Since files finish in any order,
+    `combine` should be associative and commutative (adding counts, merging sets, ...).
+
+    Parameters
+    ----------
+    filenames : Iterable[Union[str, Path]]
+        Paths of the VCF files.
+    reducer : Callable[[Any, Any], Any]
+        Picklable function that folds a mapped record into the accumulator and returns it.
+    initial : Any, default=None
+        Picklable start value of the accumulator of each file and of the combined result.
+    combine : Optional[Callable[[Any, Any], Any]], default=None
+        Function that merges a partial result into the combined result; `reducer` if None,
+        which fits reducers like operator.add that take two results of the same kind.
+    mapper : Optional[Callable[[Record], Any]], default=None
+        Picklable function applied to each record before it is folded in.
+    no_processors : Optional[int], default=None
+        Number of files scanned at the same time, os.cpu_count() if None.
+    **kwargs
+        Passed on to VcfParser.parse_records of each file.
+
+    Returns
+    -------
+    Any
+        The combined result; a copy of `initial` if there are no files.
+
+    Examples
+    --------
+    >>> n_records = reduce_files(paths, operator.add, 0, mapper=one_per_record)
+    """
+    if combine is None:
+        combine = reducer
+    result = copy.deepcopy(initial)
+    for _, partial in scan_files(filenames, reducer, initial, mapper, no_processors, **kwargs):
+        result = combine(result, partial)
+    return result
+
+
+def _scan_file(
+    filename: str,
+    reducer: Callable[[Any, Any], Any],
+    initial: Any,
+    mapper: Optional[Callable[[Record], Any]],
+    parse_kwargs: dict,
+) -> Any:
+    """Fold the records of one file, in a worker process or in the calling one."""
+    # a mutable initial value (a Counter, a set, ...) must not be shared between files
+    accumulator = copy.deepcopy(initial)
+    with VcfParser(filename) as parser:
+        for record in parser.parse_records(**parse_kwargs):
+            accumulator = reducer(accumulator, record if mapper is None else mapper(record))
+    return accumulator
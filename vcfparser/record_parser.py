@@ -3,43 +3,230 @@ import warnings
 from collections import OrderedDict
 from itertools import zip_longest
 import sys
-from typing import List, Dict, Optional, Union, Any, Set, Tuple
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Optional, Union, Any, Set, Tuple
 
 # Note: A very good example for handling inheritance among classes
 # https://pythonspot.com/inner-classes/
 
 
+class FormatSchema:
+    """
+    The tags of one FORMAT string, split once and shared by every record that uses it.
+
+    Holds the tag tuple, a tag -> position map and the positions of the common GT, AD, DP and
+    PL tags (None when a tag is absent), so looking up a tag in a sample column is an index
+    operation instead of building a dict per sample.
+
+    Examples
+    --------
+    >>> schema = FormatSchema("GT:AD:DP")
+    >>> schema.tags, schema.dp_index
+    (('GT', 'AD', 'DP'), 2)
+    >>> schema.tag_value("0/1:3,4:7", "DP")
+    '7'
+    """
+
+    __slots__ = ("format_str", "tags", "tag_list", "tag_index", "gt_index", "ad_index", "dp_index", "pl_index")
+
+    format_str: str
+    tags: Tuple[str, ...]
+    tag_list: List[str]
+    tag_index: Dict[str, int]
+    gt_index: Optional[int]
+    ad_index: Optional[int]
+    dp_index: Optional[int]
+    pl_index: Optional[int]
+
+    def __init__(self, format_str: str) -> None:
+        """
+        Parameters
+        ----------
+        format_str: str
+            the raw FORMAT column, e.g. 'GT:AD:DP:PL'
+        """
+        self.format_str = format_str
+        self.tags = tuple(format_str.split(":")) if format_str else ()
+        # the list handed out as Record.format_, shared by the records (do not modify)
+        self.tag_list = list(self.tags)
+        # a repeated tag maps to its last position, as in the per-sample dicts
+        self.tag_index = {tag: index for index, tag in enumerate(self.tags)}
+        self.gt_index = self.tag_index.get("GT")
+        self.ad_index = self.tag_index.get("AD")
+        self.dp_index = self.tag_index.get("DP")
+        self.pl_index = self.tag_index.get("PL")
+
+    def __repr__(self) -> str:
+        return f"FormatSchema({self.format_str!r})"
+
+    def map_values(self, sample_value: str) -> Dict[str, str]:
+        """Map the tags to the values of one sample column; missing trailing values become '.'."""
+        return dict(zip_longest(self.tags, sample_value.split(":"), fillvalue="."))
+
+    def tag_value(self, sample_value: str, tag: str) -> str:
+        """Return the value of one tag in a sample column, '.' if the column ends before it.
+
+        Raises
+        ------
+        KeyError
+            If the tag is not in the FORMAT string.
+        """
+        index = self.tag_index[tag]
+        values = sample_value.split(":", index + 1)
+        return values[index] if index < len(values) else "."
+
+
+class FormatSchemaCache:
+    """
+    FormatSchema objects keyed by the raw FORMAT string.
+
+    Real files use only a handful of distinct FORMAT strings, so nearly every lookup is a hit.
+    The hit and miss counts are kept for profiling.
+
+    Examples
+    --------
+    >>> vcf = VcfParser("sample.vcf")
+    >>> formats = [record.format_ for record in vcf.parse_records()]
+    >>> vcf.format_schemas
+    FormatSchemaCache(2 schemas, 3 hits, 2 misses)
+    """
+
+    __slots__ = ("_schemas", "hits", "misses")
+
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self._schemas: Dict[str, FormatSchema] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, format_str: str) -> FormatSchema:
+        """Return the schema of a FORMAT string, creating it on first use."""
+        schema = self._schemas.get(format_str)
+        if schema is None:
+            self.misses += 1
+            schema = self._schemas[format_str] = FormatSchema(format_str)
+        else:
+            self.hits += 1
+        return schema
+
+    def __len__(self) -> int:
+        return len(self._schemas)
+
+    def __repr__(self) -> str:
+        return f"FormatSchemaCache({len(self._schemas)} schemas, {self.hits} hits, {self.misses} misses)"
+
+    def clear(self) -> None:
+        """Drop the cached schemas and reset the counts."""
+        self._schemas.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class RecordHeader:
+    """
+    The per-file state shared by all records of a VCF: the record keys of the #CHROM line,
+    the sample names, a sample name -> column index map and the FORMAT schema cache.
+
+    Records only hold a reference to the header, so buffering many records costs nothing per
+    sample name. A Record built from a plain list of record keys reuses the header of the
+    previous record when it was built from the same list.
+
+    Examples
+    --------
+    >>> header = RecordHeader(["CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "ms01e"])
+    >>> header.sample_index
+    {'ms01e': 0}
+    """
+
+    __slots__ = ("record_keys", "sample_names", "sample_index", "format_schemas")
+
+    record_keys: List[str]
+    sample_names: Optional[List[str]]
+    sample_index: Dict[str, int]
+    format_schemas: FormatSchemaCache
+
+    def __init__(self, record_keys: List[str], format_schemas: Optional[FormatSchemaCache] = None) -> None:
+        """
+        Parameters
+        ----------
+        record_keys: list
+            record keys generated from the #CHROM line
+        format_schemas: FormatSchemaCache
+            cache of the FORMAT strings to share, e.g. the one of the parser (default = a new cache)
+        """
+        self.record_keys = record_keys
+        self.sample_names = record_keys[9:] if len(record_keys) > 9 else None
+        self.sample_index = {name: index for index, name in enumerate(self.sample_names or [])}
+        self.format_schemas = FormatSchemaCache() if format_schemas is None else format_schemas
+
+    @classmethod
+    def of(cls, record_keys: Union[List[str], 'RecordHeader']) -> 'RecordHeader':
+        """Return the header of a list of record keys, reusing the last one built for that list."""
+        global _last_header
+        if isinstance(record_keys, RecordHeader):
+            return record_keys
+        header = _last_header
+        if header is None or header.record_keys is not record_keys:
+            header = _last_header = cls(record_keys)
+        return header
+
+    def __repr__(self) -> str:
+        return f"RecordHeader({len(self.sample_index)} samples)"
+
+    def __getstate__(self) -> List[str]:
+        # the receiving process builds its own sample index and FORMAT cache
+        return self.record_keys
+
+    def __setstate__(self, record_keys: List[str]) -> None:
+        self.__init__(record_keys)  # type: ignore[misc]
+
+
+# the header built last by RecordHeader.of; it keeps its key list alive, so the identity check is safe
+_last_header: Optional[RecordHeader] = None
+
+
 class Record:
     """
     A class that converts the record lines from input VCF into accessible record object.
+
+    Records are slotted and keep the per-file state (record keys, sample names) in a shared
+    RecordHeader, so a buffered record costs little more than its split line.
     """
-    
+
+    __slots__ = (
+        "record_values", "header", "CHROM", "POS", "ID", "REF", "QUAL", "info_str",
+        "_alt", "_filter", "_schema", "_sample_vals",
+        "_rec_line", "_ref_alt", "_mapped_format_to_sample", "_genotype_property",
+    )
+
     # Instance attributes
-    rec_line: str
     record_values: List[str]
-    record_keys: List[str]
+    header: RecordHeader
     CHROM: Optional[str]
     POS: Optional[str]
     ID: Optional[str]
     REF: Optional[str]
-    ALT: List[str]
-    ref_alt: List[str]
     QUAL: Optional[str]
-    FILTER: List[str]
     info_str: Optional[str]
-    format_: Optional[List[str]]
-    sample_names: Optional[List[str]]
-    sample_vals: Optional[List[str]]
-    mapped_format_to_sample: Dict[str, Dict[str, str]]
-    genotype_property: 'GenotypeProperty'
 
-    def __init__(self, record_values: List[str], record_keys: List[str]) -> None:
+    # Lazily computed attributes (see the properties below)
+    _alt: Optional[List[str]]
+    _filter: Optional[List[str]]
+    _schema: Optional[FormatSchema]
+    _sample_vals: Optional[List[str]]
+    _rec_line: Optional[str]
+    _ref_alt: Optional[List[str]]
+    _mapped_format_to_sample: Optional[Dict[str, Dict[str, str]]]
+    _genotype_property: Optional['GenotypeProperty']
+
+    def __init__(self, record_values: List[str], record_keys: Union[List[str], RecordHeader]) -> None:
         """
         Initializes the class with header keys and record values.
 
         Parameters
         ----------
-        record_keys: list
+        record_keys: list or RecordHeader
             - list of record keys generated for the record values
             - generated from string in the VCF that starts with #CHROM
             - stays the same for a particular VCF file
@@ -47,10 +234,25 @@ class Record:
             - list of record values generated from the VCF record line 
             - genrated from the lines below # CHROM in VCF file
             - values are dynamically updated in each for-loop        
+
+        Notes
+        -----
+        ``ALT``, ``FILTER``, ``format_``, ``sample_vals``, ``rec_line``, ``ref_alt``,
+        ``mapped_format_to_sample`` and ``genotype_property`` are computed on first access and
+        cached, so site-only scans (CHROM, POS, INFO, ...) never pay for splitting and mapping
+        the sample columns.
         """
-        self.rec_line = "\t".join(record_values)
+        self._alt = None
+        self._filter = None
+        self._schema = None
+        self._sample_vals = None
+        self._rec_line = None
+        self._ref_alt = None
+        self._mapped_format_to_sample = None
+        self._genotype_property = None
+
         self.record_values = record_values
-        self.record_keys = record_keys
+        self.header = RecordHeader.of(record_keys)
         
         # Mandatory VCF fields (should always be present)
         self.CHROM = self._get_field_safe(0, "CHROM", required=True)
@@ -58,36 +260,137 @@ class Record:
         self.ID = self._get_field_safe(2, "ID", required=True, default=".")
         self.REF = self._get_field_safe(3, "REF", required=True)
         
-        # ALT field (index 4) - can be missing in some minimal VCF files
-        alt_raw = self._get_field_safe(4, "ALT", default=".")
-        self.ALT = alt_raw.split(",") if alt_raw else ["."]
-        ref_list = self.REF.split(",") if self.REF else []
-        self.ref_alt = ref_list + self.ALT
-        
         # Optional VCF fields (can be missing in minimal VCF files)
         self.QUAL = self._get_field_safe(5, "QUAL", default=".")
-        
-        filter_raw = self._get_field_safe(6, "FILTER", default=".")
-        self.FILTER = filter_raw.split(",") if filter_raw else ["."]
-        
         self.info_str = self._get_field_safe(7, "INFO", default=".")
-        
-        format_raw = self._get_field_safe(8, "FORMAT", default=None)
-        self.format_ = format_raw.split(":") if format_raw else None
-        
-        # Sample names and values
-        self.sample_names = self.record_keys[9:] if len(self.record_keys) > 9 else None
-        self.sample_vals = self.record_values[9:] if len(self.record_values) > 9 else None
-        
-        # Only map format to samples if both format and samples exist
-        if self.format_ is not None and self.sample_names is not None and self.sample_vals is not None:
-            self.mapped_format_to_sample = self._map_format_tags_to_sample_values()
-        else:
-            self.mapped_format_to_sample = {}
-        
-        # instance attributes to get genotype and allele level information
-        self.genotype_property = GenotypeProperty(self)
-        # self.allele_property = AlleleProperty(self)
+
+    @property
+    def record_keys(self) -> List[str]:
+        """Record keys from the #CHROM line, shared by all records of the file."""
+        return self.header.record_keys
+
+    @record_keys.setter
+    def record_keys(self, value: List[str]) -> None:
+        self.header = RecordHeader.of(value)
+
+    @property
+    def sample_names(self) -> Optional[List[str]]:
+        """Sample names from the #CHROM line, shared by all records of the file (do not modify)."""
+        return self.header.sample_names
+
+    @property
+    def ALT(self) -> List[str]:
+        """ALT alleles; can be missing in some minimal VCF files."""
+        if self._alt is None:
+            alt_raw = self._get_field_safe(4, "ALT", default=".")
+            self._alt = alt_raw.split(",") if alt_raw else ["."]
+        return self._alt
+
+    @ALT.setter
+    def ALT(self, value: List[str]) -> None:
+        self._alt = value
+
+    @property
+    def FILTER(self) -> List[str]:
+        """FILTER values, ['PASS'] for passing records."""
+        if self._filter is None:
+            filter_raw = self._get_field_safe(6, "FILTER", default=".")
+            self._filter = filter_raw.split(",") if filter_raw else ["."]
+        return self._filter
+
+    @FILTER.setter
+    def FILTER(self, value: List[str]) -> None:
+        self._filter = value
+
+    @property
+    def format_schema(self) -> Optional[FormatSchema]:
+        """The FormatSchema of the FORMAT column from the file's cache, None for site-only records."""
+        if self._schema is None and len(self.record_values) > 8:
+            self._schema = self.header.format_schemas.get(self.record_values[8])
+        return self._schema
+
+    @property
+    def format_(self) -> Optional[List[str]]:
+        """FORMAT tags, None for site-only records (shared by the records of a schema, do not modify)."""
+        schema = self.format_schema
+        return schema.tag_list if schema is not None and schema.tags else None
+
+    @format_.setter
+    def format_(self, value: Optional[List[str]]) -> None:
+        self._schema = self.header.format_schemas.get(":".join(value or []))
+
+    @property
+    def sample_vals(self) -> Optional[List[str]]:
+        """The unsplit sample columns, None for site-only records."""
+        if self._sample_vals is None and len(self.record_values) > 9:
+            self._sample_vals = self.record_values[9:]
+        return self._sample_vals
+
+    @sample_vals.setter
+    def sample_vals(self, value: Optional[List[str]]) -> None:
+        self._sample_vals = value
+
+    def get_sample_value(self, sample_name: str) -> str:
+        """Return the unsplit column of one sample, looked up through the shared sample index.
+
+        Raises
+        ------
+        KeyError
+            If the sample is not in the VCF header.
+        """
+        return self.record_values[9 + self.header.sample_index[sample_name]]
+
+    @property
+    def rec_line(self) -> str:
+        """The record line as a tab separated string (without the trailing newline)."""
+        if self._rec_line is None:
+            self._rec_line = "\t".join(self.record_values)
+        return self._rec_line
+
+    @rec_line.setter
+    def rec_line(self, value: str) -> None:
+        self._rec_line = value
+
+    @property
+    def ref_alt(self) -> List[str]:
+        """REF allele(s) followed by the ALT alleles, indexed by the numeric genotype."""
+        if self._ref_alt is None:
+            ref_list = self.REF.split(",") if self.REF else []
+            self._ref_alt = ref_list + self.ALT
+        return self._ref_alt
+
+    @ref_alt.setter
+    def ref_alt(self, value: List[str]) -> None:
+        self._ref_alt = value
+
+    @property
+    def mapped_format_to_sample(self) -> Dict[str, Dict[str, str]]:
+        """FORMAT tags mapped to the values of each sample, e.g. {'ms01e': {'GT': '0/1', ...}}."""
+        if self._mapped_format_to_sample is None:
+            # Only map format to samples if both format and samples exist
+            if self.format_ is not None and self.sample_names is not None and self.sample_vals is not None:
+                self._mapped_format_to_sample = self._map_format_tags_to_sample_values()
+            else:
+                self._mapped_format_to_sample = {}
+        return self._mapped_format_to_sample
+
+    @mapped_format_to_sample.setter
+    def mapped_format_to_sample(self, value: Dict[str, Dict[str, str]]) -> None:
+        self._mapped_format_to_sample = value
+        if self._genotype_property is not None:
+            # the cached genotype groups were classified from the old mapping
+            self._genotype_property._partitions.clear()
+
+    @property
+    def genotype_property(self) -> 'GenotypeProperty':
+        """GenotypeProperty object to get genotype and allele level information."""
+        if self._genotype_property is None:
+            self._genotype_property = GenotypeProperty(self)
+        return self._genotype_property
+
+    @genotype_property.setter
+    def genotype_property(self, value: 'GenotypeProperty') -> None:
+        self._genotype_property = value
     
     def _get_field_safe(self, index: int, field_name: str, required: bool = False, default: Optional[str] = None) -> Optional[str]:
         """
@@ -128,11 +431,11 @@ class Record:
     def _map_format_tags_to_sample_values(self) -> Dict[str, Dict[str, str]]:
         """Private method to map format tags to sample values"""
         mapped_data: Dict[str, Dict[str, str]] = {}
-        if self.sample_names is not None and self.format_ is not None and self.sample_vals is not None:
+        schema = self.format_schema
+        if self.sample_names is not None and schema is not None and schema.tags and self.sample_vals is not None:
+            map_values = schema.map_values
             for i, name in enumerate(self.sample_names):
-                mapped_data[name] = dict(
-                    zip_longest(self.format_, self.sample_vals[i].split(":"), fillvalue=".")
-                )
+                mapped_data[name] = map_values(self.sample_vals[i])
         return mapped_data
 
     # TODO (Bhuwan) Done - if required this should be a lazy method too. 
@@ -174,12 +477,25 @@ class Record:
         sample_names = sample_names if sample_names else (self.sample_names or [])
         required_format = formats if formats else (self.format_ or [])
 
-        filtered_sample_format = {
-            sample: dict(
-                (fmt, self.mapped_format_to_sample[sample][fmt]) for fmt in required_format
-            )
-            for sample in sample_names
-        }
+        schema = self.format_schema if self._mapped_format_to_sample is None else None
+        if schema is not None and self.sample_vals is not None:
+            # pick the tags by position instead of mapping every tag of every sample first
+            tag_positions = [(fmt, schema.tag_index[fmt]) for fmt in required_format] if sample_names else []
+            sample_index = self.header.sample_index
+            filtered_sample_format = {}
+            for sample in sample_names:
+                values = self.sample_vals[sample_index[sample]].split(":")
+                n_values = len(values)
+                filtered_sample_format[sample] = {
+                    fmt: values[position] if position < n_values else "." for fmt, position in tag_positions
+                }
+        else:
+            filtered_sample_format = {
+                sample: dict(
+                    (fmt, self.mapped_format_to_sample[sample][fmt]) for fmt in required_format
+                )
+                for sample in sample_names
+            }
 
         if convert_to_iupac is None:
             return filtered_sample_format
@@ -422,6 +738,406 @@ class Record:
         # TODO
         pass
 
+class FieldNotProjectedError(AttributeError):
+    """Raised when a record field is accessed that was left out of the parse-time projection."""
+
+
+class Projection:
+    """
+    The columns, INFO keys and samples that records are parsed for.
+
+    Record lines are only split up to the last projected column; everything after it, typically
+    the sample data, stays one unsplit string. When samples are projected, their column indices
+    are resolved once from the #CHROM keys and only those sample columns are kept. Records built
+    with a projection are ProjectedRecord objects.
+
+    Examples
+    --------
+    >>> projection = Projection(columns=["CHROM", "POS", "REF", "ALT"], info_keys=["DP"])
+    >>> projection.maxsplit
+    5
+    >>> projection = Projection(samples=["child", "mother", "father"], record_keys=record_keys)
+    >>> projection.record_keys[9:]
+    ['child', 'mother', 'father']
+    """
+
+    FIXED_COLUMNS = ("CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT")
+
+    def __init__(
+        self,
+        columns: Optional[Iterable[str]] = None,
+        info_keys: Optional[Iterable[str]] = None,
+        samples: Optional[Iterable[str]] = None,
+        record_keys: Optional[List[str]] = None,
+        format_schemas: Optional[FormatSchemaCache] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        columns: list
+            fixed VCF columns to keep, e.g. ['CHROM', 'POS', 'REF', 'ALT'] (default = all fixed columns)
+        info_keys: list
+            INFO keys to keep (default = all keys); INFO is projected whenever keys are given
+        samples: list
+            sample names to keep, in this order (default = no sample data); FORMAT is projected
+            whenever samples are given
+        record_keys: list
+            record keys from the #CHROM line, required to resolve the sample columns
+        format_schemas: FormatSchemaCache
+            FORMAT cache of the parser, shared by the records with projected samples
+
+        Raises
+        ------
+        ValueError
+            If a column is not one of the fixed VCF columns, samples are given without record keys,
+            or a sample is not in the record keys.
+        """
+        column_list = list(self.FIXED_COLUMNS if columns is None else columns)
+        if info_keys is not None and "INFO" not in column_list:
+            column_list.append("INFO")
+        if samples is not None and "FORMAT" not in column_list:
+            column_list.append("FORMAT")
+        unknown = [column for column in column_list if column not in self.FIXED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot project columns {unknown}, expected a subset of {list(self.FIXED_COLUMNS)}")
+
+        self.columns = frozenset(column_list)
+        self.info_keys = frozenset(info_keys) if info_keys is not None else None
+        # CHROM and POS are always split so the chrom/pos_range filters keep working
+        last_index = max([self.FIXED_COLUMNS.index(column) for column in self.columns] + [1])
+
+        self.samples: Optional[List[str]] = None
+        self.sample_indices: Optional[List[int]] = None
+        self.record_keys = record_keys
+        self.header: Optional[RecordHeader] = None
+        if samples is not None:
+            if record_keys is None:
+                raise ValueError("Projecting samples needs the record keys of the #CHROM line")
+            self.samples = list(samples)
+            sample_columns = {key: index for index, key in enumerate(record_keys) if index >= 9}
+            unknown = [sample for sample in self.samples if sample not in sample_columns]
+            if unknown:
+                raise ValueError(f"Samples {unknown} are not in the VCF header")
+            self.sample_indices = [sample_columns[sample] for sample in self.samples]
+            self.record_keys = record_keys[:9] + self.samples
+            self.header = RecordHeader(self.record_keys, format_schemas)
+            last_index = max([last_index, 8] + self.sample_indices)
+        self.maxsplit = last_index + 1
+
+    def __repr__(self) -> str:
+        columns = [column for column in self.FIXED_COLUMNS if column in self.columns]
+        info_keys = sorted(self.info_keys) if self.info_keys is not None else None
+        return f"Projection(columns={columns}, info_keys={info_keys}, samples={self.samples})"
+
+
+class ProjectedRecord(Record):
+    """
+    A Record parsed for a subset of the columns.
+
+    Only the projected fields are set. Accessing any other field, the sample data or an INFO key
+    outside the projection raises FieldNotProjectedError. ``rec_line`` still returns the whole
+    line, because the unsplit tail is kept as the last record value. With projected samples the
+    record holds the fixed columns and the selected sample columns only, and ``sample_names``,
+    ``record_keys`` and ``rec_line`` all reflect that subset.
+    """
+
+    # record attribute -> VCF column(s) it comes from; a lazy property that fails on a missing
+    # field ends up in __getattr__ under its own name, so the derived attributes are listed too
+    _FIELD_COLUMNS = {
+        "CHROM": "CHROM", "POS": "POS", "ID": "ID", "REF": "REF", "ALT": "ALT", "QUAL": "QUAL",
+        "FILTER": "FILTER", "info_str": "INFO", "format_": "FORMAT", "format_schema": "FORMAT",
+        "sample_names": "samples", "sample_vals": "samples", "ref_alt": "REF, ALT",
+        "mapped_format_to_sample": "FORMAT, samples", "genotype_property": "FORMAT, samples",
+    }
+
+    __slots__ = ("projection",)
+
+    projection: Projection
+
+    def __init__(self, record_values: List[str], record_keys: Union[List[str], RecordHeader], projection: Projection) -> None:
+        """
+        Parameters
+        ----------
+        record_values: list
+            record values up to the last projected column, followed by the unsplit rest of the line
+        record_keys: list or RecordHeader
+            record keys generated from the #CHROM line
+        projection: Projection
+            the columns, INFO keys and samples this record was parsed for
+        """
+        self._alt = None
+        self._filter = None
+        self._schema = None
+        self._sample_vals = None
+        self._rec_line = None
+        self._ref_alt = None
+        self._mapped_format_to_sample = None
+        self._genotype_property = None
+
+        if projection.sample_indices is not None and projection.header is not None:
+            # keep the fixed columns and pick the projected samples; a short line gets missing values
+            n_values = len(record_values)
+            record_values = record_values[:9] + [
+                record_values[index] if index < n_values else "." for index in projection.sample_indices
+            ]
+            record_keys = projection.header
+
+        self.record_values = record_values
+        self.header = RecordHeader.of(record_keys)
+        self.projection = projection
+
+        columns = projection.columns
+        if "CHROM" in columns:
+            self.CHROM = self._get_field_safe(0, "CHROM", required=True)
+        if "POS" in columns:
+            self.POS = self._get_field_safe(1, "POS", required=True)
+        if "ID" in columns:
+            self.ID = self._get_field_safe(2, "ID", required=True, default=".")
+        if "REF" in columns:
+            self.REF = self._get_field_safe(3, "REF", required=True)
+        if "QUAL" in columns:
+            self.QUAL = self._get_field_safe(5, "QUAL", default=".")
+        if "INFO" in columns:
+            self.info_str = self._get_field_safe(7, "INFO", default=".")
+
+    def _require(self, column: str) -> None:
+        # the AttributeError makes Python fall back to __getattr__, which names the property
+        if column not in self.projection.columns:
+            raise AttributeError(column)
+
+    def _require_samples(self) -> None:
+        if self.projection.sample_indices is None:
+            raise AttributeError("samples")
+
+    @property
+    def ALT(self) -> List[str]:
+        self._require("ALT")
+        return Record.ALT.fget(self)  # type: ignore[attr-defined]
+
+    @ALT.setter
+    def ALT(self, value: List[str]) -> None:
+        self._alt = value
+
+    @property
+    def FILTER(self) -> List[str]:
+        self._require("FILTER")
+        return Record.FILTER.fget(self)  # type: ignore[attr-defined]
+
+    @FILTER.setter
+    def FILTER(self, value: List[str]) -> None:
+        self._filter = value
+
+    @property
+    def format_schema(self) -> Optional[FormatSchema]:
+        self._require("FORMAT")
+        return Record.format_schema.fget(self)  # type: ignore[attr-defined]
+
+    @property
+    def format_(self) -> Optional[List[str]]:
+        self._require("FORMAT")
+        return Record.format_.fget(self)  # type: ignore[attr-defined]
+
+    @format_.setter
+    def format_(self, value: Optional[List[str]]) -> None:
+        Record.format_.fset(self, value)  # type: ignore[attr-defined]
+
+    @property
+    def sample_names(self) -> Optional[List[str]]:
+        self._require_samples()
+        return self.header.sample_names
+
+    @property
+    def sample_vals(self) -> Optional[List[str]]:
+        self._require_samples()
+        return Record.sample_vals.fget(self)  # type: ignore[attr-defined]
+
+    @sample_vals.setter
+    def sample_vals(self, value: Optional[List[str]]) -> None:
+        self._sample_vals = value
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that were not set, i.e. fields outside the projection
+        column = self._FIELD_COLUMNS.get(name)
+        if column is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        projection = getattr(self, "projection", None)
+        raise FieldNotProjectedError(
+            f"Record field '{name}' ({column}) was not parsed: it is not part of {projection!r}. "
+            f"Add it to the columns passed to parse_records() or parse without a projection."
+        )
+
+    def get_info_as_dict(self, info_keys: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Convert Info to dict for required keys, limited to the projected INFO keys.
+
+        Parameters
+        ----------
+        info_keys: list
+            Keys of interest (default = all projected keys)
+
+        Returns
+        -------
+        dict
+            key: value pair of only required keys
+
+        Raises
+        ------
+        FieldNotProjectedError
+            If INFO, or one of the requested keys, is not part of the projection.
+        """
+        allowed_keys = self.projection.info_keys
+        if allowed_keys is None:
+            return super().get_info_as_dict(info_keys)
+        if info_keys is None:
+            wanted_keys = allowed_keys
+        else:
+            wanted_keys = frozenset(info_keys)
+            if not wanted_keys <= allowed_keys:
+                raise FieldNotProjectedError(
+                    f"INFO keys {sorted(wanted_keys - allowed_keys)} are not part of {self.projection!r}"
+                )
+
+        # only the wanted entries are kept, the others are never split into key and value
+        mapped_info = {}
+        for entry in self.info_str.split(";") if self.info_str else []:
+            key, sep, value = entry.partition("=")
+            if key in wanted_keys:
+                mapped_info[key] = value if sep else "."
+        return mapped_info
+
+
+class RawRecord:
+    """
+    A record line kept as the original bytes, for pass-through and counting workloads.
+
+    Nothing is decoded or split up front; CHROM and POS are sliced out of the line on access.
+    VCFWriter.add_record writes the bytes back as they are, so a filter-and-copy pipeline never
+    touches the sample columns. Use ``to_record()`` when the full Record is needed after all.
+
+    Examples
+    --------
+    >>> for raw_record in vcf.parse_records(chrom="chr1", raw=True):
+    ...     print(raw_record.CHROM, raw_record.POS)
+    ...     writer.add_record(raw_record)
+    """
+
+    __slots__ = ("line", "record_keys")
+
+    line: bytes
+    record_keys: List[str]
+
+    def __init__(self, line: bytes, record_keys: List[str]) -> None:
+        """
+        Parameters
+        ----------
+        line: bytes
+            the record line without its line ending
+        record_keys: list
+            record keys from the #CHROM line, shared by all records of a file
+        """
+        self.line = line
+        self.record_keys = record_keys
+
+    @property
+    def CHROM(self) -> str:
+        """The CHROM column."""
+        return self.line[:self.line.find(b"\t")].decode()
+
+    @property
+    def POS(self) -> str:
+        """The POS column."""
+        pos_start = self.line.find(b"\t") + 1
+        pos_end = self.line.find(b"\t", pos_start)
+        return self.line[pos_start:pos_end if pos_end >= 0 else len(self.line)].decode()
+
+    @property
+    def rec_line(self) -> str:
+        """The record line decoded as a string."""
+        return self.line.decode()
+
+    def __str__(self) -> str:
+        return self.rec_line
+
+    def __repr__(self) -> str:
+        return f"RawRecord({self.line[:60]!r}{'...' if len(self.line) > 60 else ''})"
+
+    def __getstate__(self) -> Tuple[bytes, List[str]]:
+        return self.line, self.record_keys
+
+    def __setstate__(self, state: Tuple[bytes, List[str]]) -> None:
+        self.line, self.record_keys = state
+
+    def to_record(self) -> Record:
+        """Decode and split the line into a full Record."""
+        return Record(self.line.decode().split("\t"), self.record_keys)
+
+
+class RecordBatch:
+    """
+    A block of record rows that share one list of header keys.
+
+    Rows are kept as the split field lists of the record lines, so a batch can be handed to
+    worker processes, bulk writers or database loaders without building a Record per line.
+    Record objects are only created when the batch is iterated or indexed.
+
+    Examples
+    --------
+    >>> for batch in vcf.parse_batches(batch_size=10000):
+    ...     positions = batch.column("POS")
+    ...     first = batch[0]
+    """
+
+    rows: List[List[str]]
+    record_keys: List[str]
+
+    def __init__(self, rows: List[List[str]], record_keys: List[str]) -> None:
+        """
+        Parameters
+        ----------
+        rows: list
+            record values of each record line, split on tabs
+        record_keys: list
+            record keys from the #CHROM line, shared by all rows
+        """
+        self.rows = rows
+        self.record_keys = record_keys
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Record]:
+        record_keys = self.record_keys
+        for row in self.rows:
+            yield Record(row, record_keys)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Record, 'RecordBatch']:
+        if isinstance(index, slice):
+            return RecordBatch(self.rows[index], self.record_keys)
+        return Record(self.rows[index], self.record_keys)
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({len(self.rows)} records)"
+
+    def column(self, key: str) -> List[str]:
+        """Return the raw values of one column (e.g. 'POS' or a sample name) for all rows.
+
+        Raises
+        ------
+        KeyError
+            If the column is not one of the record keys.
+        """
+        try:
+            index = self.record_keys.index(key)
+        except ValueError:
+            raise KeyError(f"Unknown column '{key}', expected one of {self.record_keys}") from None
+        # short rows (minimal VCFs without trailing columns) get the missing value
+        return [row[index] if index < len(row) else "." for row in self.rows]
+
+    def to_records(self) -> List[Record]:
+        """Return the rows as a list of Record objects."""
+        return list(self)
+
+
 class GenotypeProperty:
     '''
     Class for parsing the property of the genotype.
@@ -431,8 +1147,12 @@ class GenotypeProperty:
 
     '''
     
+    __slots__ = ("record_obj", "_partitions")
+
     # Instance attributes
     record_obj: 'Record'
+    # tag -> samples classified by genotype, built on the first query of the tag
+    _partitions: Dict[str, 'Alleles']
     ########################################################################
     #### parsing of genotype property begins ####
     # allele_obj = self.Alleles(self.mapped_format_to_sample, tag)
@@ -446,7 +1166,52 @@ class GenotypeProperty:
 
     def __init__(self, record_obj: 'Record') -> None:
         self.record_obj = record_obj
-        # pass
+        self._partitions = {}
+
+    def _partition(self, tag: str) -> 'Alleles':
+        """Classify all samples for a tag once; later queries of the tag are answered from the cache."""
+        partition = self._partitions.get(tag)
+        if partition is None:
+            partition = self._partitions[tag] = Alleles(self.record_obj.mapped_format_to_sample, tag)
+        return partition
+
+    def genotype_groups(self, tag: str = "GT") -> Dict[str, List[str]]:
+        """
+        Return the samples of every genotype group at once.
+
+        Parameters
+        ----------
+        tag: str
+            format tags of interest (default = 'GT')
+
+        Returns
+        -------
+        dict
+            sample names (in header order) of the groups 'hom_ref', 'hom_var', 'het_var',
+            'missing', 'phased' and 'unphased'
+
+        Examples
+        --------
+        >>> record.genotype_property.genotype_groups()
+        {'hom_ref': ['MA611', 'MA605', 'MA622'], 'hom_var': ['ms04h'], 'het_var': [], 'missing': ['ms01e', 'ms02g', 'ms03g'], 'phased': [], 'unphased': ['ms01e', 'ms02g', 'ms03g', 'ms04h', 'MA611', 'MA605', 'MA622']}
+        """
+        partition = self._partition(tag)
+        return {
+            "hom_ref": list(partition.hom_ref_samples),
+            "hom_var": list(partition.hom_var_samples),
+            "het_var": list(partition.het_var_samples),
+            "missing": list(partition.missing_samples),
+            "phased": list(partition.phased_samples),
+            "unphased": list(partition.unphased_samples),
+        }
+
+    def _genotypes(self, samples: List[str], tag: str, bases: str) -> Dict[str, str]:
+        """Map the samples of a group to their genotypes, in numeric or iupac bases."""
+        mapped_samples = self.record_obj.mapped_format_to_sample
+        if bases == "numeric":
+            return {sample: mapped_samples[sample][tag] for sample in samples}
+        ref_alt = self.record_obj.ref_alt
+        return {sample: self.record_obj._to_iupac(ref_alt, mapped_samples[sample][tag], bases) for sample in samples}
 
     # TODO (Bishwa) all this genotype parsing should be kept as a separate class ?
     # @property
@@ -482,14 +1247,7 @@ class GenotypeProperty:
         #     if set(tag_val) == {"0"}:
         #         homref_samples.append(self.sample_names[i])
         # allele_obj = Alleles(self.mapped_format_to_sample,tag)
-        allele_obj = Alleles(self.record_obj.mapped_format_to_sample,tag)
-
-        # allele_obj = 
-        homref_samples = allele_obj.hom_ref_samples
-        return {
-            sample: self.record_obj._to_iupac(self.record_obj.ref_alt, self.record_obj.mapped_format_to_sample[sample][tag], bases)
-            for sample in homref_samples
-        }
+        return self._genotypes(self._partition(tag).hom_ref_samples, tag, bases)
 
 
     def isHOMVAR(self, tag: str = "GT", bases: str = "numeric") -> Dict[str, str]:
@@ -524,13 +1282,7 @@ class GenotypeProperty:
         #         and set(tag_val) != {"."}
         #     ):
         #         homvar_samples.append(self.sample_names[i])
-        allele_obj = Alleles(self.record_obj.mapped_format_to_sample,tag)
-        homvar_samples = allele_obj.hom_var_samples
-
-        return {
-            sample: self.record_obj._to_iupac(self.record_obj.ref_alt, self.record_obj.mapped_format_to_sample[sample][tag], bases)
-            for sample in homvar_samples
-        }
+        return self._genotypes(self._partition(tag).hom_var_samples, tag, bases)
 
     def isHETVAR(self, tag: str = "GT", bases: str = "numeric") -> Dict[str, str]:
         """
@@ -562,15 +1314,7 @@ class GenotypeProperty:
         # for i, tag_val in enumerate(tag_vals):
         #     if len(set(tag_val)) > 1:
         #         hetvar_samples.append(self.sample_names[i])
-        allele_obj = Alleles(self.record_obj.mapped_format_to_sample,tag)
-        hetvar_samples = allele_obj.het_var_samples
-
-        #TODO: only do this dict comprehension if bases = 'iupac'
-        # apply this method on other similar functions
-        return {
-            sample: self.record_obj._to_iupac(self.record_obj.ref_alt, self.record_obj.mapped_format_to_sample[sample][tag], bases)
-            for sample in hetvar_samples
-        }
+        return self._genotypes(self._partition(tag).het_var_samples, tag, bases)
 
     # TODO: illustrate that it can be use for any FORMAT tags, not just "GT"
     def isMissing(self, tag: str = "GT") -> Dict[str, str]:
@@ -600,11 +1344,7 @@ class GenotypeProperty:
         # for i, tag_val in enumerate(tag_vals):
         #     if set(tag_val) == {"."}:
         #         missing_tag_sample.append(self.sample_names[i])
-        allele_obj = Alleles(self.record_obj.mapped_format_to_sample,tag)
-        missing_tag_sample = allele_obj.missing_samples
-        return {
-            sample: self.record_obj.mapped_format_to_sample[sample][tag] for sample in missing_tag_sample
-        }
+        return self._genotypes(self._partition(tag).missing_samples, tag, "numeric")
 
     # TODO: may be 'tag' and 'bases' flag is not required
     def hasSNP(self, tag: str = "GT", bases: str = "numeric") -> bool:
@@ -736,13 +1476,7 @@ class GenotypeProperty:
 
 
         """
-        if self.record_obj.sample_names is None:
-            return {}
-        return {
-            sample: self.record_obj._to_iupac(self.record_obj.ref_alt, self.record_obj.mapped_format_to_sample[sample][tag], bases)
-            for sample in self.record_obj.sample_names
-            if "/" in self.record_obj.mapped_format_to_sample[sample][tag]
-        }
+        return self._genotypes(self._partition(tag).unphased_samples, tag, bases)
 
     def has_phased(self, tag: str = "GT", bases: str = "numeric") -> Dict[str, str]:
         """
@@ -771,13 +1505,7 @@ class GenotypeProperty:
 
         """
 
-        if self.record_obj.sample_names is None:
-            return {}
-        return {
-            sample: self.record_obj._to_iupac(self.record_obj.ref_alt, self.record_obj.mapped_format_to_sample[sample][tag], bases)
-            for sample in self.record_obj.sample_names
-            if "|" in self.record_obj.mapped_format_to_sample[sample][tag]
-        }
+        return self._genotypes(self._partition(tag).phased_samples, tag, bases)
 
 
     # TODO: Bishwa (Priority high)
@@ -798,6 +1526,7 @@ class Alleles: # TODO : Rename to something like GenotypeProperty?
     het_var_samples: List[str]
     missing_samples: List[str]
     phased_samples: List[str]
+    unphased_samples: List[str]
     
     def __init__(self, mapped_samples: Dict[str, Dict[str, str]], tag: str = 'GT') -> None:
         """
@@ -808,6 +1537,7 @@ class Alleles: # TODO : Rename to something like GenotypeProperty?
         self.het_var_samples = []
         self.missing_samples = []
         self.phased_samples = [] # TODO - this probably is a duplicate method? fix it?
+        self.unphased_samples = []
 
         # TODO: add new genotype property checks?
         # is_SNP, is_INDEL, is_SV, etc. 
@@ -819,16 +1549,19 @@ class Alleles: # TODO : Rename to something like GenotypeProperty?
         for sample in mapped_samples.keys():
             tag_val = mapped_samples.get(sample, {}).get(tag, None)
             if tag_val is not None:
-                genotype_val = GenotypeVal(tag_val)
-                if genotype_val.phased:
+                # a handful of distinct genotype strings, so nearly every sample is a cache hit
+                genotype = decode_genotype(tag_val)
+                if genotype.phased:
                     self.phased_samples.append(sample)
-                if genotype_val._ismissing:
+                if '/' in tag_val:
+                    self.unphased_samples.append(sample)
+                if genotype.missing:
                     self.missing_samples.append(sample)
-                if genotype_val.gt_type == 'hom_ref':
+                if genotype.gt_type == 'hom_ref':
                     self.hom_ref_samples.append(sample)
-                elif genotype_val.gt_type == 'hom_var':
+                elif genotype.gt_type == 'hom_var':
                     self.hom_var_samples.append(sample)
-                elif genotype_val.gt_type == 'het_var':
+                elif genotype.gt_type == 'het_var':
                     self.het_var_samples.append(sample)
                 else:
                     pass
@@ -839,6 +1572,67 @@ class Alleles: # TODO : Rename to something like GenotypeProperty?
     def homref_samples(self) -> None:
         pass
 
+
+class DecodedGenotype(NamedTuple):
+    """
+    A genotype string split into its alleles and classified, shared by every sample with
+    the same string.
+
+    Examples
+    --------
+    >>> decode_genotype("0|1")
+    DecodedGenotype(alleles=('0', '1'), phased=True, missing=False, gt_type='het_var', ploidy=2)
+    """
+
+    alleles: Tuple[Optional[str], ...]
+    phased: bool
+    missing: bool
+    gt_type: str
+    ploidy: int
+
+
+# genotype string -> DecodedGenotype; cleared when full, since other FORMAT tags can be passed too
+_decoded_genotypes: Dict[str, DecodedGenotype] = {}
+_DECODED_GENOTYPES_MAX = 65536
+
+
+def decode_genotype(genotype: str) -> DecodedGenotype:
+    """
+    Decode a genotype string like '0/1', '1|1' or './.', memoized by the string.
+
+    Parameters
+    ----------
+    genotype: str
+        the value of a genotype tag of one sample
+
+    Returns
+    -------
+    DecodedGenotype
+        the alleles ('.' as None), phasing, missingness, gt_type ('hom_ref', 'hom_var',
+        'het_var' or 'missing') and ploidy
+
+    Examples
+    --------
+    >>> decode_genotype("./.").gt_type
+    'missing'
+    """
+    decoded = _decoded_genotypes.get(genotype)
+    if decoded is None:
+        alleles = tuple((al if al != '.' else None) for al in allele_delimiter.split(genotype))
+        missing = not any(al is not None for al in alleles)
+        if missing:
+            gt_type = 'missing'
+        elif len(set(alleles)) == 1:
+            gt_type = 'hom_ref' if alleles[0] == '0' else 'hom_var'
+        else:
+            gt_type = 'het_var'
+        decoded = DecodedGenotype(alleles, '|' in genotype, missing, gt_type, len(alleles))
+        if len(_decoded_genotypes) >= _DECODED_GENOTYPES_MAX:
+            _decoded_genotypes.clear()
+        _decoded_genotypes[genotype] = decoded
+    return decoded
+
+
 ## ASK: What to do if following scenario arises?
 ## Are they homref, hetvar './.' , '.', './0', '0/.'
 
@@ -859,33 +1653,8 @@ class GenotypeVal:
         # is_SNP, is_INDEL, is_SV, etc. 
 
         # here gt_type store either homvar, hetvar, or homref
-
-        self.gt_type= None
-        self.phased= False
-        self._alleles = [(al if al != '.' else None) for al in allele_delimiter.split(allele)]
-        self._ismissing = not any(al is not None for al in self._alleles)
-        if '|' in allele:
-            self.phased = True
-
-        # hetvar 
-        alleles_list = self._alleles
-        if not self._ismissing:
-            if len(set(alleles_list)) == 1:
-                if alleles_list[0] == '0':
-                    self.gt_type = 'hom_ref'
-                else:
-                    self.gt_type = 'hom_var'
-            else:
-                self.gt_type = 'het_var'
-        else:
-            self.gt_type = 'missing'
-
-
-
-
-
-
-
-
-
-
+        decoded = decode_genotype(allele)
+        self.gt_type = decoded.gt_type
+        self.phased = decoded.phased
+        self._alleles = list(decoded.alleles)
+        self._ismissing = decoded.missing
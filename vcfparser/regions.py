@@ -0,0 +1,140 @@
+"""
+Regions Module
+
+This module holds sets of genomic intervals for multi-region queries. Intervals are grouped by
+chromosome, sorted and merged once, so testing a record position is a single bisect, and a
+record that falls into several of the given intervals is still only matched once.
+
+Classes
+-------
+RegionSet : Sorted, merged intervals per chromosome, loaded from tuples or a BED file
+
+Examples
+--------
+>>> from vcfparser.regions import RegionSet
+>>> regions = RegionSet([("chr1", 100, 200), ("chr1", 150, 300), ("chr2", 5, 10)])
+>>> regions.intervals("chr1")
+[(100, 300)]
+>>> regions.contains("chr1", 250)
+True
+>>> exome = RegionSet.from_bed("targets.bed")
+"""
+
+import gzip
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from vcfparser.filters import LineFilter
+
+__all__ = ['RegionSet']
+
+
+class RegionSet(LineFilter):
+    """
+    Genomic intervals, merged and sorted per chromosome.
+
+    Coordinates are 1-based and both ends are inclusive, like the ``pos_range`` argument of
+    ``VcfParser.parse_records``. Overlapping and adjacent intervals are merged. As a LineFilter,
+    the set keeps the record lines whose CHROM and POS fall into one of the intervals.
+
+    Parameters
+    ----------
+    regions: Iterable[Tuple[str, int, int]]
+        (chrom, start, end) intervals in any order.
+
+    Raises
+    ------
+    ValueError
+        If an interval ends before it starts.
+
+    Examples
+    --------
+    >>> regions = RegionSet([("chr1", 1000, 2000), ("chr2", 1, 500)])
+    >>> records = VcfParser("sample.vcf.gz").parse_records(regions=regions)
+    """
+
+    maxsplit = 2
+
+    def __init__(self, regions: Iterable[Tuple[str, int, int]]) -> None:
+        grouped: Dict[str, List[Tuple[int, int]]] = {}
+        for chrom, start, end in regions:
+            start, end = int(start), int(end)
+            if end < start:
+                raise ValueError(f"Region {chrom}:{start}-{end} ends before it starts")
+            grouped.setdefault(str(chrom), []).append((start, end))
+
+        # chrom -> (starts, ends) of the merged intervals, ready for bisect
+        self._intervals: Dict[str, Tuple[List[int], List[int]]] = {}
+        for chrom, intervals in grouped.items():
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in sorted(intervals):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._intervals[chrom] = (starts, ends)
+
+    @classmethod
+    def from_bed(cls, bed_path: Union[str, Path]) -> 'RegionSet':
+        """Read the intervals of a BED file (optionally gzipped).
+
+        BED intervals are 0-based and half-open; they are converted to 1-based inclusive ones.
+        Header, ``track``, ``browser`` and comment lines are skipped.
+
+        Raises
+        ------
+        ValueError
+            If a line does not have chrom, start and end columns.
+        """
+        opener = gzip.open if str(bed_path).endswith(".gz") else open
+
+        def _intervals() -> Iterator[Tuple[str, int, int]]:
+            with opener(bed_path, "rt") as bed_file:
+                for line_no, line in enumerate(bed_file, 1):
+                    if not line.strip() or line.startswith(("#", "track", "browser")):
+                        continue
+                    columns = line.split()
+                    try:
+                        yield columns[0], int(columns[1]) + 1, int(columns[2])
+                    except (IndexError, ValueError):
+                        raise ValueError(f"Invalid BED line {line_no} in {bed_path}: {line.rstrip()}") from None
+
+        return cls(_intervals())
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _ in self._intervals.values())
+
+    def __repr__(self) -> str:
+        return f"RegionSet({len(self)} intervals on {len(self._intervals)} chromosomes)"
+
+    @property
+    def chroms(self) -> List[str]:
+        """Chromosomes that have at least one interval."""
+        return list(self._intervals)
+
+    def intervals(self, chrom: str) -> List[Tuple[int, int]]:
+        """Return the merged (start, end) intervals of a chromosome, sorted by start."""
+        starts, ends = self._intervals.get(chrom, ([], []))
+        return list(zip(starts, ends))
+
+    def contains(self, chrom: str, pos: int) -> bool:
+        """Return whether a 1-based position lies in one of the intervals."""
+        intervals = self._intervals.get(chrom)
+        if intervals is None:
+            return False
+        starts, ends = intervals
+        i = bisect_right(starts, pos) - 1
+        return i >= 0 and pos <= ends[i]
+
+    def predicate(self, fields: List[str]) -> bool:
+        """Keep a record line whose CHROM and POS fall into one of the intervals."""
+        intervals = self._intervals.get(fields[0])
+        if intervals is None:
+            return False
+        starts, ends = intervals
+        pos = int(fields[1])
+        i = bisect_right(starts, pos) - 1
+        return i >= 0 and pos <= ends[i]
@@ -0,0 +1,503 @@
+"""
+Tabix Module
+
+This module reads tabix (.tbi) and CSI (.csi) indexes of BGZF compressed VCF files and
+translates genomic regions into the BGZF virtual offset ranges that cover them.
+
+Both formats use the UCSC binning scheme: every record is stored in the smallest bin that
+fully contains it, and each bin keeps a list of chunks ``(begin, end)`` of virtual offsets.
+The tabix format adds a linear index of the lowest offset for every 16 kbp window, which
+lets queries skip chunks that end before the region starts.
+
+Classes
+-------
+TabixIndex : In-memory representation of a .tbi or .csi index, which can also be built
+    from a bgzipped VCF and written back to disk
+
+Examples
+--------
+>>> from vcfparser.tabix import TabixIndex
+>>> index = TabixIndex.from_file("sample.vcf.gz.tbi")
+>>> index.query_chunks("20", 14000, 18000)
+[(1536, 2841)]
+>>> TabixIndex.build("other.vcf.gz").write("other.vcf.gz.tbi")
+"""
+
+import gzip
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from pathlib import Path
+
+from vcfparser.bgzf import BgzfReader, BgzfWriter, is_bgzf
+
+__all__ = ['TabixIndex', 'find_index', 'merge_chunks', 'reg2bin', 'reg2bins']
+
+# the binning scheme used by .tbi files (CSI files store their own values)
+TBI_MIN_SHIFT = 14
+TBI_DEPTH = 5
+
+# tabix header stored in both formats: preset (2 = VCF), sequence/begin/end columns,
+# meta character and number of lines to skip
+_VCF_CONF = (2, 1, 2, 0, ord("#"), 0)
+
+
+def _pseudo_bin(depth: int) -> int:
+    """Bin number that holds the offset range and record counts of a contig."""
+    return ((1 << ((depth + 1) * 3)) - 1) // 7 + 1
+
+
+def reg2bin(beg: int, end: int, min_shift: int = TBI_MIN_SHIFT, depth: int = TBI_DEPTH) -> int:
+    """Return the smallest bin that fully contains the 0-based, half-open region [beg, end).
+
+    Examples
+    --------
+    >>> reg2bin(0, 1)
+    4681
+    >>> reg2bin(16000, 17000)
+    585
+    """
+    end -= 1
+    shift = min_shift
+    level_first_bin = ((1 << (depth * 3)) - 1) // 7
+    for level in range(depth, 0, -1):
+        if beg >> shift == end >> shift:
+            return level_first_bin + (beg >> shift)
+        shift += 3
+        level_first_bin -= 1 << ((level - 1) * 3)
+    return 0
+
+
+def reg2bins(beg: int, end: int, min_shift: int = TBI_MIN_SHIFT, depth: int = TBI_DEPTH) -> List[int]:
+    """List all bins that may contain records overlapping the 0-based, half-open region [beg, end).
+
+    Parameters
+    ----------
+    beg : int
+        0-based start of the region.
+    end : int
+        0-based, exclusive end of the region.
+    min_shift : int
+        Size of the smallest bin as a power of 2 (14 = 16 kbp for tabix).
+    depth : int
+        Number of levels below the root bin (5 for tabix).
+
+    Returns
+    -------
+    List[int]
+        Bin numbers, from the root bin down to the leaves.
+
+    Examples
+    --------
+    >>> reg2bins(0, 1)
+    [0, 1, 9, 73, 585, 4681]
+    """
+    end -= 1
+    bins: List[int] = []
+    level_first_bin = 0
+    shift = min_shift + depth * 3
+    for level in range(depth + 1):
+        first = level_first_bin + (beg >> shift)
+        last = level_first_bin + (end >> shift)
+        bins.extend(range(first, last + 1))
+        level_first_bin += 1 << (level * 3)
+        shift -= 3
+    return bins
+
+
+def merge_chunks(chunks: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort (begin, end) virtual offset ranges and merge the ones that overlap or touch."""
+    merged: List[Tuple[int, int]] = []
+    for chunk_beg, chunk_end in sorted(chunks):
+        if merged and chunk_beg <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], chunk_end))
+        else:
+            merged.append((chunk_beg, chunk_end))
+    return merged
+
+
+def find_index(filename: Union[str, Path]) -> Optional[str]:
+    """Return the path of the .tbi or .csi sidecar index of `filename`, if one exists."""
+    for suffix in (".tbi", ".csi"):
+        index_path = f"{filename}{suffix}"
+        if os.path.exists(index_path):
+            return index_path
+    return None
+
+
+class TabixIndex:
+    """
+    An in-memory tabix (.tbi) or CSI (.csi) index.
+
+    Attributes
+    ----------
+    names : List[str]
+        Contig names in the order they appear in the index.
+    min_shift : int
+        Size of the smallest bin as a power of 2.
+    depth : int
+        Number of bin levels below the root bin.
+    bins : List[Dict[int, List[Tuple[int, int]]]]
+        Per contig, the chunks of virtual offsets stored in each bin.
+    linear_index : List[List[int]]
+        Per contig, the lowest virtual offset of each 2**min_shift window (tabix only).
+    record_counts : Dict[str, int]
+        Number of records per contig, when the index stores it.
+    offset_ranges : Dict[str, Tuple[int, int]]
+        Per contig, the virtual offsets of its first record and of the end of its last record.
+    is_csi : bool
+        Whether the index was read from, or built for, the CSI format.
+    """
+
+    # Instance attributes
+    names: List[str]
+    min_shift: int
+    depth: int
+    bins: List[Dict[int, List[Tuple[int, int]]]]
+    linear_index: List[List[int]]
+    record_counts: Dict[str, int]
+    offset_ranges: Dict[str, Tuple[int, int]]
+    is_csi: bool
+
+    def __init__(self, names: List[str], min_shift: int = TBI_MIN_SHIFT, depth: int = TBI_DEPTH) -> None:
+        self.names = names
+        self.min_shift = min_shift
+        self.depth = depth
+        self.bins = [{} for _ in names]
+        self.linear_index = [[] for _ in names]
+        self.record_counts = {}
+        self.offset_ranges = {}
+        self.is_csi = False
+        self._contig_ids = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def from_file(cls, index_path: Union[str, Path]) -> 'TabixIndex':
+        """Load a .tbi or .csi index.
+
+        Raises
+        ------
+        ValueError
+            If the file is neither a tabix nor a CSI index.
+        """
+        with open(index_path, "rb") as handle:
+            data = gzip.decompress(handle.read())
+
+        magic = data[:4]
+        if magic == b"TBI\x01":
+            return cls._parse(data, 4, TBI_MIN_SHIFT, TBI_DEPTH, is_csi=False)
+        if magic == b"CSI\x01":
+            min_shift, depth, l_aux = struct.unpack_from("<3i", data, 4)
+            if l_aux < 28:
+                raise ValueError(f"{index_path} does not store contig names (not a VCF CSI index)")
+            return cls._parse(data, 16, min_shift, depth, is_csi=True)
+        raise ValueError(f"{index_path} is not a tabix or CSI index")
+
+    @classmethod
+    def _parse(cls, data: bytes, pos: int, min_shift: int, depth: int, is_csi: bool) -> 'TabixIndex':
+        """Parse the contig names and bins starting at `pos`.
+
+        For tabix, `data[pos:]` starts with n_ref followed by the tabix header. For CSI,
+        `data[pos:]` starts with the tabix header stored as auxiliary data, followed by n_ref.
+        """
+        if is_csi:
+            (_format, _col_seq, _col_beg, _col_end, _meta, _skip, l_nm) = struct.unpack_from("<7i", data, pos)
+            names_blob = data[pos + 28:pos + 28 + l_nm]
+            pos += 28 + l_nm
+            (n_ref,) = struct.unpack_from("<i", data, pos)
+            pos += 4
+        else:
+            (n_ref, _format, _col_seq, _col_beg, _col_end, _meta, _skip, l_nm) = struct.unpack_from("<8i", data, pos)
+            names_blob = data[pos + 32:pos + 32 + l_nm]
+            pos += 32 + l_nm
+
+        names = [name.decode() for name in names_blob.split(b"\x00")[:n_ref]]
+        index = cls(names, min_shift, depth)
+        index.is_csi = is_csi
+        pseudo_bin = _pseudo_bin(depth)
+
+        for ref_id in range(n_ref):
+            (n_bin,) = struct.unpack_from("<i", data, pos)
+            pos += 4
+            for _ in range(n_bin):
+                if is_csi:
+                    bin_no, _loffset, n_chunk = struct.unpack_from("<IQi", data, pos)
+                    pos += 16
+                else:
+                    bin_no, n_chunk = struct.unpack_from("<Ii", data, pos)
+                    pos += 8
+                chunks = [
+                    struct.unpack_from("<QQ", data, pos + i * 16) for i in range(n_chunk)
+                ]
+                pos += 16 * n_chunk
+                if bin_no == pseudo_bin:
+                    # second "chunk" holds the number of mapped and unmapped records
+                    if n_chunk >= 2:
+                        index.offset_ranges[names[ref_id]] = chunks[0]
+                        index.record_counts[names[ref_id]] = chunks[1][0]
+                    continue
+                index.bins[ref_id][bin_no] = chunks
+            if not is_csi:
+                (n_intv,) = struct.unpack_from("<i", data, pos)
+                pos += 4
+                index.linear_index[ref_id] = list(struct.unpack_from(f"<{n_intv}Q", data, pos))
+                pos += 8 * n_intv
+        return index
+
+    @property
+    def max_position(self) -> int:
+        """Largest position addressable by the binning scheme."""
+        return 1 << (self.min_shift + self.depth * 3)
+
+    def query_chunks(self, chrom: str, beg: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Return the sorted, merged virtual offset ranges covering a region.
+
+        Parameters
+        ----------
+        chrom : str
+            Contig name.
+        beg : int
+            0-based start of the region.
+        end : Optional[int]
+            0-based, exclusive end of the region (default = end of the contig).
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Non-overlapping (begin, end) virtual offset ranges. Records overlapping the
+            region lie inside these ranges, but the ranges may also contain other records.
+        """
+        ref_id = self._contig_ids.get(chrom)
+        if ref_id is None:
+            return []
+        end = self.max_position if end is None else min(end, self.max_position)
+        if beg >= end:
+            return []
+
+        # records that end before the region starts are all stored below this offset
+        linear = self.linear_index[ref_id]
+        window = beg >> self.min_shift
+        min_offset = linear[min(window, len(linear) - 1)] if linear else 0
+
+        bins = self.bins[ref_id]
+        return merge_chunks(
+            (max(chunk[0], min_offset), chunk[1])
+            for bin_no in reg2bins(beg, end, self.min_shift, self.depth)
+            for chunk in bins.get(bin_no, ())
+            if chunk[1] > min_offset
+        )
+
+    def record_offsets(self, chrom: str) -> List[int]:
+        """Return the sorted virtual offsets of the record starts the index knows for a contig.
+
+        These are the beginnings of the bin chunks and the linear index entries, so each one
+        is a place where reading can start on a line boundary.
+        """
+        ref_id = self._contig_ids.get(chrom)
+        if ref_id is None:
+            return []
+        offsets = {chunk_beg for chunks in self.bins[ref_id].values() for chunk_beg, _ in chunks}
+        offsets.update(offset for offset in self.linear_index[ref_id] if offset)
+        first, last = self.offset_ranges.get(chrom, (0, 0))
+        if first or last:
+            # the pseudo-bin bounds the contig; offsets outside it belong to empty windows
+            offsets = {offset for offset in offsets if first <= offset < last}
+            offsets.add(first)
+        return sorted(offsets)
+
+    @classmethod
+    def build(cls, vcf_path: Union[str, Path], csi: Optional[bool] = None, min_shift: int = TBI_MIN_SHIFT) -> 'TabixIndex':
+        """Index a coordinate-sorted, bgzipped VCF in a single pass.
+
+        Parameters
+        ----------
+        vcf_path : Union[str, Path]
+            Path to the bgzipped VCF file.
+        csi : Optional[bool]
+            Build a CSI index instead of a tabix one. By default a CSI index is built only
+            when a ##contig line declares a length over 512 Mbp, the limit of the tabix format.
+        min_shift : int
+            Size of the smallest CSI bin as a power of 2 (tabix always uses 14).
+
+        Returns
+        -------
+        TabixIndex
+            The index, including per-contig record counts. Use ``write()`` to save it.
+
+        Raises
+        ------
+        ValueError
+            If the file is not bgzipped, is not sorted, or has a record beyond the
+            range of a tabix index.
+        """
+        if not is_bgzf(vcf_path):
+            raise ValueError(f"{vcf_path} must be compressed with bgzip to be indexed")
+
+        index = cls([])
+        contig_lengths: List[int] = []
+        bins: Dict[int, List[List[int]]] = {}
+        linear: List[int] = []
+        ref_id = -1
+        last_beg = 0
+
+        with BgzfReader(vcf_path) as reader:
+            while True:
+                start = reader.tell()
+                line = reader.readline()
+                if not line:
+                    break
+                if line.startswith(b"#"):
+                    if line.startswith(b"##contig=") and b"length=" in line:
+                        contig_lengths.append(int(line.split(b"length=", 1)[1].split(b",")[0].rstrip(b">\r\n")))
+                    continue
+
+                if ref_id == -1:
+                    # header is done, choose the binning scheme
+                    longest = max(contig_lengths, default=0)
+                    csi = longest > 1 << (TBI_MIN_SHIFT + TBI_DEPTH * 3) if csi is None else csi
+                    index.min_shift = min_shift if csi else TBI_MIN_SHIFT
+                    index.depth = TBI_DEPTH
+                    while csi and 1 << (index.min_shift + index.depth * 3) < longest:
+                        index.depth += 1
+
+                end_offset = reader.tell()
+                fields = line.rstrip(b"\r\n").split(b"\t", 8)
+                chrom = fields[0].decode()
+                beg = int(fields[1]) - 1
+                end = beg + max(len(fields[3]), 1)
+                if len(fields) > 7:
+                    # symbolic alleles and gVCF blocks give their span in INFO/END
+                    info_end = _info_end(fields[7])
+                    if info_end is not None and info_end > beg:
+                        end = info_end
+
+                if ref_id == -1 or chrom != index.names[ref_id]:
+                    if chrom in index._contig_ids:
+                        raise ValueError(f"{vcf_path} is not sorted: contig {chrom} appears in more than one block")
+                    if ref_id >= 0:
+                        index._finish_contig(ref_id, bins, linear)
+                    ref_id = len(index.names)
+                    index.names.append(chrom)
+                    index._contig_ids[chrom] = ref_id
+                    index.bins.append({})
+                    index.linear_index.append([])
+                    index.record_counts[chrom] = 0
+                    index.offset_ranges[chrom] = (start, end_offset)
+                    bins, linear = {}, []
+                    last_beg = beg
+                elif beg < last_beg:
+                    raise ValueError(f"{vcf_path} is not sorted: {chrom}:{beg + 1} comes after {chrom}:{last_beg + 1}")
+                if end > index.max_position:
+                    raise ValueError(
+                        f"{chrom}:{beg + 1} is beyond the {index.max_position} bp limit of a tabix index, use csi=True"
+                    )
+                last_beg = beg
+
+                # consecutive records in the same bin extend the last chunk of that bin
+                chunks = bins.setdefault(reg2bin(beg, end, index.min_shift, index.depth), [])
+                if chunks and chunks[-1][1] == start:
+                    chunks[-1][1] = end_offset
+                else:
+                    chunks.append([start, end_offset])
+
+                # lowest offset of a record overlapping each window
+                last_window = (end - 1) >> index.min_shift
+                if len(linear) <= last_window:
+                    linear.extend([-1] * (last_window + 1 - len(linear)))
+                for window in range(beg >> index.min_shift, last_window + 1):
+                    if linear[window] == -1:
+                        linear[window] = start
+
+                index.record_counts[chrom] += 1
+                index.offset_ranges[chrom] = (index.offset_ranges[chrom][0], end_offset)
+
+        if ref_id >= 0:
+            index._finish_contig(ref_id, bins, linear)
+        index.is_csi = bool(csi)
+        return index
+
+    def _finish_contig(self, ref_id: int, bins: Dict[int, List[List[int]]], linear: List[int]) -> None:
+        """Store the bins and linear index of a fully read contig."""
+        self.bins[ref_id] = {bin_no: [(beg, end) for beg, end in chunks] for bin_no, chunks in bins.items()}
+        # windows without records take the offset of the window before them, as in htslib
+        previous = 0
+        for window, offset in enumerate(linear):
+            if offset == -1:
+                linear[window] = previous
+            previous = linear[window]
+        self.linear_index[ref_id] = linear
+
+    def _bin_loffset(self, ref_id: int, bin_no: int) -> int:
+        """Offset of the first record overlapping a bin, stored per bin in CSI indexes."""
+        level, level_first_bin = 0, 0
+        while bin_no >= level_first_bin + (1 << (level * 3)):
+            level_first_bin += 1 << (level * 3)
+            level += 1
+        first_window = (bin_no - level_first_bin) << ((self.depth - level) * 3)
+        linear = self.linear_index[ref_id]
+        loffset = min(chunk[0] for chunk in self.bins[ref_id][bin_no])
+        if first_window < len(linear):
+            loffset = min(loffset, linear[first_window])
+        return loffset
+
+    def write(self, index_path: Union[str, Path], csi: Optional[bool] = None) -> None:
+        """Write the index as a bgzipped .tbi or .csi file.
+
+        Parameters
+        ----------
+        index_path : Union[str, Path]
+            Output path, conventionally the VCF path followed by ".tbi" or ".csi".
+        csi : Optional[bool]
+            Write the CSI format (default = the format chosen when the index was built).
+
+        Raises
+        ------
+        ValueError
+            If a tabix file is requested for an index that does not use the tabix binning scheme.
+        """
+        csi = self.is_csi if csi is None else csi
+        if not csi and (self.min_shift, self.depth) != (TBI_MIN_SHIFT, TBI_DEPTH):
+            raise ValueError("Only indexes with min_shift=14 and depth=5 can be written as .tbi")
+
+        names = b"".join(name.encode() + b"\x00" for name in self.names)
+        tabix_header = struct.pack("<7i", *_VCF_CONF, len(names)) + names
+        parts = []
+        if csi:
+            parts.append(b"CSI\x01" + struct.pack("<3i", self.min_shift, self.depth, len(tabix_header)))
+            parts.append(tabix_header + struct.pack("<i", len(self.names)))
+        else:
+            parts.append(b"TBI\x01" + struct.pack("<i", len(self.names)) + tabix_header)
+
+        pseudo_bin = _pseudo_bin(self.depth)
+        for ref_id, name in enumerate(self.names):
+            bins = self.bins[ref_id]
+            has_pseudo_bin = name in self.record_counts
+            parts.append(struct.pack("<i", len(bins) + has_pseudo_bin))
+            for bin_no in sorted(bins):
+                chunks = bins[bin_no]
+                if csi:
+                    parts.append(struct.pack("<IQi", bin_no, self._bin_loffset(ref_id, bin_no), len(chunks)))
+                else:
+                    parts.append(struct.pack("<Ii", bin_no, len(chunks)))
+                parts.extend(struct.pack("<QQ", beg, end) for beg, end in chunks)
+            if has_pseudo_bin:
+                first, last = self.offset_ranges.get(name, (0, 0))
+                pseudo_head = (pseudo_bin, 0, 2) if csi else (pseudo_bin, 2)
+                parts.append(struct.pack("<IQi" if csi else "<Ii", *pseudo_head))
+                parts.append(struct.pack("<4Q", first, last, self.record_counts[name], 0))
+            if not csi:
+                linear = self.linear_index[ref_id]
+                parts.append(struct.pack(f"<i{len(linear)}Q", len(linear), *linear))
+
+        with BgzfWriter(index_path) as writer:
+            writer.write(b"".join(parts))
+
+
+def _info_end(info: bytes) -> Optional[int]:
+    """Return the value of INFO/END, if the INFO field has one."""
+    for entry in info.split(b";"):
+        if entry.startswith(b"END="):
+            try:
+                return int(entry[4:])
+            except ValueError:
+                return None
+    return None
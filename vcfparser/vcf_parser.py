@@ -22,14 +22,28 @@ Examples
 ...     print(record.CHROM, record.POS, record.REF, record.ALT)
 """
 
+import asyncio
 import gzip
 import itertools
+import math
+import random
+import re
 import sys
-from typing import Optional, Tuple, Iterator, Union, TextIO, Callable, Any
+import threading
+from collections import Counter, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from operator import itemgetter
+from mmap import mmap as MemoryMap, ACCESS_READ
+from typing import Optional, Tuple, Iterator, Iterable, List, Dict, Union, BinaryIO, Callable, TypeVar, Any, Literal, overload, Deque, AsyncIterator, Sequence, Set
 from pathlib import Path
 
+from vcfparser.filters import FilterChain, LineFilter, RecordFilter
+from vcfparser.genotype_matrix import GenotypeMatrix, read_genotype_matrix
+from vcfparser.bgzf import BgzfReader, is_bgzf, iter_blocks, make_virtual_offset, split_virtual_offset
 from vcfparser.meta_header_parser import MetaDataParser
-from vcfparser.record_parser import Record
+from vcfparser.record_parser import FormatSchemaCache, Projection, ProjectedRecord, RawRecord, Record, RecordBatch, RecordHeader
+from vcfparser.regions import RegionSet
+from vcfparser.tabix import TabixIndex, find_index, merge_chunks
 
 __all__ = ['VcfParser']
 
@@ -49,7 +63,13 @@ class VcfParser:
     # https://stackoverflow.com/questions/7033239/how-to-preserve-line-breaks-when-generating-python-docs-using-sphinx 
     # https://thomas-cokelaer.info/tutorials/sphinx/rest_syntax.html#inline-markup-and-special-characters-e-g-bold-italic-verbatim 
 
-    def __init__(self, filename: Union[str, Path]) -> None:
+    def __init__(
+        self,
+        filename: Union[str, Path],
+        threads: int = 1,
+        readahead: Optional[int] = None,
+        mmap: bool = False,
+    ) -> None:
         """
         Initialize VcfParser with VCF file.
 
@@ -57,6 +77,18 @@ class VcfParser:
         ----------
         filename: Union[str, Path]
             Input VCF file path that needs to be parsed. Bgzipped files (.gz) are also supported.
+            A tabix (.tbi) or CSI (.csi) index next to a bgzipped file is picked up automatically
+            and used for region queries.
+        threads: int, default=1
+            Number of threads used to decompress BGZF blocks. Ignored for plain text and
+            plain gzip files.
+        readahead: Optional[int], default=None
+            Number of BGZF blocks to decompress ahead of the reading position when threads > 1
+            (default = 4 blocks per thread).
+        mmap: bool, default=False
+            Memory-map an uncompressed VCF file and find the record lines with ``bytes.find``.
+            Lines are only decoded once they pass the chrom/pos_range filters, and worker
+            processes map the same pages instead of reading their own copies.
         
         Returns
         -------
@@ -66,25 +98,139 @@ class VcfParser:
         ------
         FileNotFoundError
             If the specified file does not exist.
+        ValueError
+            If mmap is requested for a compressed file.
         
         Examples
         --------
         >>> parser = VcfParser("sample.vcf")
+        >>> parser = VcfParser("sample.vcf", mmap=True)
         >>> parser = VcfParser("sample.vcf.gz")
+        >>> parser = VcfParser("sample.vcf.gz", threads=4)
         """
         self.filename: str = str(filename)  # Convert Path to string if needed
-        # Assign function to support gz compressed files
-        self._open: Any = gzip.open if self.filename.endswith(".gz") else open
-        # Two copies of file are created to iterate over metadata and records separately
-        self._file: TextIO = self._open(self.filename, "rt")
-        self._file_copy: TextIO = self._open(self.filename, "rt")
-
-    def __del__(self) -> None:
-        """Clean up file handles when object is destroyed."""
-        if hasattr(self, '_file'):
-            self._file.close()
-        if hasattr(self, '_file_copy'):
-            self._file_copy.close()
+        self.threads: int = threads
+        self.readahead: Optional[int] = readahead
+        if mmap and self.filename.endswith(".gz"):
+            raise ValueError("mmap is only supported for uncompressed VCF files")
+        # Assign function to support gz compressed files; bgzipped files get a block-aware reader
+        self._is_bgzf: bool = self.filename.endswith(".gz") and is_bgzf(self.filename)
+        if self._is_bgzf:
+            self._open: Any = self._open_bgzf
+        else:
+            self._open = gzip.open if self.filename.endswith(".gz") else open
+        # A single binary handle serves both the header and the records; repeated passes seek on it
+        self._handle: BinaryIO = self._open(self.filename, "rb")
+        # read-only map of the whole file, shared with the page cache (empty files cannot be mapped)
+        self._map: Optional[MemoryMap] = None
+        if mmap and Path(self.filename).stat().st_size:
+            self._map = MemoryMap(self._handle.fileno(), 0, access=ACCESS_READ)
+        # iterator that currently owns the handle position (see _iter_lines)
+        self._active_cursor: Optional[List[int]] = None
+        # header lines, #CHROM columns and offset of the first record, read once on first use
+        self._header_lines: Optional[List[str]] = None
+        self._record_keys: Optional[List[str]] = None
+        self._data_offset: int = 0
+        self._metadata: Optional[MetaDataParser] = None
+        # FORMAT strings split once for the records parsed in this process; hits/misses for profiling
+        self.format_schemas: FormatSchemaCache = FormatSchemaCache()
+        self._record_header: Optional[RecordHeader] = None
+        # sidecar index for region queries, loaded on first use
+        self.index_path: Optional[str] = find_index(self.filename) if self.filename.endswith(".gz") else None
+        self._index: Optional[TabixIndex] = None
+
+    def _open_bgzf(self, filename: str, mode: str = "rb") -> BgzfReader:
+        """Open a bgzipped file through the BGZF reader."""
+        return BgzfReader(filename, threads=self.threads, readahead=self.readahead)
+
+    def __enter__(self) -> "VcfParser":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Context manager exit - closes the file."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying file handle.
+
+        Examples
+        --------
+        >>> with VcfParser("sample.vcf") as vcf:
+        ...     records = list(vcf.parse_records())
+        """
+        if self._map is not None:
+            self._map.close()
+        self._handle.close()
+
+    def _read_header(self) -> None:
+        """Read the header once and remember where the first record starts.
+
+        The '##' meta lines and the #CHROM line are cached as text, the #CHROM columns are
+        kept as the record keys and the stream position after the #CHROM line (a byte
+        offset, or a virtual offset for bgzipped files) is kept as the data offset.
+        """
+        if self._header_lines is not None:
+            return
+        self._suspend_active_cursor()
+        handle = self._handle
+        handle.seek(0)
+        header_lines = []
+        line = handle.readline()
+        while line.startswith(b"##"):
+            header_lines.append(_decode_line(line))
+            line = handle.readline()
+        if line:
+            # the #CHROM line; it is only part of the metadata when it really is a header line
+            header_line = _decode_line(line)
+            if header_line.startswith("#"):
+                header_lines.append(header_line)
+            self._record_keys = header_line.lstrip("#").rstrip("\r\n").split("\t")
+        self._data_offset = handle.tell()
+        self._header_lines = header_lines
+
+    def _suspend_active_cursor(self) -> None:
+        """Save the position of the iterator that currently owns the handle."""
+        if self._active_cursor is not None:
+            self._active_cursor[0] = self._handle.tell()
+            self._active_cursor = None
+
+    def _iter_lines(self, start: int, end: Optional[int] = None, cursor: Optional[List[int]] = None) -> Iterator[str]:
+        """Yield the decoded lines of the shared handle from offset `start` up to offset `end`."""
+        return map(bytes.decode, self._iter_raw_lines(start, end, cursor))
+
+    def _iter_raw_lines(
+        self, start: int, end: Optional[int] = None, cursor: Optional[List[int]] = None
+    ) -> Iterator[bytes]:
+        """Yield the lines of the shared handle from offset `start` up to offset `end`, as read.
+
+        Several iterators may be alive on the same parser (e.g. two parse_records() loops).
+        Whichever one reads takes over the handle: the position of the previous owner is
+        saved first and it seeks back to it when it resumes. A caller that passes its own
+        `cursor` list can read the position back with `_cursor_offset`.
+        """
+        handle = self._handle
+        if cursor is None:
+            cursor = [start]
+        else:
+            cursor[0] = start
+        while True:
+            if self._active_cursor is not cursor:
+                self._suspend_active_cursor()
+                handle.seek(cursor[0])
+                self._active_cursor = cursor
+            if end is not None and handle.tell() >= end:
+                break
+            line = handle.readline()
+            if not line:
+                break
+            yield line
+        if self._active_cursor is cursor:
+            self._suspend_active_cursor()
+
+    def _cursor_offset(self, cursor: List[int]) -> int:
+        """Return the offset of the next line to be read by the iterator that owns `cursor`."""
+        return self._handle.tell() if self._active_cursor is cursor else cursor[0]
 
     def parse_metadata(self) -> MetaDataParser:
         """Parse the metadata information from VCF header.
@@ -105,19 +251,123 @@ class VcfParser:
         >>> print(metadata.fileformat)
         'VCFv4.2'
         """
-        # This produces an iterator of metadata lines (lines starting with '#')
-        _raw_lines = itertools.takewhile(lambda x: x.startswith("#"), self._file)
-        return MetaDataParser(list(_raw_lines)).parse_lines()
+        # the header is read once and cached, so metadata can be parsed again at no I/O cost
+        self._read_header()
+        metadata = MetaDataParser(list(self._header_lines or [])).parse_lines()
+        if self.index_path:
+            # the index already counts the records of each contig, so this is cheap
+            metadata.record_counts = dict(self._load_index().record_counts)
+        return metadata
+
+    def build_index(self, csi: Optional[bool] = None) -> TabixIndex:
+        """Build a tabix (.tbi) or CSI (.csi) index next to the bgzipped VCF file.
+
+        The file is read once, without external tools such as htslib. The index is written to
+        ``<filename>.tbi`` (or ``<filename>.csi``) and is used right away by region queries.
+
+        Parameters
+        ----------
+        csi : Optional[bool], default=None
+            Write a CSI index instead of a tabix one. By default CSI is only used when a
+            ##contig line declares a length over 512 Mbp, which tabix cannot address.
+
+        Returns
+        -------
+        TabixIndex
+            The new index. Its ``record_counts`` attribute holds the number of records per contig.
+
+        Raises
+        ------
+        ValueError
+            If the file is not bgzipped or its records are not sorted by position.
+
+        Examples
+        --------
+        >>> vcf = VcfParser("sample.vcf.gz")
+        >>> index = vcf.build_index()
+        >>> index.record_counts
+        {'chr1': 2, 'chr2': 1}
+        >>> records = vcf.parse_records(chrom="chr1", pos_range=(1000, 2000))
+        """
+        index = TabixIndex.build(self.filename, csi=csi)
+        index_path = self.filename + (".csi" if index.is_csi else ".tbi")
+        index.write(index_path)
+        self.index_path = index_path
+        self._index = index
+        return index
+
+    @overload
+    def parse_records(
+        self,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        no_processors: int = 1,
+        columns: Optional[List[str]] = None,
+        info_keys: Optional[List[str]] = None,
+        samples: Optional[List[str]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+        assume_sorted: Optional[bool] = False,
+        raw: Literal[False] = False,
+        resume_from: Optional[int] = None,
+        checkpoint: Optional[Callable[[int], Any]] = None,
+        checkpoint_every: int = 10000,
+    ) -> Iterator[Record]: ...
+
+    @overload
+    def parse_records(
+        self,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        no_processors: int = 1,
+        columns: Optional[List[str]] = None,
+        info_keys: Optional[List[str]] = None,
+        samples: Optional[List[str]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+        assume_sorted: Optional[bool] = False,
+        *,
+        raw: Literal[True],
+        resume_from: Optional[int] = None,
+        checkpoint: Optional[Callable[[int], Any]] = None,
+        checkpoint_every: int = 10000,
+    ) -> Iterator[RawRecord]: ...
+
+    @overload
+    def parse_records(
+        self,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        no_processors: int = 1,
+        columns: Optional[List[str]] = None,
+        info_keys: Optional[List[str]] = None,
+        samples: Optional[List[str]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+        assume_sorted: Optional[bool] = False,
+        raw: bool = False,
+        resume_from: Optional[int] = None,
+        checkpoint: Optional[Callable[[int], Any]] = None,
+        checkpoint_every: int = 10000,
+    ) -> Iterator[Union[Record, RawRecord]]: ...
 
-    # TODO (Bhuwan, low priority) - Could multiprocessing be invoked here?? with -n flag
-    # multiprocessing should however follow the order (genomic position)
     # TODO (Bhuwan-Done, Gopal) Done properly render the "Uses" flag in this function too. 
     def parse_records(
         self, 
         chrom: Optional[str] = None, 
         pos_range: Optional[Tuple[int, int]] = None, 
-        no_processors: int = 1
-    ) -> Iterator[Record]:
+        no_processors: int = 1,
+        columns: Optional[List[str]] = None,
+        info_keys: Optional[List[str]] = None,
+        samples: Optional[List[str]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+        assume_sorted: Optional[bool] = False,
+        raw: bool = False,
+        resume_from: Optional[int] = None,
+        checkpoint: Optional[Callable[[int], Any]] = None,
+        checkpoint_every: int = 10000,
+    ) -> Iterator[Union[Record, RawRecord]]:
         """Parse records and yield them.
 
         Parameters
@@ -128,13 +378,77 @@ class VcfParser:
             Genomic position range of interest, e.g: (5, 15). Both upper and lower limits are inclusive. 
             If None, all positions are included.
         no_processors : int, default=1
-            Number of processors to use (currently not implemented, reserved for future use).
+            Number of worker processes used to parse the records. When greater than 1, the record
+            section is split into byte-range chunks (BGZF block ranges for bgzipped input, batches of
+            lines for plain gzip input) that are parsed and filtered in a process pool. Records are still yielded in the original file order.
+            Ignored for region queries that are answered from a tabix/CSI index.
+        columns : Optional[List[str]], default=None
+            Fixed VCF columns to parse, e.g. ["CHROM", "POS", "REF", "ALT"]. Record lines are only
+            split up to the last of these columns and the sample data stays one unsplit string.
+            The records are ProjectedRecord objects that raise FieldNotProjectedError when any
+            other field is accessed. If None (and no info_keys are given), all columns are parsed.
+        info_keys : Optional[List[str]], default=None
+            INFO keys to keep; ``get_info_as_dict()`` only extracts these keys. Implies the INFO
+            column and, when columns is None, projects all fixed columns.
+        samples : Optional[List[str]], default=None
+            Sample names to keep. Their column indices are resolved once from the #CHROM line and
+            only those sample columns are picked and mapped per record; ``sample_names`` and
+            ``rec_line`` of the records reflect the subset. Lines are split up to the last selected
+            sample column, so samples near the start of a wide file are the cheapest to extract.
+        filter : Optional[Union[str, LineFilter]], default=None
+            Filter expression such as ``'QUAL >= 30 && FILTER == "PASS" && INFO/DP > 10'``, or a
+            RecordFilter. It is compiled once, using the ##INFO Type declarations for numeric
+            comparisons, and runs on the raw fields before any Record is built (see
+            vcfparser.filters for the syntax).
+        regions : Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]], default=None
+            Intervals to query: a RegionSet, (chrom, start, end) tuples with 1-based inclusive
+            coordinates, or the path of a BED file. Intervals are merged and sorted once and each
+            record whose POS falls into them is yielded once, in file order. With a tabix/CSI
+            index only the blocks overlapping the intervals are read; otherwise the file is swept
+            once and every line is checked with a bisect on the merged intervals.
+        assume_sorted : Optional[bool], default=False
+            Declare the file as sorted by chromosome and position, so a chrom/pos_range query stops
+            reading as soon as the region is passed. Lines of other chromosomes are skipped by
+            comparing their CHROM prefix, without splitting them. When the header has ##contig
+            lines, their order also tells which chromosomes come after the queried one. None
+            enables this automatically for files with ##contig lines. Only used when the file is
+            read without an index and with one processor.
+        raw : bool, default=False
+            Yield RawRecord objects that keep the original bytes of each line, with lazy CHROM and
+            POS accessors, instead of Record objects. The chrom, pos_range, regions and filter
+            arguments still apply; nothing else is decoded. VCFWriter.add_record writes them
+            back unchanged. Cannot be combined with columns, info_keys or samples; lines are
+            always read in this process.
+        resume_from : Optional[int], default=None
+            Checkpoint token to resume a previous scan from, as passed to the `checkpoint`
+            callback: the offset of the next unread record line. That is a byte offset for plain
+            files, a virtual offset for bgzipped files and an offset into the decompressed
+            stream for plain gzip files (which are decompressed up to there, but not parsed).
+            Reading starts right there, without going through the records before it; the
+            other arguments should be the same as in the interrupted call.
+        checkpoint : Optional[Callable[[int], Any]], default=None
+            Called with a checkpoint token every `checkpoint_every` records and once more when
+            the scan is complete, e.g. to persist the progress of a long job. The token covers
+            every record handed out before the call, so ``parse_records(resume_from=token)``
+            continues with the next one. Checkpointed scans are read in this process;
+            no_processors is ignored.
+        checkpoint_every : int, default=10000
+            Number of records between two calls of `checkpoint`.
 
         Yields
         ------
         Record
-            Record object for iterating and querying the record information.
+            Record object for iterating and querying the record information
+            (RawRecord when raw=True).
             
+        Raises
+        ------
+        ValueError
+            If no_processors is less than 1, a column is not one of the fixed VCF columns or a
+            sample is not in the header, the filter expression is invalid, the BED file is malformed,
+            raw is combined with a projection, checkpoint_every is less than 1 or resume_from
+            points into the header.
+
         Uses
         ----
         Record module to create Record objects
@@ -151,54 +465,1238 @@ class VcfParser:
         >>> # Parse records in position range
         >>> for record in vcf.parse_records(pos_range=(1000, 2000)):
         ...     print(record.CHROM, record.POS)
+        >>> # Parse records using 4 worker processes
+        >>> for record in vcf.parse_records(no_processors=4):
+        ...     print(record.CHROM, record.POS)
+        >>> # Parse only a few columns and one INFO key
+        >>> for record in vcf.parse_records(columns=["CHROM", "POS", "REF", "ALT"], info_keys=["DP"]):
+        ...     print(record.CHROM, record.POS, record.get_info_as_dict())
+        >>> # Extract a trio
+        >>> for record in vcf.parse_records(samples=["child", "mother", "father"]):
+        ...     print(record.genotype_property.isHETVAR())
+        >>> # Keep passing SNPs with enough depth
+        >>> for record in vcf.parse_records(filter='FILTER == "PASS" && TYPE == "snp" && INFO/DP > 10'):
+        ...     print(record.CHROM, record.POS)
+        >>> # Query the targets of a BED file
+        >>> for record in vcf.parse_records(regions="exome_targets.bed"):
+        ...     print(record.CHROM, record.POS)
+        >>> # Stop reading once chromosome 2 is passed in a sorted file
+        >>> for record in vcf.parse_records(chrom="2", assume_sorted=True):
+        ...     print(record.CHROM, record.POS)
+        >>> # Copy the records of a region without decoding them
+        >>> with VCFWriter("chr1.vcf") as writer:
+        ...     for raw_record in vcf.parse_records(chrom="chr1", raw=True):
+        ...         writer.add_record(raw_record)
+        >>> # Save the progress of a long scan and pick it up again after a restart
+        >>> for record in vcf.parse_records(resume_from=load_token(), checkpoint=save_token):
+        ...     process(record)
         """
-        #TODO: Done 
-        # the Uses is not being rendered properly.
+        if no_processors < 1:
+            raise ValueError(f"no_processors must be at least 1, got {no_processors}")
+
+        ## NOTE: records start right after the cached header; every call seeks back there
+        record_keys = self._require_record_keys()
+        projection = None
+        if columns is not None or info_keys is not None or samples is not None:
+            projection = Projection(columns, info_keys, samples, record_keys, self.format_schemas)
+        record_filter = self._record_filter(filter)
+        region_set = None
+        if regions is not None:
+            region_set = _as_region_set(regions)
+            # the region check is a cheap bisect, so it runs before the filter expression
+            record_filter = region_set if record_filter is None else FilterChain([region_set, record_filter])
+        contig_ranks = None
+        if assume_sorted is not False:
+            contig_ranks = {contig: rank for rank, contig in enumerate(self._contig_order())} or None
+        # early termination only makes sense for a chrom/pos_range query on a sorted file
+        stop_early = bool(chrom or pos_range) and (assume_sorted is True or contig_ranks is not None)
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every must be at least 1, got {checkpoint_every}")
+        if resume_from is not None and resume_from < self._data_offset:
+            raise ValueError(f"resume_from={resume_from} points into the header")
+        data_start = self._data_offset if resume_from is None else resume_from
+        # checkpoints need the position of the next line, so checkpointed scans are read here
+        serial = no_processors == 1 or checkpoint is not None
+        # position of the next line to be read, kept up to date by the serial line sources
+        cursor = [data_start]
+        _record_lines = self._iter_lines(data_start, cursor=cursor)
+        # records built in this process share the parser's header and FORMAT cache;
+        # worker processes build their own from the record keys
+        header = self._require_record_header()
+
+        records: Iterator[Union[Record, RawRecord]]
+        if raw:
+            if projection is not None:
+                raise ValueError("raw=True cannot be combined with columns, info_keys or samples")
+            if region_set is not None and self.index_path:
+                raw_lines: Iterator[bytes] = self._region_lines(region_set, resume_from, cursor)
+            elif chrom and self.index_path:
+                raw_lines = self._indexed_lines(chrom, pos_range, resume_from, cursor)
+            else:
+                if self._map is not None:
+                    raw_lines = _mapped_lines(self._map, data_start, len(self._map), cursor)
+                else:
+                    raw_lines = self._iter_raw_lines(data_start, cursor=cursor)
+                if stop_early:
+                    raw_lines = _until_region_passed(raw_lines, chrom, pos_range, contig_ranks)
+            records = _raw_line_records(raw_lines, record_keys, chrom, pos_range, record_filter)
+
+        elif region_set is not None and self.index_path:
+            # read only the blocks that overlap the merged intervals, each block once
+            records = _filter_records(
+                map(bytes.decode, self._region_lines(region_set, resume_from, cursor)),
+                header, chrom, pos_range, projection, record_filter,
+            )
+
+        elif chrom and self.index_path:
+            # seek straight to the blocks that overlap the region instead of scanning the file
+            records = _filter_records(
+                map(bytes.decode, self._indexed_lines(chrom, pos_range, resume_from, cursor)),
+                header, chrom, pos_range, projection, record_filter,
+            )
 
-        #TODO Done (Bhuwan, Bishwa; priority = high)
-        #the no_of_recs is not being used. 
-        # Keep or delete or use it? 
+        elif self._map is not None and serial:
+            mapped_lines: Iterator[bytes] = _mapped_lines(self._map, data_start, len(self._map), cursor)
+            if stop_early:
+                mapped_lines = _until_region_passed(mapped_lines, chrom, pos_range, contig_ranks)
+            records = _filter_raw_records(mapped_lines, header, chrom, pos_range, projection, record_filter)
+
+        elif self._map is not None:
+            # the chunks start on line boundaries, so every worker maps the file and reads its range as is
+            tasks: Iterator[Tuple[Any, ...]] = (
+                (_parse_mapped_range, self.filename, start, end, record_keys, chrom, pos_range, projection, record_filter)
+                for start, end in self._mapped_ranges(self._map, data_start)
+            )
+            records = _ordered_pool_map(tasks, no_processors)
+
+        elif serial:
+            if stop_early:
+                # the region check runs on the raw lines, only the lines it lets through are decoded
+                _record_lines = map(
+                    bytes.decode,
+                    _until_region_passed(self._iter_raw_lines(data_start, cursor=cursor), chrom, pos_range, contig_ranks),
+                )
+            records = _filter_records(_record_lines, header, chrom, pos_range, projection, record_filter)
+
+        else:
+            if self._open is open:
+                # plain text files can be split into byte ranges that each worker reads on its own
+                tasks = (
+                    (_parse_byte_range, self.filename, start, end, record_keys, chrom, pos_range, projection, record_filter)
+                    for start, end in self._byte_ranges(data_start)
+                )
+            elif self._is_bgzf:
+                # bgzipped files are split at block boundaries, each worker decompresses its own blocks
+                tasks = (
+                    (_parse_bgzf_range, self.filename, start, skip_from, end, record_keys, chrom, pos_range, projection, record_filter)
+                    for start, skip_from, end in self._bgzf_ranges(data_start)
+                )
+            else:
+                # plain gzip streams are decompressed here and shipped to the workers in line batches
+                tasks = (
+                    (_parse_line_batch, list(batch), record_keys, chrom, pos_range, projection, record_filter)
+                    for batch in _batched(_record_lines, _BATCH_LINES)
+                )
+            records = _ordered_pool_map(tasks, no_processors)
+
+        if checkpoint is not None:
+            records = _checkpointed(records, lambda: self._cursor_offset(cursor), checkpoint, checkpoint_every)
+        yield from records
+
+    def parse_batches(
+        self,
+        batch_size: int = 10000,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+    ) -> Iterator[RecordBatch]:
+        """Parse records and yield them in blocks of `batch_size` records.
+
+        The record lines are split in bulk and every block shares the header keys, which avoids
+        the per-record generator overhead when the records go to NumPy, a bulk writer or a
+        database loader. Blocks are picklable, so they can be handed to thread or process pools.
+
+        Parameters
+        ----------
+        batch_size : int, default=10000
+            Number of records per block. Only the last block can be smaller.
+        chrom : Optional[str], default=None
+            Chromosome name or number to filter records. If None, all chromosomes are included.
+        pos_range : Optional[Tuple[int, int]], default=None
+            Genomic position range of interest, e.g: (5, 15). Both upper and lower limits are inclusive.
+            If None, all positions are included.
+
+        Yields
+        ------
+        RecordBatch
+            Block of records; iterate it for Record objects or use ``column()`` for raw values.
 
-        ## NOTE: we start parsing the data from file (copy version), after dropping lines that start with ##
-        _record_lines = itertools.dropwhile(
-            lambda x: x.startswith("##"), self._file_copy
+        Raises
+        ------
+        ValueError
+            If batch_size is less than 1.
+
+        Examples
+        --------
+        >>> vcf = VcfParser("sample.vcf")
+        >>> for batch in vcf.parse_batches(batch_size=5000):
+        ...     positions = [int(pos) for pos in batch.column("POS")]
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        record_keys = self._require_record_keys()
+        if chrom and self.index_path:
+            lines: Iterator[str] = map(bytes.decode, self._indexed_lines(chrom, pos_range))
+        elif self._map is not None:
+            lines = (line.decode() for line in _mapped_lines(self._map, self._data_offset, len(self._map)))
+        else:
+            lines = self._iter_lines(self._data_offset)
+
+        pending: List[List[str]] = []
+        for line_batch in _batched(lines, batch_size):
+            pending.extend(_split_lines(line_batch, chrom, pos_range))
+            while len(pending) >= batch_size:
+                if len(pending) == batch_size:
+                    rows, pending = pending, []
+                else:
+                    # filters dropped some lines earlier, so the rows run over a block boundary
+                    rows, pending = pending[:batch_size], pending[batch_size:]
+                yield RecordBatch(rows, record_keys)
+        if pending:
+            yield RecordBatch(pending, record_keys)
+
+    def parse_genotype_matrix(
+        self,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+        regions: Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]] = None,
+        samples: Optional[Iterable[str]] = None,
+        tag: str = "GT",
+        ploidy: int = 2,
+        chunk_size: int = 10000,
+    ) -> GenotypeMatrix:
+        """Read the genotype calls of the file, or of a region, into dense NumPy arrays.
+
+        The record lines are read as raw bytes and only the genotype field of the wanted
+        samples is looked at; no Record or per-sample dict is created. Each chunk of
+        `chunk_size` variants is converted at once and copied into growing arrays.
+        Needs NumPy, which is an optional dependency.
+
+        Parameters
+        ----------
+        chrom : Optional[str], default=None
+            Chromosome to read; uses the index of a bgzipped file when there is one.
+        pos_range : Optional[Tuple[int, int]], default=None
+            1-based inclusive position range on `chrom`.
+        filter : Optional[Union[str, LineFilter]], default=None
+            Filter expression or RecordFilter, as for parse_records.
+        regions : Optional[Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]], default=None
+            Intervals or BED file to read, as for parse_records.
+        samples : Optional[Iterable[str]], default=None
+            Samples to keep, in this order (default = all samples).
+        tag : str, default="GT"
+            FORMAT tag holding the genotype, e.g. 'PG' for phased genotypes.
+        ploidy : int, default=2
+            Size of the allele axis; calls with fewer alleles are padded with -1.
+        chunk_size : int, default=10000
+            Number of variants converted at a time, and the initial capacity of the arrays.
+
+        Returns
+        -------
+        GenotypeMatrix
+            ``genotypes`` (int8, n_variants x n_samples x ploidy, -1 = missing), ``phased``
+            (bool, n_variants x n_samples) and the ``chrom``, ``pos``, ``ref`` and ``alt`` arrays.
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed.
+        ValueError
+            If a sample is not in the header, ploidy or chunk_size is less than 1, or a call
+            has more alleles than `ploidy` or an allele index above 127.
+
+        Examples
+        --------
+        >>> matrix = VcfParser("cohort.vcf.gz").parse_genotype_matrix(regions="exome.bed")
+        >>> called = matrix.genotypes >= 0
+        >>> alt_freq = (matrix.genotypes > 0).sum(axis=(1, 2)) / called.sum(axis=(1, 2))
+        """
+        if ploidy < 1:
+            raise ValueError(f"ploidy must be at least 1, got {ploidy}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        header = self._require_record_header()
+        sample_names = list(header.sample_names or []) if samples is None else list(samples)
+        unknown = [sample for sample in sample_names if sample not in header.sample_index]
+        if unknown:
+            raise ValueError(f"Samples {unknown} are not in the VCF header")
+        sample_columns = [9 + header.sample_index[sample] for sample in sample_names]
+
+        records = self.parse_records(chrom=chrom, pos_range=pos_range, filter=filter, regions=regions, raw=True)
+        return read_genotype_matrix(
+            records, sample_names, sample_columns, tag, ploidy, chunk_size, self.format_schemas
         )
 
-        # TODO - ask with Bhuwan: What is this try/StopIteration doing?
-        # Do we need the code - if _record_lines.startswith("#CHROM")
+    def count_records(
+        self,
+        by: Optional[Union[str, Sequence[str]]] = None,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+    ) -> Union[int, "Counter[Any]"]:
+        """Count records, optionally grouped by the values of some columns, without parsing them.
+
+        No Record is created: without `by` and filters the newlines of the record section are
+        counted in large blocks, and with `by` each line is only split up to the last column
+        needed. When the file has a tabix/CSI index, plain and per-chromosome counts come
+        straight from the record counts stored in the index and chrom queries only read the
+        blocks of that chromosome.
+
+        Parameters
+        ----------
+        by : Optional[Union[str, Sequence[str]]], default=None
+            Column, or columns, to group the counts by, e.g. "FILTER" or ("CHROM", "FILTER").
+        chrom : Optional[str], default=None
+            Only count the records of this chromosome.
+        pos_range : Optional[Tuple[int, int]], default=None
+            Only count the records in this 1-based inclusive position range.
+        filter : Optional[Union[str, LineFilter]], default=None
+            Only count the records that pass this filter expression, see parse_records.
+
+        Returns
+        -------
+        Union[int, Counter]
+            The number of records if `by` is None, otherwise a Counter keyed by the column
+            value (`by` is a column name) or by the tuple of column values (`by` is a sequence).
+
+        Raises
+        ------
+        ValueError
+            If a `by` column is not in the #CHROM line or the filter expression is invalid.
+
+        Examples
+        --------
+        >>> vcf = VcfParser("sample.vcf.gz")
+        >>> vcf.count_records()
+        3
+        >>> vcf.count_records(by=("CHROM", "FILTER"))
+        Counter({('chr1', 'PASS'): 2, ('chr2', 'PASS'): 1})
+        >>> vcf.count_records(chrom="chr1", filter="QUAL >= 30")
+        1
+        """
+        record_keys = self._require_record_keys()
+        columns = [] if by is None else [by] if isinstance(by, str) else list(by)
+        try:
+            indices = [record_keys.index(column) for column in columns]
+        except ValueError:
+            raise ValueError(f"Cannot count by {columns}: the columns are {record_keys}") from None
+        record_filter = self._record_filter(filter)
+        # a sequence of one column still gives tuple keys
+        as_tuple = not isinstance(by, str) and len(columns) == 1
+
+        if record_filter is None and pos_range is None and columns in ([], ["CHROM"]):
+            index_counts = self._load_index().record_counts if self.index_path else {}
+            if index_counts:
+                if columns:
+                    return Counter({
+                        (contig,) if as_tuple else contig: count for contig, count in index_counts.items()
+                        if count and (chrom is None or contig == chrom)
+                    })
+                return index_counts.get(chrom, 0) if chrom else sum(index_counts.values())
+            if not columns and chrom is None:
+                return self._count_lines(self._data_offset)
+
+        if chrom and self.index_path:
+            lines: Iterator[bytes] = self._indexed_lines(chrom, pos_range)
+        elif self._map is not None:
+            lines = _mapped_lines(self._map, self._data_offset, len(self._map))
+        else:
+            lines = self._iter_raw_lines(self._data_offset)
+        counts = _count_raw_lines(lines, indices, chrom, pos_range, record_filter)
+
+        if not columns:
+            return sum(counts.values())
+        return Counter({_decode_key(key, as_tuple): count for key, count in counts.items()})
+
+    def sample_records(
+        self,
+        k: int,
+        seed: Optional[Any] = None,
+        chrom: Optional[str] = None,
+        pos_range: Optional[Tuple[int, int]] = None,
+        filter: Optional[Union[str, LineFilter]] = None,
+    ) -> List[Record]:
+        """Draw a uniform random sample of k records in a single streaming pass.
+
+        The raw record lines are reservoir sampled (Algorithm L, which skips over most lines
+        without drawing a random number), so memory stays at k lines whatever the file size,
+        and only the k lines kept are parsed into Record objects.
+
+        With a tabix/CSI index and no pos_range or filter, the file is not scanned: the index
+        splits each contig into segments of about one BGZF block between known record offsets;
+        segments are picked at random in proportion to their estimated uncompressed size and
+        records are drawn uniformly from the segments picked. Only those segments are read, and
+        the sample is uniform as far as the records of a contig have similar line lengths and
+        compress alike.
+
+        Parameters
+        ----------
+        k : int
+            Number of records to draw. All matching records are returned if there are fewer.
+        seed : Optional[Any], default=None
+            Seed of the random number generator, for reproducible samples.
+        chrom : Optional[str], default=None
+            Only sample the records of this chromosome.
+        pos_range : Optional[Tuple[int, int]], default=None
+            Only sample the records in this 1-based inclusive position range.
+        filter : Optional[Union[str, LineFilter]], default=None
+            Only sample the records that pass this filter expression, see parse_records.
+
+        Returns
+        -------
+        List[Record]
+            The sampled records, in file order.
+
+        Raises
+        ------
+        ValueError
+            If k is negative or the filter expression is invalid.
+
+        Examples
+        --------
+        >>> vcf = VcfParser("sample.vcf.gz")
+        >>> qc_sample = vcf.sample_records(1000, seed=42)
+        >>> pass_snps = vcf.sample_records(100, filter='FILTER == "PASS" && TYPE == "snp"')
+        """
+        if k < 0:
+            raise ValueError(f"k must not be negative, got {k}")
+        record_keys = self._require_record_keys()
+        record_filter = self._record_filter(filter)
+        rng = random.Random(seed)
+        if k == 0:
+            return []
+
+        # segments need the contig bounds that indexes keep in their pseudo-bins
+        if self.index_path and pos_range is None and record_filter is None and self._load_index().offset_ranges:
+            index = self._load_index()
+            contigs = [contig for contig in ([chrom] if chrom else index.names) if contig in index.offset_ranges]
+            return self._sample_index_segments(k, rng, contigs, record_keys)
+
+        if chrom and self.index_path:
+            lines: Iterator[bytes] = self._indexed_lines(chrom, pos_range)
+        elif self._map is not None:
+            lines = _mapped_lines(self._map, self._data_offset, len(self._map))
+        else:
+            lines = self._iter_raw_lines(self._data_offset)
+        # only raw line views are held in the reservoir
+        sample = _reservoir_sample(_raw_line_records(lines, record_keys, chrom, pos_range, record_filter), k, rng)
+        return [raw_record.to_record() for _, raw_record in sorted(sample, key=itemgetter(0))]
 
-        ## NOTE: we start parsing the data from file (copy version), starting at #CHROM line
+    def _sample_index_segments(
+        self, k: int, rng: random.Random, contigs: List[str], record_keys: List[str]
+    ) -> List[Record]:
+        """Sample records from index segments picked in proportion to their estimated size."""
+        index = self._load_index()
+        # (begin, end) virtual offsets of segments starting at the first known record of a block,
+        # and the estimated number of uncompressed bytes in each
+        segments: List[Tuple[int, int]] = []
+        sizes: List[float] = []
+        total = 0
+        for contig in contigs:
+            total += index.record_counts.get(contig, 0)
+            block_starts: Dict[int, int] = {}
+            for offset in index.record_offsets(contig):
+                block_starts.setdefault(offset >> 16, offset)
+            starts = list(block_starts.values())
+            if not starts:
+                continue
+            # compression ratio of the contig's first block, to put block and in-block offsets on one scale
+            _, block_size, data_size = next(iter_blocks(self.filename, starts[0] >> 16), (0, 1, 1))
+            ratio = data_size / block_size
+            for beg, end in zip(starts, starts[1:] + [index.offset_ranges[contig][1]]):
+                segments.append((beg, end))
+                sizes.append(max(((end >> 16) - (beg >> 16)) * ratio + (end & 0xFFFF) - (beg & 0xFFFF), 1.0))
+        if total and total <= k:
+            return [
+                raw_record.to_record()
+                for contig in contigs
+                for raw_record in _raw_line_records(self._indexed_lines(contig), record_keys, contig)
+            ]
+
+        weights = list(itertools.accumulate(sizes))
+        taken: Dict[int, Set[int]] = {}
+        picked: List[Tuple[int, int, bytes]] = []
+        exhausted: Set[int] = set()
+        while len(picked) < k and len(exhausted) < len(segments):
+            draws = Counter(rng.choices(range(len(segments)), cum_weights=weights, k=k - len(picked)))
+            for segment_no in sorted(draws):
+                if segment_no in exhausted:
+                    continue
+                seg_beg, seg_end = segments[segment_no]
+                # the segment stays bytes; blank lines are dropped so only records are drawn
+                stripped = (line.rstrip(b"\r\n") for line in self._iter_raw_lines(seg_beg, seg_end))
+                lines = [line for line in stripped if line]
+                used = taken.setdefault(segment_no, set())
+                free = [line_no for line_no in range(len(lines)) if line_no not in used]
+                for line_no in rng.sample(free, min(draws[segment_no], len(free))):
+                    used.add(line_no)
+                    picked.append((segment_no, line_no, lines[line_no]))
+                if len(used) == len(lines):
+                    exhausted.add(segment_no)
+        picked.sort()
+        return [RawRecord(line, record_keys).to_record() for _, _, line in picked[:k]]
+
+    async def aparse_records(
+        self,
+        *args: Any,
+        queue_size: int = 8,
+        batch_size: int = 1000,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Union[Record, RawRecord]]:
+        """Yield the records of parse_records without blocking the event loop.
+
+        Reading, decompressing and splitting run in a background thread on a parser of its own,
+        so several queries on the same VcfParser can run at the same time. Records are handed
+        over in batches through a bounded queue: once `queue_size` batches are waiting, the
+        reader pauses until the consumer catches up. Leaving the ``async for`` loop early stops
+        the reader after its current batch.
+
+        Parameters
+        ----------
+        *args, **kwargs
+            Arguments of parse_records, e.g. chrom, pos_range, filter or regions.
+        queue_size : int, default=8
+            Maximum number of batches read ahead of the consumer.
+        batch_size : int, default=1000
+            Number of records per batch; larger batches mean fewer thread hand-overs.
+        executor : Optional[Executor], default=None
+            Executor that runs the reader, the event loop's default executor if None. Every
+            running query holds one of its threads, so serving many queries at the same time
+            may need an executor with more threads.
+
+        Yields
+        ------
+        Record
+            The records parse_records would yield, in the same order.
+
+        Raises
+        ------
+        ValueError
+            If queue_size or batch_size is less than 1, or parse_records rejects the arguments.
+
+        Examples
+        --------
+        >>> async def query(vcf, chrom, start, end):
+        ...     return [record.POS async for record in vcf.aparse_records(chrom=chrom, pos_range=(start, end))]
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+        stopped = threading.Event()
+
+        def put(item: Any) -> bool:
+            """Hand an item to the event loop, waiting while the queue is full."""
+            if stopped.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return not stopped.is_set()
+
+        def read() -> None:
+            try:
+                with self._reader_copy() as parser:
+                    for batch in _batched(parser.parse_records(*args, **kwargs), batch_size):
+                        if not put(batch):
+                            return
+                put(None)
+            except BaseException as error:
+                put(error)
+
+        reader = loop.run_in_executor(executor, read)
         try:
-            header_line = next(_record_lines)  # if _record_lines.startswith("#CHROM")
-        except StopIteration:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                for record in batch:
+                    yield record
+        finally:
+            stopped.set()
+            # free the queue so a reader waiting to put a batch wakes up, sees the stop and returns
+            while not queue.empty():
+                queue.get_nowait()
+            await reader
+
+    def _reader_copy(self) -> "VcfParser":
+        """Open another parser on the same file, with a handle of its own, for a background reader."""
+        parser = VcfParser(self.filename, self.threads, self.readahead, mmap=self._map is not None)
+        parser.index_path = self.index_path
+        # a loaded index is never modified, so it can be shared
+        parser._index = self._index
+        parser.format_schemas = self.format_schemas
+        return parser
+
+    @staticmethod
+    def merge(
+        filenames: Iterable[Union[str, Path]], union_samples: bool = False, **kwargs: Any
+    ) -> Iterator[Record]:
+        """Yield the records of several coordinate-sorted VCF files in genomic order.
+
+        A shortcut for MultiVcfParser(filenames, union_samples).parse_records(**kwargs) that
+        closes the files once the records are exhausted.
+
+        Parameters
+        ----------
+        filenames : Iterable[Union[str, Path]]
+            Paths of the VCF files, e.g. per-chromosome shards.
+        union_samples : bool, default=False
+            Combine the sample columns of all files, bcftools merge style, instead of
+            requiring the same sample columns in every file.
+        **kwargs
+            chrom, pos_range, filter and regions, as for parse_records.
+
+        Yields
+        ------
+        Record
+            Records of all files, ordered by chromosome and position.
+
+        Raises
+        ------
+        ValueError
+            If the headers are not compatible or a file is not sorted.
+
+        Examples
+        --------
+        >>> for record in VcfParser.merge(["chr1.vcf.gz", "chr2.vcf.gz", "chrX.vcf.gz"]):
+        ...     print(record.CHROM, record.POS)
+        """
+        # imported here, the merge module builds on VcfParser
+        from vcfparser.merge import MultiVcfParser
+
+        with MultiVcfParser(filenames, union_samples) as multi_parser:
+            yield from multi_parser.parse_records(**kwargs)
+
+    def _record_filter(self, filter: Optional[Union[str, LineFilter]]) -> Optional[LineFilter]:
+        """Compile a filter expression, typed by the ##INFO declarations of this file."""
+        if filter is None:
+            return None
+        record_filter = RecordFilter(filter) if isinstance(filter, str) else filter
+        if isinstance(record_filter, RecordFilter):
+            record_filter = record_filter.with_info_types(self._info_types())
+        return record_filter
+
+    def _count_lines(self, start: int) -> int:
+        """Count the non-blank lines from offset `start` to the end of the file, reading large blocks."""
+        # the count runs to completion here, so other iterators just seek back when they resume
+        self._suspend_active_cursor()
+        handle = self._handle
+        handle.seek(start)
+        # `start` is a line start, as if a newline came right before it
+        count, tail = 0, b"\n"
+        while True:
+            block = handle.read(_COUNT_BLOCK_SIZE)
+            if not block:
+                break
+            count += block.count(b"\n")
+            # blank lines are rare, so they are only searched for in blocks that have some; the
+            # tail of the previous block catches the ones split across blocks
+            joined = tail + block
+            if b"\n\n" in joined or b"\n\r\n" in joined:
+                count -= sum(1 for match in _BLANK_LINE.finditer(joined) if match.end() > len(tail))
+            tail = joined[-2:]
+        # a last line without a line ending
+        return count if tail.endswith(b"\n") or tail.endswith(b"\n\r") else count + 1
+
+    def _require_record_header(self) -> RecordHeader:
+        """Return the header shared by the records parsed in this process."""
+        if self._record_header is None:
+            self._record_header = RecordHeader(self._require_record_keys(), self.format_schemas)
+        return self._record_header
+
+    def _require_record_keys(self) -> List[str]:
+        """Return the #CHROM columns, exiting if the file has no record header line."""
+        self._read_header()
+        if self._record_keys is None:
             print("File doesnot contain the record header line.")
             sys.exit(0)
-        record_keys = header_line.lstrip("#").strip("\n").split("\t")
+        return self._record_keys
+
+    def _header_metadata(self) -> MetaDataParser:
+        """Parse the cached header once for internal, read-only use."""
+        if self._metadata is None:
+            self._read_header()
+            self._metadata = MetaDataParser(list(self._header_lines or [])).parse_lines()
+        return self._metadata
+
+    def _info_types(self) -> Dict[str, str]:
+        """Map the INFO keys declared in the header to their Type."""
+        return {info["ID"]: info.get("Type", "String") for info in self._header_metadata().infos_ if "ID" in info}
 
+    def _contig_order(self) -> List[str]:
+        """Return the contigs in the order of the ##contig header lines."""
+        return [contig["ID"] for contig in self._header_metadata().contig if "ID" in contig]
+
+    def _load_index(self) -> TabixIndex:
+        """Load the sidecar tabix/CSI index once and keep it on the parser."""
+        if self._index is None:
+            if self.index_path is None:
+                raise FileNotFoundError(f"No .tbi or .csi index found for {self.filename}")
+            self._index = TabixIndex.from_file(self.index_path)
+        return self._index
+
+    def _indexed_lines(
+        self,
+        chrom: str,
+        pos_range: Optional[Tuple[int, int]] = None,
+        resume_from: Optional[int] = None,
+        cursor: Optional[List[int]] = None,
+    ) -> Iterator[bytes]:
+        """Yield the record lines stored in the index chunks that overlap the region.
+
+        The chunks may also hold records outside the region, so the lines still need
+        to go through the chrom/pos_range filters.
+        """
+        index = self._load_index()
         if pos_range:
-            start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
-
-        for record_line_str in _record_lines:
-            record_line_fields = record_line_str.strip("\n").split("\t")
-
-            # in order to select only selected chrom values
-            if chrom and pos_range:
-                ch_val = record_line_fields[0]
-                pos_val = int(record_line_fields[1])
-                if ch_val == chrom and start_pos <= pos_val <= end_pos:
-                    yield Record(record_line_fields, record_keys)
-
-            elif chrom:
-                ch_val = record_line_fields[0]
-                if ch_val == chrom:
-                    yield Record(record_line_fields, record_keys)
-
-            ## NOTE/TODO: Do we need to parse file and extract data if only pos_range is given?
-            elif pos_range:
-                pos_val = int(record_line_fields[1])
-                start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
-                if start_pos <= pos_val <= end_pos:
-                    yield Record(record_line_fields, record_keys)
+            # VCF positions are 1-based and inclusive, index regions are 0-based and half-open
+            beg, end = max(int(pos_range[0]) - 1, 0), int(pos_range[1])
+            chunks = index.query_chunks(chrom, beg, end)
+        else:
+            chunks = index.query_chunks(chrom)
 
-            else:
-                yield Record(record_line_fields, record_keys)
+        yield from self._chunk_lines(chunks, resume_from, cursor)
+
+    def _region_lines(
+        self,
+        region_set: RegionSet,
+        resume_from: Optional[int] = None,
+        cursor: Optional[List[int]] = None,
+    ) -> Iterator[bytes]:
+        """Yield the record lines stored in the index chunks that overlap any of the regions.
+
+        Contigs are visited in index (file) order and the chunks of all intervals on a contig
+        are merged first, so no line is read twice.
+        """
+        index = self._load_index()
+        wanted = set(region_set.chroms)
+        for chrom in index.names:
+            if chrom not in wanted:
+                continue
+            # VCF positions are 1-based and inclusive, index regions are 0-based and half-open
+            chunks = merge_chunks(
+                chunk
+                for start, end in region_set.intervals(chrom)
+                for chunk in index.query_chunks(chrom, max(start - 1, 0), end)
+            )
+            yield from self._chunk_lines(chunks, resume_from, cursor)
+
+    def _chunk_lines(
+        self,
+        chunks: Iterable[Tuple[int, int]],
+        resume_from: Optional[int] = None,
+        cursor: Optional[List[int]] = None,
+    ) -> Iterator[bytes]:
+        """Yield the lines of sorted (begin, end) index chunks, skipping everything before `resume_from`."""
+        for chunk_beg, chunk_end in chunks:
+            if resume_from is not None:
+                if chunk_end <= resume_from:
+                    continue
+                chunk_beg = max(chunk_beg, resume_from)
+            yield from self._iter_raw_lines(chunk_beg, chunk_end, cursor)
+
+    def _byte_ranges(self, data_start: int) -> Iterator[Tuple[int, int]]:
+        """Split the record section of a plain text VCF into (start, end) byte ranges."""
+        file_end = Path(self.filename).stat().st_size
+
+        for start in range(data_start, file_end, _CHUNK_SIZE):
+            yield start, min(start + _CHUNK_SIZE, file_end)
+
+    def _mapped_ranges(self, buffer: MemoryMap, data_start: int) -> Iterator[Tuple[int, int]]:
+        """Split the record section of the memory-mapped VCF `buffer` into (start, end) ranges of whole lines."""
+        start, file_end = data_start, len(buffer)
+        while start < file_end:
+            newline = buffer.find(b"\n", min(start + _CHUNK_SIZE, file_end) - 1)
+            end = file_end if newline == -1 else newline + 1
+            yield start, end
+            start = end
+
+    def _bgzf_ranges(self, data_start: int) -> Iterator[Tuple[int, Optional[int], int]]:
+        """Split the record section of a bgzipped VCF at block boundaries.
+
+        Yields
+        ------
+        Tuple[int, Optional[int], int]
+            (start, skip_from, end) virtual offsets. ``skip_from`` points at the last byte of
+            the block before ``start``, so a worker can read from there to the end of that line
+            and land on the first line that begins in its range (None for the first range).
+        """
+        start, skip_from = data_start, None
+        skip_from_candidate: Optional[int] = None
+        chunk_bytes = 0
+        block_end = split_virtual_offset(data_start)[0]
+        for block_start, block_size, data_size in iter_blocks(self.filename, block_end):
+            if chunk_bytes >= _CHUNK_SIZE and data_size and skip_from_candidate is not None:
+                end = make_virtual_offset(block_start, 0)
+                yield start, skip_from, end
+                start, skip_from = end, skip_from_candidate
+                chunk_bytes = 0
+            chunk_bytes += block_size
+            block_end = block_start + block_size
+            if data_size:
+                skip_from_candidate = make_virtual_offset(block_start, data_size - 1)
+        yield start, skip_from, make_virtual_offset(block_end, 0)
+
+
+# size of the blocks read by count_records to count newlines
+_COUNT_BLOCK_SIZE = 1024 * 1024
+# the line ending of a blank line, i.e. one that directly follows another line ending
+_BLANK_LINE = re.compile(rb"(?<=\n)\r?\n")
+
+# size of the byte ranges (plain files), compressed block ranges (bgzipped files) and
+# line batches (plain gzip files) handed to each worker
+_CHUNK_SIZE = 4 * 1024 * 1024
+_BATCH_LINES = 10000
+
+# Record or RawRecord, for the helpers that pass either kind through unchanged
+_RecordT = TypeVar("_RecordT", bound=Union[Record, RawRecord])
+
+
+def _as_region_set(regions: Union[RegionSet, Iterable[Tuple[str, int, int]], str, Path]) -> RegionSet:
+    """Turn the regions argument of parse_records into a RegionSet."""
+    if isinstance(regions, RegionSet):
+        return regions
+    if isinstance(regions, (str, Path)):
+        return RegionSet.from_bed(regions)
+    return RegionSet(regions)
+
+
+def _filter_records(
+    lines: Iterable[str],
+    record_keys: Union[List[str], RecordHeader],
+    chrom: Optional[str] = None,
+    pos_range: Optional[Tuple[int, int]] = None,
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> Iterator[Record]:
+    """Create Record objects from the record lines that pass the chrom/pos_range filters.
+
+    With a projection, lines are only split up to the last projected column and
+    ProjectedRecord objects are created. With a record filter, lines are first split only as
+    far as the filter needs and rejected lines are never split any further.
+    """
+    if pos_range:
+        start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
+    maxsplit = -1 if projection is None else projection.maxsplit
+    predicate = None if record_filter is None else record_filter.predicate
+    first_split = maxsplit if record_filter is None else record_filter.maxsplit
+    chrom_prefix = chrom + "\t" if chrom else ""
+
+    # one header for all records of the batch instead of one per record
+    header = RecordHeader.of(record_keys)
+
+    for record_line_str in lines:
+        # lines of other chromosomes are dropped before they are split
+        if not record_line_str.startswith(chrom_prefix):
+            continue
+        record_line_str = record_line_str.rstrip("\r\n")
+        record_line_fields = record_line_str.split("\t", first_split)
+
+        # in order to select only selected chrom values
+        if chrom and record_line_fields[0] != chrom:
+            continue
+        if pos_range and not start_pos <= int(record_line_fields[1]) <= end_pos:
+            continue
+        if predicate is not None:
+            if not predicate(record_line_fields):
+                continue
+            if first_split != maxsplit:
+                record_line_fields = record_line_str.split("\t", maxsplit)
+        if projection is None:
+            yield Record(record_line_fields, header)
+        else:
+            yield ProjectedRecord(record_line_fields, header, projection)
+
+
+def _until_region_passed(
+    lines: Iterable[bytes],
+    chrom: Optional[str],
+    pos_range: Optional[Tuple[int, int]],
+    contig_ranks: Optional[Dict[str, int]] = None,
+) -> Iterator[bytes]:
+    """Yield the raw lines of a sorted file until the chrom/pos_range region is passed.
+
+    With a chrom, lines of other chromosomes are skipped by their CHROM prefix and reading stops
+    once the chromosome ends, or a chromosome that comes after it in ``contig_ranks`` shows up.
+    With only a pos_range, the rest of each chromosome is skipped once POS passes the end of the
+    range.
+    """
+    end_pos = int(pos_range[1]) if pos_range else None
+
+    if chrom:
+        prefix = chrom.encode() + b"\t"
+        pos_start = len(prefix)
+        target_rank = contig_ranks.get(chrom) if contig_ranks else None
+        seen_chrom = False
+        for line in lines:
+            if line.startswith(prefix):
+                seen_chrom = True
+                if end_pos is not None and int(line[pos_start:line.find(b"\t", pos_start)]) > end_pos:
+                    return
+                yield line
+            elif seen_chrom:
+                return
+            elif target_rank is not None and contig_ranks is not None:
+                rank = contig_ranks.get(line[:line.find(b"\t")].decode())
+                if rank is not None and rank > target_rank:
+                    return
+        return
+
+    if end_pos is None:
+        yield from lines
+        return
+    skip_prefix = None
+    for line in lines:
+        if skip_prefix is not None:
+            if line.startswith(skip_prefix):
+                continue
+            skip_prefix = None
+        chrom_end = line.find(b"\t")
+        if chrom_end < 0:
+            yield line
+            continue
+        if int(line[chrom_end + 1:line.find(b"\t", chrom_end + 1)]) > end_pos:
+            # the rest of this chromosome is past the range too
+            skip_prefix = line[:chrom_end + 1]
+            continue
+        yield line
+
+
+def _split_lines(
+    lines: Iterable[str],
+    chrom: Optional[str] = None,
+    pos_range: Optional[Tuple[int, int]] = None,
+) -> List[List[str]]:
+    """Split a batch of record lines into field lists and apply the chrom/pos_range filters in bulk."""
+    rows = [line.rstrip("\r\n").split("\t") for line in lines]
+    if chrom:
+        rows = [row for row in rows if row[0] == chrom]
+    if pos_range:
+        start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
+        rows = [row for row in rows if start_pos <= int(row[1]) <= end_pos]
+    return rows
+
+
+def _filter_raw_records(
+    lines: Iterable[bytes],
+    record_keys: Union[List[str], RecordHeader],
+    chrom: Optional[str] = None,
+    pos_range: Optional[Tuple[int, int]] = None,
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> Iterator[Record]:
+    """Like _filter_records, but the filters run on the raw bytes and only kept lines are decoded."""
+    chrom_prefix = chrom.encode() + b"\t" if chrom else b""
+    if pos_range:
+        start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
+    maxsplit = -1 if projection is None else projection.maxsplit
+    predicate = None if record_filter is None else record_filter.predicate
+    filter_maxsplit = -1 if record_filter is None else record_filter.maxsplit
+
+    # one header for all records of the batch instead of one per record
+    header = RecordHeader.of(record_keys)
+
+    for line in lines:
+        if not line.startswith(chrom_prefix):
+            continue
+        if pos_range:
+            pos_start = line.index(b"\t") + 1
+            if not start_pos <= int(line[pos_start:line.index(b"\t", pos_start)]) <= end_pos:
+                continue
+        record_line_str = line.decode().rstrip("\r\n")
+        if predicate is not None and not predicate(record_line_str.split("\t", filter_maxsplit)):
+            continue
+        record_line_fields = record_line_str.split("\t", maxsplit)
+        if projection is None:
+            yield Record(record_line_fields, header)
+        else:
+            yield ProjectedRecord(record_line_fields, header, projection)
+
+
+def _raw_line_records(
+    lines: Iterable[bytes],
+    record_keys: List[str],
+    chrom: Optional[str] = None,
+    pos_range: Optional[Tuple[int, int]] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> Iterator[RawRecord]:
+    """Wrap the raw record lines that pass the filters in RawRecord objects.
+
+    Only the fields the record filter reads are decoded; the rest of a line stays bytes.
+    """
+    chrom_prefix = chrom.encode() + b"\t" if chrom else b""
+    if pos_range:
+        start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
+    predicate = None if record_filter is None else record_filter.predicate
+    maxsplit = -1 if record_filter is None else record_filter.maxsplit
+
+    for line in lines:
+        if not line.startswith(chrom_prefix):
+            continue
+        line = line.rstrip(b"\r\n")
+        if not line:
+            continue
+        if pos_range:
+            pos_start = line.index(b"\t") + 1
+            if not start_pos <= int(line[pos_start:line.index(b"\t", pos_start)]) <= end_pos:
+                continue
+        if predicate is not None:
+            fields = line.split(b"\t", maxsplit)
+            # the unsplit tail after the last field the filter reads is left undecoded
+            if maxsplit >= 0 and len(fields) > maxsplit:
+                fields.pop()
+            if not predicate([field.decode() for field in fields]):
+                continue
+        yield RawRecord(line, record_keys)
+
+
+def _count_raw_lines(
+    lines: Iterable[bytes],
+    indices: List[int],
+    chrom: Optional[str] = None,
+    pos_range: Optional[Tuple[int, int]] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> "Counter[Any]":
+    """Count the raw record lines that pass the filters by the values of the columns at `indices`.
+
+    Lines are split only up to the last column needed. Keys are bytes, or tuples of bytes,
+    unless a record filter is given, which needs the fields decoded.
+    """
+    chrom_prefix = chrom.encode() + b"\t" if chrom else b""
+    if pos_range:
+        start_pos, end_pos = int(pos_range[0]), int(pos_range[1])
+    key_of = itemgetter(*indices) if indices else None
+    maxsplit = max(indices + [1]) + 1
+    predicate = None
+    if record_filter is not None:
+        predicate = record_filter.predicate
+        maxsplit = -1 if record_filter.maxsplit < 0 else max(maxsplit, record_filter.maxsplit)
+
+    counts: "Counter[Any]" = Counter()
+    for line in lines:
+        if not line.startswith(chrom_prefix):
+            continue
+        if predicate is None:
+            fields: List[Any] = line.rstrip(b"\r\n").split(b"\t", maxsplit)
+        else:
+            fields = line.decode().rstrip("\r\n").split("\t", maxsplit)
+        if len(fields) < 2:
+            # blank line
+            continue
+        if pos_range and not start_pos <= int(fields[1]) <= end_pos:
+            continue
+        if predicate is not None and not predicate(fields):
+            continue
+        counts[key_of(fields) if key_of else None] += 1
+    return counts
+
+
+def _reservoir_sample(items: Iterable[Any], k: int, rng: random.Random) -> List[Tuple[int, Any]]:
+    """Draw k (item number, item) pairs uniformly from an iterable of unknown length.
+
+    Algorithm L: after the reservoir is full, the number of items to skip until the next
+    replacement is drawn directly, so most items cost no random numbers at all.
+    """
+    numbered = enumerate(items)
+    reservoir = list(itertools.islice(numbered, k))
+    if len(reservoir) < k:
+        return reservoir
+    # 1 - random() lies in (0, 1], so the logarithms are defined
+    weight = math.exp(math.log(1.0 - rng.random()) / k)
+    while weight < 1.0:
+        skip = math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - weight))
+        item = next(itertools.islice(numbered, skip, None), None)
+        if item is None:
+            break
+        reservoir[rng.randrange(k)] = item
+        weight *= math.exp(math.log(1.0 - rng.random()) / k)
+    return reservoir
+
+
+def _decode_key(key: Any, as_tuple: bool) -> Any:
+    """Decode a count_records key made of bytes; `as_tuple` wraps a single value in a tuple."""
+    if isinstance(key, tuple):
+        return tuple(value.decode() if isinstance(value, bytes) else value for value in key)
+    value = key.decode() if isinstance(key, bytes) else key
+    return (value,) if as_tuple else value
+
+
+def _mapped_lines(
+    buffer: MemoryMap, start: int, end: int, cursor: Optional[List[int]] = None
+) -> Iterator[bytes]:
+    """Yield the lines of a memory-mapped file between offsets `start` and `end`.
+
+    If a `cursor` list is given, its first item is kept at the offset after the last yielded line.
+    """
+    find = buffer.find
+    while start < end:
+        newline = find(b"\n", start, end)
+        stop = end if newline == -1 else newline + 1
+        if cursor is not None:
+            cursor[0] = stop
+        yield buffer[start:stop]
+        start = stop
+
+
+def _decode_line(line: bytes) -> str:
+    """Decode a raw line, turning a Windows line ending into '\\n' as text mode would."""
+    if line.endswith(b"\r\n"):
+        line = line[:-2] + b"\n"
+    return line.decode()
+
+
+def _parse_line_batch(
+    lines: List[str],
+    record_keys: List[str],
+    chrom: Optional[str],
+    pos_range: Optional[Tuple[int, int]],
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> List[Record]:
+    """Worker task: parse an already decompressed batch of record lines."""
+    return list(_filter_records(lines, record_keys, chrom, pos_range, projection, record_filter))
+
+
+def _parse_byte_range(
+    filename: str,
+    start: int,
+    end: int,
+    record_keys: List[str],
+    chrom: Optional[str],
+    pos_range: Optional[Tuple[int, int]],
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> List[Record]:
+    """Worker task: parse the record lines that begin inside the byte range [start, end).
+
+    A line that straddles a chunk boundary belongs to the chunk its first byte falls in,
+    so every line is parsed exactly once across consecutive ranges.
+    """
+    def _lines_in_range(raw_file: BinaryIO) -> Iterator[str]:
+        # skip the tail of the line that started in the previous chunk
+        raw_file.seek(start - 1)
+        raw_file.readline()
+        position = raw_file.tell()
+        while position < end:
+            line = raw_file.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode()
+
+    with open(filename, "rb") as raw_file:
+        return list(_filter_records(_lines_in_range(raw_file), record_keys, chrom, pos_range, projection, record_filter))
+
+
+def _parse_mapped_range(
+    filename: str,
+    start: int,
+    end: int,
+    record_keys: List[str],
+    chrom: Optional[str],
+    pos_range: Optional[Tuple[int, int]],
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> List[Record]:
+    """Worker task: parse the whole record lines in [start, end) of a memory-mapped file."""
+    with open(filename, "rb") as raw_file, MemoryMap(raw_file.fileno(), 0, access=ACCESS_READ) as buffer:
+        return list(_filter_raw_records(_mapped_lines(buffer, start, end), record_keys, chrom, pos_range, projection, record_filter))
+
+
+def _parse_bgzf_range(
+    filename: str,
+    start: int,
+    skip_from: Optional[int],
+    end: int,
+    record_keys: List[str],
+    chrom: Optional[str],
+    pos_range: Optional[Tuple[int, int]],
+    projection: Optional[Projection] = None,
+    record_filter: Optional[LineFilter] = None,
+) -> List[Record]:
+    """Worker task: parse the record lines that begin inside the virtual offset range [start, end)."""
+    def _lines_in_range(reader: BgzfReader) -> Iterator[str]:
+        if skip_from is None:
+            reader.seek(start)
+        else:
+            # skip the tail of the line that started in the previous range
+            reader.seek(skip_from)
+            reader.readline()
+        while reader.tell() < end:
+            line = reader.readline()
+            if not line:
+                break
+            yield line.decode()
+
+    with BgzfReader(filename) as reader:
+        return list(_filter_records(_lines_in_range(reader), record_keys, chrom, pos_range, projection, record_filter))
+
+
+def _batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _checkpointed(
+    records: Iterable[_RecordT],
+    position: Callable[[], int],
+    checkpoint: Callable[[int], Any],
+    checkpoint_every: int,
+) -> Iterator[_RecordT]:
+    """Yield the records and pass the resume offset to `checkpoint` every `checkpoint_every` records.
+
+    The offset is taken when the consumer asks for the next record, so it points just past the
+    line of a record that has been handed out. A last checkpoint is made at the end of the scan.
+    """
+    count = 0
+    for record in records:
+        yield record
+        count += 1
+        if count == checkpoint_every:
+            checkpoint(position())
+            count = 0
+    checkpoint(position())
+
+
+def _ordered_pool_map(tasks: Iterable[Tuple[Any, ...]], no_processors: int) -> Iterator[Record]:
+    """Run (function, *args) tasks in a process pool and yield their records in task order.
+
+    At most ``2 * no_processors`` tasks are in flight at any time, so memory stays flat
+    no matter how large the input file is.
+    """
+    max_in_flight = 2 * no_processors
+    pending: Deque[Future] = deque()
+    pool = ProcessPoolExecutor(max_workers=no_processors)
+    try:
+        for func, *args in tasks:
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+            pending.append(pool.submit(func, *args))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # the consumer may stop iterating early; drop the work that has not started yet
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
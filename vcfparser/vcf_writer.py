@@ -1,6 +1,8 @@
-from typing import TextIO, Optional, Union, List, Any
+from typing import TextIO, Optional, Union, List, Any, Iterable
 import os
 
+from vcfparser.record_parser import RawRecord, Record
+
 
 class VCFWriter:
     """
@@ -28,6 +30,7 @@ class VCFWriter:
     filename: str
     w_file: Optional[Any]  # Using Any to handle file objects
     _is_closed: bool
+    _raw_mode: bool
 
     def __init__(self, filename: str, mode: str = "w") -> None:
         """
@@ -43,6 +46,8 @@ class VCFWriter:
         self.filename = filename
         self.w_file = None
         self._is_closed = False
+        # set while the last write went straight to the binary buffer (see add_record)
+        self._raw_mode = False
         
         try:
             self.w_file = open(filename, mode, encoding="utf-8")
@@ -68,6 +73,7 @@ class VCFWriter:
         """Ensure the file is open for writing."""
         if self.w_file is None or self._is_closed:
             raise ValueError("File is not open for writing")
+        self._raw_mode = False
 
     def add_normal_metadata(self, key: str, value: str) -> None:
         """
@@ -314,6 +320,51 @@ class VCFWriter:
         record_line = "\t".join(record_parts)
         print(record_line, file=self.w_file)
     
+    def add_record(self, record: Union[Record, RawRecord]) -> None:
+        """
+        Add a record returned by VcfParser.parse_records.
+
+        A RawRecord (from ``parse_records(raw=True)``) is written as its original bytes, without
+        being decoded or re-joined; a Record is written as its record line.
+
+        Parameters
+        ----------
+        record : Union[Record, RawRecord]
+            Record to write
+
+        Examples
+        --------
+        >>> for raw_record in vcf.parse_records(chrom="chr1", raw=True):
+        ...     writer.add_record(raw_record)
+        """
+        if isinstance(record, RawRecord):
+            if self.w_file is None or self._is_closed:
+                raise ValueError("File is not open for writing")
+            if not self._raw_mode:
+                # header lines printed so far are still buffered in the text layer
+                self.w_file.flush()
+                self._raw_mode = True
+            self.w_file.buffer.write(record.line + b"\n")
+        else:
+            self._ensure_open()
+            print(record.rec_line.rstrip("\r\n"), file=self.w_file)
+
+    def add_records(self, records: Iterable[Union[Record, RawRecord]]) -> None:
+        """
+        Add all records of an iterable, e.g. the output of VcfParser.parse_records.
+
+        Parameters
+        ----------
+        records : Iterable[Union[Record, RawRecord]]
+            Records to write
+
+        Examples
+        --------
+        >>> writer.add_records(vcf.parse_records(filter="QUAL >= 30", raw=True))
+        """
+        for record in records:
+            self.add_record(record)
+
     def __del__(self) -> None:
         """Destructor to ensure file is closed."""
         self.close()